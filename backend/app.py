@@ -50,7 +50,7 @@ class JSApi:
 def start_app():
     # Pre-import engine to ensure native libs are initialized on the main thread if possible
     try:
-        from backend.routes import engine
+        from backend.routes import job_manager
         print("Engine initialized.")
     except Exception as e:
         print(f"Engine initialization error: {e}")
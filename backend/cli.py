@@ -0,0 +1,177 @@
+"""
+Headless batch runner (no pywebview, no Flask).
+
+    python -m backend.cli review <dir> [<dir> ...] --rounds 3 --parallel-dirs 2
+
+Every line written to stdout is one JSON event:
+    {"event": "started" | "log" | "progress" | "finished" | "error", "directory": ..., ...}
+Anything else printed while reviews run (provider errors, tracebacks) goes to stderr.
+
+Exit codes: 0 all directories completed, 1 at least one failed, 2 usage error,
+130 interrupted (Ctrl+C stops all running reviews; finished batches stay in the journal).
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+from backend import config_manager
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+_print_lock = threading.Lock()
+# The real stdout while cmd_review has sys.stdout pointed at stderr
+_event_stream = None
+
+
+def emit(event, directory=None, **fields):
+    record = {"event": event, "time": round(time.time(), 3)}
+    if directory is not None:
+        record["directory"] = directory
+    record.update(fields)
+    stream = _event_stream or sys.stdout
+    with _print_lock:
+        stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        stream.flush()
+
+
+def _read_background(args, directory):
+    if args.background_file:
+        path = args.background_file
+        if not os.path.isabs(path) and os.path.isfile(os.path.join(directory, path)):
+            path = os.path.join(directory, path)
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    if args.background is not None:
+        return args.background
+    return config_manager.load_config().get('last_task_context', '')
+
+
+def review_directory(directory, args, ai_service, engines):
+    """Run one review to completion. Returns 'completed', 'stopped' or 'failed'."""
+    from backend.core.engine import ReviewEngine
+
+    if not os.path.isdir(directory):
+        emit("error", directory, message="Directory does not exist")
+        return "failed"
+
+    engine = ReviewEngine(ai_service=ai_service)
+    engines.append(engine)
+    finished = threading.Event()
+    engine.on_finished = finished.set
+    if not args.quiet:
+        engine.on_log = lambda message: emit("log", directory, message=message)
+
+    background = _read_background(args, directory)
+    ok, msg = engine.start_task(
+        directory, background, args.rounds,
+        glossary_file=args.glossary_file,
+        reference_file=args.reference_file,
+        reload_service=False,
+    )
+    if not ok:
+        emit("error", directory, message=msg)
+        return "failed"
+    emit("started", directory, rounds=args.rounds)
+
+    last_progress = None
+    while not finished.wait(args.interval):
+        progress = engine.progress.copy()
+        if progress != last_progress:
+            emit("progress", directory, **progress, metrics=engine.metrics.snapshot())
+            last_progress = progress
+
+    if engine.stop_event.is_set():
+        state = "stopped"
+    elif engine.error:
+        state = "failed"
+    else:
+        state = "completed"
+    emit("finished", directory, state=state, error=engine.error, progress=engine.progress.copy())
+    return state
+
+
+def cmd_review(args):
+    # The backend print()s diagnostics; keep them out of the JSON event stream
+    global _event_stream
+    _event_stream = sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            return _review_all(args)
+    finally:
+        _event_stream = None
+
+
+def _review_all(args):
+    from backend.core.ai_service import AIService
+
+    directories = [os.path.abspath(d) for d in args.directories]
+    ai_service = AIService()
+    engines = []
+    states = []
+
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.parallel_dirs))
+    futures = [pool.submit(review_directory, d, args, ai_service, engines) for d in directories]
+    try:
+        for future in futures:
+            while True:
+                try:
+                    states.append(future.result(timeout=0.5))
+                    break
+                except concurrent.futures.TimeoutError:
+                    continue
+    except KeyboardInterrupt:
+        emit("error", message="Interrupted, stopping all reviews...")
+        for future in futures:
+            future.cancel()
+        for engine in list(engines):
+            engine.stop_task()
+        pool.shutdown(wait=True)
+        return EXIT_INTERRUPTED
+    pool.shutdown(wait=True)
+
+    return EXIT_OK if all(state == "completed" for state in states) else EXIT_FAILED
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m backend.cli", description="Headless glossary review runner")
+    parser.add_argument("--config", help="Path to cfg.json (defaults to the application config)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    review = sub.add_parser("review", help="Review one or more novel folders")
+    review.add_argument("directories", nargs="+", help="Folders containing the glossary .xlsx and reference .txt")
+    review.add_argument("--rounds", type=int, default=1, help="Number of review rounds (default: 1)")
+    review.add_argument("--parallel-dirs", type=int, default=1, help="Folders reviewed at the same time (default: 1)")
+    review.add_argument("--background", help="Novel background text")
+    review.add_argument("--background-file", help="File with the novel background (relative paths are tried inside each folder first)")
+    review.add_argument("--glossary-file", help="Glossary file name inside each folder (default: auto-detect)")
+    review.add_argument("--reference-file", help="Reference file name inside each folder (default: auto-detect)")
+    review.add_argument("--interval", type=float, default=2.0, help="Seconds between progress events (default: 2)")
+    review.add_argument("--quiet", action="store_true", help="Do not emit engine log lines")
+    review.set_defaults(func=cmd_review)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return EXIT_USAGE if e.code else EXIT_OK
+    if getattr(args, "rounds", 1) < 1:
+        parser.print_usage(sys.stderr)
+        return EXIT_USAGE
+    if args.config:
+        config_manager.CONFIG_PATH = os.path.abspath(args.config)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,17 +1,46 @@
+import asyncio
+import concurrent.futures
+import contextvars
 import openai
+import os
 import time
 import random
 import threading
+import types
+from backend import config_manager
 from backend.config_manager import load_config
+from backend.core.batch_packing import DEFAULT_MAX_OUTPUT_TOKENS
+from backend.core.concurrency import AdaptiveConcurrencyLimiter
+from backend.core import prometheus
+from backend.core import tracing
+from backend.core.hedging import HedgePolicy
+from backend.core.preflight import KeyValidator
+from backend.core.provider_health import ProviderHealth
+from backend.core.rate_limit import ProviderLimiter
+from backend.core.replay import ReplayStore
+from backend.core.response_cache import ResponseCache, cache_key
+from backend.core.stream_parser import JsonArrayStream
+
+TEMPERATURE = 0.1
+
+
+class StreamStalledError(openai.APITimeoutError):
+    """A streamed response that stopped sending tokens for stream_stall_timeout seconds."""
 
 class AIService:
     def __init__(self):
         self.config = load_config()
         self.providers = [] # List of dicts: {'client': Client, 'model': str, 'name': str, 'key': str}
         self.valid_providers = [] # Subset of providers that passed validation
-        self.current_provider_index = 0
+        self._route_weights = {}  # id(provider) -> smooth weighted round-robin credit
+        self.concurrency = AdaptiveConcurrencyLimiter()
+        self.replay = None
+        self.response_cache = None
+        self.hedging = HedgePolicy()
+        self._hedge_pool = None
+        self._provider_lock = threading.Lock()
+        self.key_validator = KeyValidator()
         self.reload_config()
-        self.rate_limit_pause_event = threading.Event()
 
     def reload_config(self):
         self.config = load_config()
@@ -20,7 +49,22 @@ class AIService:
         # Load configurable timeouts (default to safe values for reasoning models)
         self.request_timeout = float(self.config.get("request_timeout", 600.0))
         self.connect_timeout = float(self.config.get("connect_timeout", 120.0))
+        self.key_validator.ttl = float(self.config.get("preflight_cache_ttl", 600))
+
+        # Optional streaming: a stream that sends nothing for stream_stall_timeout seconds is aborted.
+        # The same limit applies to the first token, so keep it above the model's time to first token.
+        self.stream_responses = bool(self.config.get("stream_responses", False))
+        self.stream_stall_timeout = float(self.config.get("stream_stall_timeout", 90.0))
 
+        # Adaptive concurrency (AIMD): MAX_WORKERS is the starting limit, MAX_CONCURRENCY the ceiling
+        max_workers = int(self.config.get("MAX_WORKERS", 3))
+        adaptive = bool(self.config.get("adaptive_concurrency", True))
+        self.concurrency.configure(
+            initial=max_workers,
+            min_limit=self.config.get("MIN_WORKERS", 1),
+            max_limit=self.config.get("MAX_CONCURRENCY", max_workers * 4) if adaptive else max_workers,
+            adaptive=adaptive,
+        )
         
         # Check for new 'providers' list structure
         config_providers = self.config.get("providers", [])
@@ -38,7 +82,11 @@ class AIService:
                     config_providers.append({
                         "api_key": k,
                         "base_url": legacy_url,
-                        "model": legacy_model
+                        "model": legacy_model,
+                        "rpm": self.config.get("rpm"),
+                        "tpm": self.config.get("tpm"),
+                        "context_window": self.config.get("context_window"),
+                        "max_output_tokens": self.config.get("max_output_tokens"),
                     })
 
         # Initialize clients for all providers
@@ -71,92 +119,640 @@ class AIService:
                         "name": f"{model} @ {base_url} ({masked_key})",
                         "api_key": api_key, # Store for validation / reference
                         "base_url": base_url,
-                        "enabled": True
+                        "enabled": True,
+                        # Token budget for batch packing (see backend/core/batch_packing.py)
+                        "context_window": p.get("context_window"),
+                        "max_output_tokens": p.get("max_output_tokens"),
+                        # Optional per-key quotas, enforced before sending (see backend/core/rate_limit.py)
+                        "limiter": ProviderLimiter(p.get("rpm"), p.get("tpm")),
+                        # Rolling latency/success rate and circuit breaker (see backend/core/provider_health.py)
+                        "health": ProviderHealth(
+                            self.config.get("circuit_failure_threshold", 5),
+                            self.config.get("circuit_open_seconds", 30),
+                        ),
                     })
                 except Exception as e:
                     print(f"Error initializing provider {model}: {e}")
 
         # Default to all being candidates until validated
         self.valid_providers = list(self.providers)
-        self.current_provider_index = 0
+        self._route_weights = {}
 
-    def validate_keys(self, log_callback=None):
+        # Optional hedged requests against tail latency (see backend/core/hedging.py)
+        self.hedging = HedgePolicy.from_config(self.config)
+
+        # Optional record/replay of responses (see backend/core/replay.py)
+        config_dir = os.path.dirname(os.path.abspath(config_manager.CONFIG_PATH))
+        try:
+            self.replay = ReplayStore.from_config(self.config, config_dir)
+        except ValueError as e:
+            print(f"Error initializing LLM replay: {e}")
+            self.replay = None
+
+        # Persistent response cache (see backend/core/response_cache.py). Other jobs may be using the
+        # old one right now: swap in the new cache first, then close the old (it answers misses from then on)
+        old_cache = self.response_cache
+        try:
+            self.response_cache = ResponseCache.from_config(self.config, config_dir)
+        except (OSError, ValueError) as e:
+            print(f"Error opening LLM response cache: {e}")
+            self.response_cache = None
+        if old_cache is not None:
+            old_cache.close()
+
+    def validate_keys(self, log_callback=None, wait_all=None):
         """
-        Pre-flight check: Test all providers and filter out invalid ones.
-        Returns the number of valid providers found.
+        Pre-flight check: Test all providers concurrently (see backend/core/preflight.py) and
+        filter out invalid ones. Unless wait_all ("preflight_wait_all" in cfg.json), returns as
+        soon as one provider passed; the rest join valid_providers when their checks succeed.
+        Returns the number of valid providers found so far.
         """
+        if self.replay is not None and self.replay.mode == "replay":
+            if log_callback:
+                log_callback(f"Replay mode: serving {len(self.replay)} recorded responses from {self.replay.path}, skipping key validation.")
+            return max(1, len(self.valid_providers))
+
+        if wait_all is None:
+            wait_all = bool(self.config.get("preflight_wait_all", False))
+        providers = list(self.providers)
         if log_callback:
-            log_callback(f"Starting pre-flight validation for {len(self.providers)} providers...")
-            
-        valid_list = []
-        for provider in self.providers:
-            name = provider['name']
-            try:
-                # Create a temporary check client with short timeout
-                kwargs_check = {
-                    "api_key": provider['api_key'] if provider['api_key'] else "dummy_key",
-                    "timeout": self.connect_timeout,
-                    "default_headers": {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"}
-                }
-                if provider['base_url']:
-                    kwargs_check["base_url"] = provider['base_url']
-                    
-                check_client = openai.OpenAI(**kwargs_check)
-                
-                # Use a unique prompt to prevent caching from upstream proxies
-                unique_prompt = f"Hi from review tool check {int(time.time())} {random.randint(1000, 9999)}"
-                
-                response = check_client.chat.completions.create(
-                    model=provider['model'],
-                    messages=[{"role": "user", "content": unique_prompt}],
-                    max_tokens=5
-                )
-                
-                # Ensure we got a valid response object
-                if response and response.choices:
-                     valid_list.append(provider)
-                     if log_callback:
-                        log_callback(f"✅ {name}: Valid")
-                else:
-                    raise Exception("Empty response from API")
+            log_callback(f"Starting pre-flight validation for {len(providers)} providers...")
+
+        checks = {self.key_validator.submit(p, self.connect_timeout): p for p in providers}
+        valid_ids = set()
+        pending = set(checks)
+        while pending and not (valid_ids and not wait_all):
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if self._validated(checks[future], future.result(), log_callback):
+                    valid_ids.add(id(checks[future]))
+
+        with self._provider_lock:
+            # Keep the configured order
+            self.valid_providers = [p for p in providers if id(p) in valid_ids]
+            self._route_weights = {}
+        for future in pending:
+            future.add_done_callback(lambda f, provider=checks[future]: self._late_validation(provider, f, log_callback))
 
-            except Exception as e:
-                if log_callback:
-                    # Log the full error to help debug 500s "No available credentials"
-                    log_callback(f"❌ {name}: Failed - {str(e)}")
-        
-        self.valid_providers = valid_list
-        self.current_provider_index = 0
-        
         if not self.valid_providers:
             if log_callback:
                 log_callback("CRITICAL: All API providers failed validation!")
             return 0
-            
+        if pending and log_callback:
+            log_callback(f"{len(pending)} providers still being checked, starting with {len(self.valid_providers)}.")
+
         return len(self.valid_providers)
 
-    def get_next_provider(self):
-        if not self.valid_providers:
-            raise Exception("No valid API providers available.")
-        
-        provider = self.valid_providers[self.current_provider_index]
-        self.current_provider_index = (self.current_provider_index + 1) % len(self.valid_providers)
-        return provider
+    def _validated(self, provider, result, log_callback):
+        ok, message, cached = result
+        if log_callback:
+            suffix = " (cached)" if cached else ""
+            if ok:
+                log_callback(f"✅ {provider['name']}: Valid{suffix}")
+            else:
+                # Log the full error to help debug 500s "No available credentials"
+                log_callback(f"❌ {provider['name']}: Failed - {message}{suffix}")
+        return ok
 
-    def call_api(self, prompt, model=None, log_callback=None):
-        if self.rate_limit_pause_event.is_set():
-            if log_callback: log_callback("Rate limit hit. Pausing...")
-            self.rate_limit_pause_event.wait()
+    def _late_validation(self, provider, future, log_callback):
+        # A check that finished after the task started; ignored if the config was reloaded since
+        if not self._validated(provider, future.result(), log_callback):
+            return
+        with self._provider_lock:
+            if any(p is provider for p in self.providers) and not any(p is provider for p in self.valid_providers):
+                self.valid_providers = self.valid_providers + [provider]
 
-        max_retries = 3
+    def prevalidate(self):
+        """Start checking every provider in the background to warm the pre-flight cache."""
+        for provider in self.providers:
+            self.key_validator.submit(provider, self.connect_timeout)
+
+    def _next_provider(self, prompt, exclude=None, ready_only=False):
+        """
+        Smooth weighted round-robin over providers whose circuit breaker is closed (or due a
+        half-open probe), weighted by health, among those that can send right now under their
+        RPM/TPM quota and 429 pause; when none can, the one with the shortest wait. Reserves
+        the request on the chosen provider and returns (provider, estimated tokens, seconds
+        to wait before sending). With ready_only, returns None instead of waiting.
+        """
+        with self._provider_lock:
+            if not self.valid_providers:
+                raise Exception("No valid API providers available.")
+            providers = [p for p in self.valid_providers if p is not exclude]
+            if not providers:
+                return None
+            candidates = [p for p in providers if p.get('health') is None or p['health'].available()]
+            if not candidates and ready_only:
+                return None
+            # With every breaker open, fail open rather than refuse all work
+            candidates = candidates or providers
+
+            waits = []
+            for p in candidates:
+                limiter = p.get('limiter')
+                waits.append(limiter.wait_time(limiter.estimate(prompt)) if limiter else 0.0)
+            ready = [p for p, wait in zip(candidates, waits) if wait == 0]
+            if ready:
+                provider = self._weighted_pick(ready)
+            elif ready_only:
+                return None
+            else:
+                provider = candidates[waits.index(min(waits))]
+
+            if provider.get('health'):
+                provider['health'].acquire()
+            limiter = provider.get('limiter')
+            if limiter is None:
+                return provider, 0, 0.0
+            estimate = limiter.estimate(prompt)
+            return provider, estimate, limiter.reserve(estimate)
+
+    def _weighted_pick(self, providers):
+        # Caller holds _provider_lock. Providers without latency samples are weighted at the average latency.
+        known = [p['health'].latency_ewma for p in providers if p.get('health') and p['health'].latency_ewma is not None]
+        default_latency = sum(known) / len(known) if known else 1.0
+        total = 0.0
+        best = None
+        for p in providers:
+            weight = p['health'].weight(default_latency) if p.get('health') else 1.0
+            credit = self._route_weights.get(id(p), 0.0) + weight
+            self._route_weights[id(p)] = credit
+            total += weight
+            if best is None or credit > self._route_weights[id(best)]:
+                best = p
+        self._route_weights[id(best)] -= total
+        return best
+
+    def provider_stats(self):
+        """Per provider: RPM/TPM limiter state and routing health."""
+        stats = {}
+        for p in self.valid_providers:
+            entry = {}
+            if p.get('limiter'):
+                entry.update(p['limiter'].snapshot())
+            if p.get('health'):
+                entry.update(p['health'].snapshot())
+            stats[p['name']] = entry
+        return stats
+
+    def _request_kwargs(self, model, prompt, max_tokens=None):
+        kwargs = dict(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens or DEFAULT_MAX_OUTPUT_TOKENS,
+            temperature=TEMPERATURE,
+            timeout=self.request_timeout
+        )
+        if self.stream_responses:
+            kwargs.update(
+                stream=True,
+                stream_options={"include_usage": True},
+                # The read timeout is the gap allowed between two chunks
+                timeout=openai.Timeout(self.request_timeout, read=self.stream_stall_timeout),
+            )
+        return kwargs
+
+    def _stream_state(self, on_item):
+        return {"parts": [], "usage": None, "parser": JsonArrayStream() if on_item else None}
+
+    def _stream_chunk(self, state, chunk, on_item):
+        if getattr(chunk, 'usage', None) is not None:
+            state["usage"] = chunk.usage
+        if not chunk.choices:
+            return
+        delta = chunk.choices[0].delta.content
+        if delta:
+            state["parts"].append(delta)
+            if state["parser"] is not None:
+                for index, item in state["parser"].feed(delta):
+                    on_item(index, item)
+
+    def _stream_stalled(self, state, error, provider_name):
+        # Nothing received yet is a plain timeout; a gap after the first tokens is a stall
+        if not state["parts"]:
+            return error
+        prometheus.STREAM_STALLS.inc(provider=provider_name)
+        return StreamStalledError(request=error.request)
+
+    @staticmethod
+    def _streamed_response(state):
+        # Same shape as a non-streamed completion for the callers
+        content = "".join(state["parts"]) if state["parts"] else None
+        message = types.SimpleNamespace(content=content)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=state["usage"])
+
+    def _read_stream(self, stream, on_item, provider_name):
+        state = self._stream_state(on_item)
+        with stream:
+            try:
+                for chunk in stream:
+                    self._stream_chunk(state, chunk, on_item)
+            except openai.APITimeoutError as e:
+                raise self._stream_stalled(state, e, provider_name) from e
+        return self._streamed_response(state)
+
+    async def _read_stream_async(self, stream, on_item, provider_name):
+        state = self._stream_state(on_item)
+        async with stream:
+            try:
+                async for chunk in stream:
+                    self._stream_chunk(state, chunk, on_item)
+            except openai.APITimeoutError as e:
+                raise self._stream_stalled(state, e, provider_name) from e
+        return self._streamed_response(state)
+
+    @staticmethod
+    def _outcome(exc):
+        """Classify a failed request for the AIMD limiter."""
+        if isinstance(exc, openai.APITimeoutError):
+            return 'overload'
+        # 429 and 5xx mean the provider is saturated; other 4xx are not load related
+        if isinstance(exc, openai.APIStatusError) and (exc.status_code == 429 or exc.status_code >= 500):
+            return 'overload'
+        return 'error'
+
+    def _request_finished(self, started, outcome, provider_name, health=None, error=None):
+        latency = time.monotonic() - started
+        self.concurrency.release(outcome, latency)
+        prometheus.API_REQUESTS.inc(provider=provider_name, outcome=outcome)
+        prometheus.API_LATENCY.observe(latency, provider=provider_name)
+        if outcome == 'success':
+            self.hedging.observe(latency)
+        if health is None:
+            return
+        if outcome == 'success':
+            health.record_success(latency)
+        elif isinstance(error, (openai.RateLimitError, asyncio.CancelledError)):
+            health.record_neutral()
+        else:
+            self._health_failure(health, provider_name)
+
+    def _health_failure(self, health, provider_name):
+        if health.record_failure():
+            prometheus.PROVIDER_EJECTIONS.inc(provider=provider_name)
+            print(f"Circuit breaker opened for {provider_name} after {health.consecutive_failures} consecutive failures.")
+
+    def _create_completion(self, client, model, prompt, provider_name='unknown', health=None, on_start=None, on_item=None,
+                           max_tokens=None):
+        """Send one request inside a concurrency slot and report its outcome to the AIMD limiter and provider health."""
+        self.concurrency.acquire()
+        if on_start:
+            on_start()
+        started = time.monotonic()
+        outcome = 'error'
+        error = None
+        try:
+            response = client.chat.completions.create(**self._request_kwargs(model, prompt, max_tokens))
+            if self.stream_responses:
+                response = self._read_stream(response, on_item, provider_name)
+            outcome = 'success'
+            return response
+        except BaseException as e:
+            error = e
+            outcome = self._outcome(e)
+            raise
+        finally:
+            self._request_finished(started, outcome, provider_name, health, error)
+
+    async def _create_completion_async(self, client, model, prompt, provider_name='unknown', health=None, on_start=None, on_item=None,
+                                       max_tokens=None):
+        await self.concurrency.acquire_async()
+        if on_start:
+            on_start()
+        started = time.monotonic()
+        outcome = 'error'
+        error = None
+        try:
+            response = await client.chat.completions.create(**self._request_kwargs(model, prompt, max_tokens))
+            if self.stream_responses:
+                response = await self._read_stream_async(response, on_item, provider_name)
+            outcome = 'success'
+            return response
+        except BaseException as e:
+            error = e
+            outcome = self._outcome(e)
+            raise
+        finally:
+            self._request_finished(started, outcome, provider_name, health, error)
+
+    def _hedge_target(self, provider, prompt, log_callback):
+        """A different provider that can take a hedge right now, within the spend cap, or None."""
+        # Budget first: picking a target claims its half-open probe and reserves quota
+        if not self.hedging.try_hedge():
+            return None
+        hedge = self._next_provider(prompt, exclude=provider, ready_only=True)
+        if hedge is None:
+            self.hedging.refund()
+            return None
+        prometheus.HEDGED_REQUESTS.inc(provider=hedge[0]['name'])
+        if log_callback:
+            log_callback(f"{provider['name']} is slow, hedging the request on {hedge[0]['name']}...")
+        return hedge
+
+    def _send(self, provider, estimate, prompt, log_callback=None, on_item=None):
+        """
+        One attempt at `provider`, hedged on a second provider when enabled and the first is slow.
+        Returns (provider, estimate, response) of whichever answered first.
+        """
+        delay = self.hedging.delay()
+        if delay is None:
+            return provider, estimate, self._create_completion(
+                provider['client'], provider['model'], prompt, provider['name'], provider.get('health'), on_item=on_item,
+                max_tokens=provider.get('max_output_tokens'))
+
+        if self._hedge_pool is None:
+            # Every request runs here while hedging is on, so size it for the concurrency ceiling plus hedges
+            self._hedge_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(32, 2 * self.concurrency.max_limit), thread_name_prefix="hedge")
+        sent = threading.Event()
+        # copy_context carries the current tracer into the pool thread
+        primary = self._hedge_pool.submit(
+            contextvars.copy_context().run, self._create_completion,
+            provider['client'], provider['model'], prompt, provider['name'], provider.get('health'), sent.set, on_item,
+            provider.get('max_output_tokens'))
+        # Time from the moment the request got its concurrency slot, not from queueing for it
+        while not sent.wait(0.5) and not primary.done():
+            pass
+        done, _ = concurrent.futures.wait([primary], timeout=delay)
+        if done:
+            return provider, estimate, primary.result()
+
+        hedge = self._hedge_target(provider, prompt, log_callback)
+        if hedge is None:
+            return provider, estimate, primary.result()
+        hedge_provider, hedge_estimate, _ = hedge
+        secondary = self._hedge_pool.submit(
+            contextvars.copy_context().run, self._create_completion, hedge_provider['client'], hedge_provider['model'], prompt,
+            hedge_provider['name'], hedge_provider.get('health'), None, on_item, hedge_provider.get('max_output_tokens'))
+        owners = {primary: (provider, estimate), secondary: (hedge_provider, hedge_estimate)}
+
+        pending = set(owners)
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The loser keeps running in its worker thread; its answer is discarded
+                    if future is secondary:
+                        self.hedging.record_win()
+                    return owners[future] + (future.result(),)
+        raise primary.exception()
+
+    async def _send_async(self, provider, estimate, prompt, log_callback=None, on_item=None):
+        """_send for the async engine; the losing request is cancelled."""
+        delay = self.hedging.delay()
+        if delay is None:
+            return provider, estimate, await self._create_completion_async(
+                self._async_client(provider), provider['model'], prompt, provider['name'], provider.get('health'), on_item=on_item,
+                max_tokens=provider.get('max_output_tokens'))
+
+        sent = asyncio.Event()
+        primary = asyncio.ensure_future(self._create_completion_async(
+            self._async_client(provider), provider['model'], prompt, provider['name'], provider.get('health'), sent.set, on_item,
+            provider.get('max_output_tokens')))
+        tasks = [primary]
+        try:
+            started = asyncio.ensure_future(sent.wait())
+            await asyncio.wait({primary, started}, return_when=asyncio.FIRST_COMPLETED)
+            started.cancel()
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return provider, estimate, primary.result()
+
+            hedge = self._hedge_target(provider, prompt, log_callback)
+            if hedge is None:
+                return provider, estimate, await primary
+            hedge_provider, hedge_estimate, _ = hedge
+            secondary = asyncio.ensure_future(self._create_completion_async(
+                self._async_client(hedge_provider), hedge_provider['model'], prompt,
+                hedge_provider['name'], hedge_provider.get('health'), on_item=on_item,
+                max_tokens=hedge_provider.get('max_output_tokens')))
+            tasks.append(secondary)
+            owners = {primary: (provider, estimate), secondary: (hedge_provider, hedge_estimate)}
+
+            pending = set(owners)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is secondary:
+                            self.hedging.record_win()
+                        return owners[task] + (task.result(),)
+            raise primary.exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _async_client(self, provider):
+        # Created on first use from the engine's event loop thread, so its connection pool lives there
+        if provider.get('async_client') is None:
+            kwargs = {
+                "api_key": provider['api_key'] if provider['api_key'] else "dummy_key",
+                "timeout": self.request_timeout,
+                "default_headers": {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"}
+            }
+            if provider['base_url']:
+                kwargs["base_url"] = provider['base_url']
+            provider['async_client'] = openai.AsyncOpenAI(**kwargs)
+        return provider['async_client']
+
+    def _sleep(self, seconds, reason):
+        with tracing.current().span("retry sleep", cat="retry", reason=reason, seconds=round(seconds, 1)):
+            time.sleep(seconds)
+
+    async def _sleep_async(self, seconds, reason):
+        with tracing.current().span("retry sleep", cat="retry", reason=reason, seconds=round(seconds, 1)):
+            await asyncio.sleep(seconds)
+
+    def _replayed(self, record, started, log_callback, usage_callback):
+        if usage_callback:
+            usage_callback(time.monotonic() - started, ReplayStore.usage(record))
+        if log_callback:
+            log_callback(f"Replayed response from {record.get('provider')} ({len(record['content'])} chars)")
+        return record["content"]
+
+    def _from_cache(self, prompt, log_callback):
+        with tracing.current().span("response cache", cat="api"):
+            cached = self._cached_response(prompt)
+        if cached is None:
+            return None
+        cached_model, content = cached
+        if self.replay is not None and self.replay.mode == "record":
+            self.replay.record(prompt, "response cache", cached_model, 0.0, content)
+        if log_callback:
+            log_callback(f"Response cache hit ({cached_model}, {len(content)} chars)")
+        return content
+
+    def _store_response(self, prompt, provider_name, model, latency, response, content, cache_validator):
+        usage = getattr(response, 'usage', None)
+        if self.replay is not None and self.replay.mode == "record":
+            self.replay.record(prompt, provider_name, model, latency, content, usage)
+
+        if self.response_cache is not None and (cache_validator is None or cache_validator(content)):
+            self.response_cache.put(
+                cache_key(model, TEMPERATURE, prompt), model, content,
+                {
+                    "prompt_tokens": getattr(usage, 'prompt_tokens', None),
+                    "completion_tokens": getattr(usage, 'completion_tokens', None),
+                } if usage is not None else None,
+            )
+
+    def _on_api_error(self, e, attempt, max_retries, provider, log_callback):
+        """Log a failed attempt. Returns (max_retries, seconds to wait before the next attempt, reason)."""
         base_retry_delay = 5
+        provider_name = provider['name']
+        if isinstance(e, openai.RateLimitError):
+            prometheus.API_RATE_LIMITED.inc(provider=provider_name)
+            # Pause only this key (Retry-After if the provider sent one); the retry goes to the next provider
+            pause = _retry_after(e)
+            if pause is None:
+                pause = (base_retry_delay * (2 ** attempt)) + random.uniform(0, 1)
+            if provider.get('limiter'):
+                provider['limiter'].pause(pause)
+            if log_callback: log_callback(f"Rate limit error from {provider_name}. Pausing it for {pause:.1f}s and retrying...")
+            return max_retries, 0, None
+
+        if isinstance(e, openai.APITimeoutError):
+            prometheus.API_TIMEOUTS.inc(provider=provider_name)
+            if isinstance(e, StreamStalledError):
+                err_msg = f"Response stream from {provider_name} stalled for {self.stream_stall_timeout:.0f}s, aborted (Attempt {attempt+1})."
+            else:
+                err_msg = f"API request timed out (Attempt {attempt+1})."
+            print(err_msg)
+            if log_callback: log_callback(err_msg)
+            return max_retries, 0, None
+
+        if isinstance(e, openai.APIStatusError):
+            # Catching 4xx/5xx errors
+            error_code = e.status_code
+            try:
+                error_body = e.body.get('message', str(e.body)) if isinstance(e.body, dict) else str(e.body)
+            except:
+                error_body = str(e)
+            err_msg = f"API Error {error_code}: {error_body}"
+            print(err_msg)
+            if log_callback: log_callback(err_msg)
+
+            # Special handling for 500 "Usage limited" or "No available credentials"
+            error_body_str = str(error_body).lower()
+            if error_code == 500 and ("usage limited" in error_body_str or "当前无可用凭证" in error_body_str):
+                if max_retries < 6:
+                    max_retries = 6
+                    if log_callback: log_callback("⚠️ 500 Usage Limited/No Creds detected. Increasing max retries to 6.")
+
+                # Backoff for usage limited
+                wait_time = (base_retry_delay * (2 ** attempt)) + random.uniform(2, 5)
+                if log_callback: log_callback(f"Waiting {wait_time:.1f}s before retry...")
+                return max_retries, wait_time, "usage limited"
+            return max_retries, 0, None
+
+        err_msg = f"API request failed with {provider_name}. Error: {e}"
+        print(err_msg)
+        if log_callback: log_callback(err_msg)
+        return max_retries, 0, None
+
+    def _cached_response(self, prompt):
+        """Cached answer for this prompt from any of the current providers' models, or None."""
+        for model in dict.fromkeys(p['model'] for p in self.valid_providers):
+            hit = self.response_cache.get(cache_key(model, TEMPERATURE, prompt))
+            prometheus.RESPONSE_CACHE_LOOKUPS.inc(result='hit' if hit else 'miss')
+            if hit:
+                return model, hit[0]
+        return None
+
+    def cache_stats(self):
+        return self.response_cache.snapshot() if self.response_cache is not None else {}
+
+    def call_api(self, prompt, model=None, log_callback=None, usage_callback=None, cache_validator=None, on_item=None):
+        """
+        usage_callback(latency_seconds, response.usage) is called for every successful request.
+        Responses are only written to the response cache when cache_validator(content) is true
+        (default: any non-empty response), so a garbled answer is not served again on rerun.
+        With stream_responses on, on_item(index, element) is called for every element of the
+        response's JSON array as soon as it is complete, including those of attempts that fail later.
+        """
+        steps = self._call_steps(prompt, log_callback, usage_callback, cache_validator)
+        reply = error = None
+        while True:
+            try:
+                op, *args = steps.throw(error) if error is not None else steps.send(reply)
+            except StopIteration as finished:
+                return finished.value
+            reply = error = None
+            try:
+                if op == "send":
+                    reply = self._send(*args, prompt, log_callback, on_item)
+                elif op == "sleep":
+                    self._sleep(*args)
+                elif op == "wait":
+                    time.sleep(*args)
+                else:  # acquire
+                    self.concurrency.acquire()
+            except Exception as e:
+                error = e
+
+    async def call_api_async(self, prompt, log_callback=None, usage_callback=None, cache_validator=None, on_item=None):
+        """call_api for the async engine: the same _call_steps, with the waits and requests awaited on AsyncOpenAI."""
+        steps = self._call_steps(prompt, log_callback, usage_callback, cache_validator)
+        reply = error = None
+        while True:
+            try:
+                op, *args = steps.throw(error) if error is not None else steps.send(reply)
+            except StopIteration as finished:
+                return finished.value
+            reply = error = None
+            try:
+                if op == "send":
+                    reply = await self._send_async(*args, prompt, log_callback, on_item)
+                elif op == "sleep":
+                    await self._sleep_async(*args)
+                elif op == "wait":
+                    await asyncio.sleep(*args)
+                else:  # acquire
+                    await self.concurrency.acquire_async()
+            except Exception as e:
+                error = e
+
+    def _call_steps(self, prompt, log_callback, usage_callback, cache_validator):
+        """
+        Replay, cache, provider rotation and retry decisions shared by call_api and call_api_async.
+        A generator: it yields what has to be waited for and gets the outcome sent (or thrown) back in:
+            ("acquire",)                      a concurrency slot
+            ("wait", seconds)                 simulated replay latency
+            ("sleep", seconds, reason)        a traced back-off sleep
+            ("send", provider, estimate)      one (hedged) attempt, answered with (provider, estimate, response)
+        and returns the response content, or None.
+        """
+        if self.replay is not None and self.replay.mode == "replay":
+            # Replays hold a concurrency slot like a live request, so simulated latency loads the pipeline realistically
+            yield ("acquire",)
+            started = time.monotonic()
+            try:
+                with tracing.current().span("replay", cat="api"):
+                    record = self.replay.take(prompt)
+                    if record is not None and self.replay.delay(record) > 0:
+                        yield ("wait", self.replay.delay(record))
+            finally:
+                self.concurrency.release('success', time.monotonic() - started)
+            if record is not None:
+                return self._replayed(record, started, log_callback, usage_callback)
+            if self.replay.on_miss != "live":
+                if log_callback: log_callback("Replay: no recorded response for this prompt.")
+                return None
+            if log_callback: log_callback("Replay: no recorded response for this prompt, calling the live API.")
+
+        if self.response_cache is not None:
+            content = self._from_cache(prompt, log_callback)
+            if content is not None:
+                return content
+
+        max_retries = 3
         attempt = 0
 
         while attempt < max_retries:
             # Rotate provider for each attempt
             try:
-                provider = self.get_next_provider()
-                client = provider['client']
+                provider, estimate, wait = self._next_provider(prompt)
                 # Use provider's specific model unless override provided
                 current_model = provider['model'] 
                 provider_name = provider['name']
@@ -166,80 +762,61 @@ class AIService:
                 if log_callback: log_callback(f"Error: {err_msg}")
                 return None
 
+            if attempt > 0:
+                prometheus.API_RETRIES.inc(provider=provider_name)
+            if wait > 0:
+                prometheus.API_THROTTLED_SECONDS.inc(wait, provider=provider_name)
+
             try:
                 if log_callback:
                     log_callback(f"Sending request to {provider_name} (Attempt {attempt+1}/{max_retries})...")
 
-                response = client.chat.completions.create(
-                    model=current_model,
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=8192,
-                    temperature=0.1,
-                    timeout=self.request_timeout
-                )
+                if wait > 0:
+                    yield ("sleep", wait, "rpm/tpm quota")
+                started = time.monotonic()
+                with tracing.current().span("attempt", cat="api", provider=provider_name, model=current_model, attempt=attempt + 1):
+                    provider, estimate, response = yield ("send", provider, estimate)
+                latency = time.monotonic() - started
+                current_model, provider_name = provider['model'], provider['name']
+                if provider.get('limiter'):
+                    provider['limiter'].settle(estimate, getattr(response, 'usage', None))
+                if usage_callback:
+                    usage_callback(latency, getattr(response, 'usage', None))
                 content = response.choices[0].message.content
                 
                 if content is None:
+                     if provider.get('health'):
+                         self._health_failure(provider['health'], provider_name)
                      if max_retries < 6:
                         max_retries = 6
                         if log_callback: log_callback("⚠️ Received None content. Increasing max retries to 6.")
                      
                      if log_callback: log_callback("Received empty response (None). Waiting 20s before retry...")
-                     time.sleep(20)
+                     yield ("sleep", 20, "empty response")
                      attempt += 1
                      continue
 
-                print(f"DEBUG: Backend received response (len={len(content)}) from {provider_name}") 
+                self._store_response(prompt, provider_name, current_model, latency, response, content, cache_validator)
                 
                 if log_callback:
                     log_callback(f"Received response from {provider_name} ({len(content)} chars)")
                 
                 return content
 
-            except openai.RateLimitError:
-                if log_callback: log_callback("Rate limit error. Retrying...")
-                if not self.rate_limit_pause_event.is_set():
-                    self.rate_limit_pause_event.set()
-                
-                wait_time = (base_retry_delay * (2 ** attempt)) + random.uniform(0, 1)
-                time.sleep(wait_time)
-
-                if attempt == max_retries - 1:
-                    self.rate_limit_pause_event.clear()
-
-            except openai.APITimeoutError:
-                err_msg = f"API request timed out (Attempt {attempt+1})."
-                print(err_msg)
-                if log_callback: log_callback(err_msg)
-
-            except openai.APIStatusError as e:
-                # Catching 4xx/5xx errors
-                error_code = e.status_code
-                try:
-                    error_body = e.body.get('message', str(e.body)) if isinstance(e.body, dict) else str(e.body)
-                except:
-                    error_body = str(e)
-                err_msg = f"API Error {error_code}: {error_body}"
-                print(err_msg)
-                if log_callback: log_callback(err_msg)
-                
-                # Special handling for 500 "Usage limited" or "No available credentials"
-                error_body_str = str(error_body).lower()
-                if error_code == 500 and ("usage limited" in error_body_str or "当前无可用凭证" in error_body_str):
-                    if max_retries < 6:
-                        max_retries = 6
-                        if log_callback: log_callback("⚠️ 500 Usage Limited/No Creds detected. Increasing max retries to 6.")
-                    
-                    # Backoff for usage limited
-                    wait_time = (base_retry_delay * (2 ** attempt)) + random.uniform(2, 5)
-                    if log_callback: log_callback(f"Waiting {wait_time:.1f}s before retry...")
-                    time.sleep(wait_time)
-                
             except Exception as e:
-                err_msg = f"API request failed with {provider_name}. Error: {e}"
-                print(err_msg)
-                if log_callback: log_callback(err_msg)
+                max_retries, wait_time, reason = self._on_api_error(e, attempt, max_retries, provider, log_callback)
+                if wait_time:
+                    yield ("sleep", wait_time, reason)
             
             attempt += 1
 
         return None
+
+
+def _retry_after(error):
+    """Seconds from a 429's Retry-After header, if present."""
+    response = getattr(error, 'response', None)
+    try:
+        return max(0.0, float(response.headers.get('retry-after')))
+    except (AttributeError, TypeError, ValueError):
+        return None
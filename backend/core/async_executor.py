@@ -0,0 +1,69 @@
+"""
+Event loop for the async engine mode ("engine_mode": "async" in cfg.json).
+
+One daemon thread runs a shared asyncio loop for the whole process, so the AsyncOpenAI
+clients (and their connection pools) of every job live on the same loop and hundreds of
+requests can be in flight without a thread each. AsyncExecutor gives the engine's
+scheduler the same submit()/shutdown() surface as ThreadPoolExecutor and hands back
+concurrent.futures.Future objects, but each batch is a coroutine. Cancelling a future
+cancels the coroutine, which aborts its in-flight HTTP request.
+"""
+import asyncio
+import concurrent.futures
+import threading
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """The shared event loop, started on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="async-engine", daemon=True)
+            thread.start()
+            _loop = loop
+        return _loop
+
+
+class AsyncExecutor:
+    def __init__(self, max_batches):
+        self.loop = get_loop()
+        # Caps batches that are past prompt building; requests are gated by the AIMD limiter
+        self._semaphore = asyncio.Semaphore(max(1, int(max_batches)))
+        self._lock = threading.Lock()
+        self._futures = set()
+
+    async def _run(self, fn, args):
+        async with self._semaphore:
+            return await fn(*args)
+
+    def submit(self, fn, *args):
+        """Schedule coroutine function fn(*args) on the loop; returns a concurrent.futures.Future."""
+        future = asyncio.run_coroutine_threadsafe(self._run(fn, args), self.loop)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        with self._lock:
+            pending = list(self._futures)
+        if cancel_futures:
+            for future in pending:
+                future.cancel()
+        if wait:
+            concurrent.futures.wait(pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(wait=True)
+        return False
@@ -0,0 +1,50 @@
+"""
+Token-aware batch packing ("batch_packing": true in cfg.json).
+
+BATCH_SIZE is a fixed term count, but every term carries its own reference context, so a
+fixed batch can overflow the model's context window or its output limit (cut-off JSON,
+whole batch lost) while another one is nearly empty. With packing on, consecutive terms
+are grouped so each batch's estimated prompt and expected output fit the smallest window
+among the providers, since any provider may get any batch. Per provider:
+
+    "context_window": 65536,       (prompt + output tokens)
+    "max_output_tokens": 8192      (also sent as max_tokens)
+
+and globally "output_tokens_per_term" (expected verdict size, default 200) and
+"max_batch_terms" (default 100).
+"""
+DEFAULT_CONTEXT_WINDOW = 65536
+DEFAULT_MAX_OUTPUT_TOKENS = 8192
+HEADROOM = 0.9  # token estimates are rough; an underfull batch is cheaper than a truncated one
+
+
+def token_budget(providers, headroom=HEADROOM):
+    """(prompt tokens, output tokens) a batch may use on every one of `providers`."""
+    inputs, outputs = [], []
+    for p in providers or [{}]:
+        output = int(p.get("max_output_tokens") or DEFAULT_MAX_OUTPUT_TOKENS)
+        window = int(p.get("context_window") or DEFAULT_CONTEXT_WINDOW)
+        outputs.append(output)
+        inputs.append(max(0, window - output))
+    return int(min(inputs) * headroom), int(min(outputs) * headroom)
+
+
+def pack(prompt_tokens, output_tokens, fixed_tokens, max_input, max_output, max_terms):
+    """
+    Split consecutive rows into slices whose summed estimates stay within the budgets
+    (prompt: fixed_tokens plus each row's entry). A row that is too large on its own still
+    gets a batch of its own.
+    """
+    slices = []
+    start = 0
+    used_input, used_output = fixed_tokens, 0
+    for i, (row_input, row_output) in enumerate(zip(prompt_tokens, output_tokens)):
+        if i > start and (used_input + row_input > max_input or used_output + row_output > max_output or i - start >= max_terms):
+            slices.append(slice(start, i))
+            start = i
+            used_input, used_output = fixed_tokens, 0
+        used_input += row_input
+        used_output += row_output
+    if start < len(prompt_tokens):
+        slices.append(slice(start, len(prompt_tokens)))
+    return slices
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limiter for in-flight API requests.
+    Every successful request with healthy latency grows the limit by roughly one slot per
+    "round trip" (additive increase); a 429, 5xx or timeout cuts it by `backoff_factor`
+    (multiplicative decrease). Decreases are rate limited to one per cooldown window so a
+    burst of failures from the same overload only backs off once.
+    Threads (acquire) and asyncio tasks of the async engine (acquire_async) share one budget.
+    """
+
+    def __init__(self, initial=10, min_limit=1, max_limit=64, backoff_factor=0.7,
+                 latency_tolerance=2.0, cooldown=5.0, adaptive=True):
+        self._cond = threading.Condition()
+        self._async_waiters = []  # (loop, future) of tasks parked in acquire_async
+        self.in_flight = 0
+        self.configure(initial, min_limit, max_limit, backoff_factor, latency_tolerance, cooldown, adaptive)
+
+    def configure(self, initial, min_limit=1, max_limit=64, backoff_factor=0.7,
+                  latency_tolerance=2.0, cooldown=5.0, adaptive=True):
+        with self._cond:
+            self.min_limit = max(1, int(min_limit))
+            self.max_limit = max(self.min_limit, int(max_limit))
+            self.limit = float(min(max(int(initial), self.min_limit), self.max_limit))
+            self.backoff_factor = float(backoff_factor)
+            self.latency_tolerance = float(latency_tolerance)
+            self.cooldown = float(cooldown)
+            self.adaptive = adaptive
+            self.latency_ewma = None
+            self.last_decrease = 0.0
+            self.successes = 0
+            self.backoffs = 0
+            self._cond.notify_all()
+            self._wake_async()
+
+    def acquire(self):
+        """Block until an in-flight slot is free."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until an in-flight slot is free."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # We may have been woken for a free slot: pass it on
+                with self._cond:
+                    self._wake_async()
+                raise
+
+    def _wake_async(self):
+        # Caller holds self._cond. Wake only as many tasks as there are free slots.
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._async_waiters:
+            loop, waiter = self._async_waiters.pop(0)
+            if waiter.done():
+                continue
+            try:
+                loop.call_soon_threadsafe(_set_waiter, waiter)
+            except RuntimeError:
+                continue  # loop already closed
+            free -= 1
+
+    def release(self, outcome, latency=None):
+        """
+        outcome: 'success' | 'overload' (429/5xx/timeout) | 'error' (neutral, no adjustment)
+        """
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            if self.adaptive:
+                if outcome == 'success':
+                    self._on_success(latency)
+                elif outcome == 'overload':
+                    self._on_overload()
+            self._cond.notify_all()
+            self._wake_async()
+
+    def _on_success(self, latency):
+        self.successes += 1
+        healthy = True
+        if latency is not None:
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                healthy = latency <= self.latency_ewma * self.latency_tolerance
+                self.latency_ewma = 0.95 * self.latency_ewma + 0.05 * latency
+        if healthy and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def _on_overload(self):
+        now = time.monotonic()
+        if now - self.last_decrease < self.cooldown:
+            return
+        self.last_decrease = now
+        self.backoffs += 1
+        self.limit = max(self.min_limit, self.limit * self.backoff_factor)
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "min": self.min_limit,
+                "max": self.max_limit,
+                "adaptive": self.adaptive,
+                "latency_ewma": round(self.latency_ewma, 2) if self.latency_ewma is not None else None,
+                "backoffs": self.backoffs,
+            }
+
+
+def _set_waiter(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
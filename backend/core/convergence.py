@@ -0,0 +1,89 @@
+"""
+Per-term convergence policy.
+
+Decides from a term's verdict history whether another LLM call can change anything. If it
+can't, the engine reuses the latest verdict instead of sending the term again.
+Configured in cfg.json via "convergence_policy", either a preset name or a list of rules:
+
+    "convergence_policy": [
+        {"rule": "kept", "k": 1, "min_round": 2},
+        {"rule": "identical", "k": 2, "min_round": 3},
+        {"rule": "identical", "k": 1, "min_round": 2, "tiers": ["C"]}
+    ]
+
+Rules (a term is skipped when any rule matches):
+    identical  the last k verdicts agree on recommended_translation and should_delete
+    kept       the last k verdicts kept the existing translation unchanged
+Each rule applies from `min_round` on, optionally only to the listed tiers (S/A/B/C).
+Deleted terms never reach a later round, so deletions need no rule.
+"""
+
+PRESETS = {
+    # Historical behavior: from round 3, skip when the previous two verdicts agree
+    "consensus": [{"rule": "identical", "k": 2, "min_round": 3}],
+    # Also accept a term from round 2 when round 1 confirmed its existing translation
+    "early": [
+        {"rule": "kept", "k": 1, "min_round": 2},
+        {"rule": "identical", "k": 2, "min_round": 3},
+    ],
+    "off": [],
+}
+
+DEFAULT_PRESET = "consensus"
+
+
+def _verdict(result):
+    return (result.get('recommended_translation'), bool(result.get('should_delete')))
+
+
+def _is_kept(result):
+    if result.get('should_delete'):
+        return False
+    recommended = str(result.get('recommended_translation') or '').strip()
+    original = result.get('original_translation')
+    if original is None:
+        return False
+    return recommended in ('', str(original).strip())
+
+
+class ConvergencePolicy:
+    def __init__(self, rules):
+        self.rules = []
+        for rule in rules:
+            name = rule.get("rule")
+            if name not in ("identical", "kept"):
+                raise ValueError(f"Unknown convergence rule: {name}")
+            self.rules.append({
+                "rule": name,
+                "k": max(1, int(rule.get("k", 2))),
+                "min_round": int(rule.get("min_round", 2)),
+                "tiers": set(rule["tiers"]) if rule.get("tiers") else None,
+            })
+
+    @classmethod
+    def from_config(cls, config):
+        setting = config.get("convergence_policy", DEFAULT_PRESET)
+        if isinstance(setting, str):
+            if setting not in PRESETS:
+                raise ValueError(f"Unknown convergence preset: {setting}")
+            return cls(PRESETS[setting])
+        return cls(setting or [])
+
+    def converged(self, round_num, history, tier):
+        """Return a copy of the latest verdict if the term has converged, otherwise None."""
+        if not history:
+            return None
+        for rule in self.rules:
+            k = rule["k"]
+            if round_num < rule["min_round"] or len(history) < k:
+                continue
+            if rule["tiers"] is not None and tier not in rule["tiers"]:
+                continue
+            recent = history[-k:]
+            if rule["rule"] == "identical":
+                matched = all(_verdict(r) == _verdict(recent[-1]) for r in recent)
+            else:
+                matched = all(_is_kept(r) for r in recent)
+            if matched:
+                return recent[-1].copy()
+        return None
@@ -1,35 +1,43 @@
+import json
 import threading
 import time
 import os
 # pandas import moved inside _run_task to avoid early native library initialization
 from backend.core.ai_service import AIService
 from backend.core.glossary_processor import GlossaryProcessor
+from backend.core.journal import BatchJournal
+from backend.core.metrics import RunMetrics
+from backend.core import prometheus
+from backend.core import tracing
+from backend.core.modification_log import ModificationLog
+from backend.core.convergence import ConvergencePolicy
+from backend.core.term_history import TermHistoryStore
 from backend.config_manager import load_config
 
 class ReviewEngine:
-    _instance = None
-    _lock = threading.Lock()
-
-    def __new__(cls):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super(ReviewEngine, cls).__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
-
-    def __init__(self):
-        if self._initialized: return
-        self._initialized = True
+    """
+    Runs one review task. Instances are created per job by JobManager (backend/core/jobs.py),
+    which passes in the shared AIService so all jobs draw from one provider concurrency budget.
+    """
+
+    def __init__(self, ai_service=None):
+        self._lock = threading.Lock()
         self.is_running = False
         self.stop_event = threading.Event()
         self.progress = {"current": 0, "total": 0, "message": "Idle", "percent": 0}
         self.logs = []
-        self.ai_service = AIService()
+        self.convergence_stats = {}
+        self.metrics = RunMetrics()
+        self.tracer = tracing.NULL_TRACER
+        self.term_history = None
+        self.ai_service = ai_service or AIService()
         self.processor = GlossaryProcessor(self.ai_service)
         self.config = load_config()
+        self.error = None
+        self.on_finished = None  # called from the task thread when _run_task exits
+        self.on_log = None  # optional listener for every log line (used by the CLI)
 
-    def start_task(self, directory, novel_background, rounds=1, glossary_file=None, reference_file=None):
+    def start_task(self, directory, novel_background, rounds=1, glossary_file=None, reference_file=None, reload_service=True):
         if self.is_running:
             return False, "Task is already running"
 
@@ -37,10 +45,13 @@ class ReviewEngine:
         self.stop_event.clear()
         self.progress = {"current": 0, "total": 0, "message": "Starting...", "percent": 0}
         self.logs = []
+        self.convergence_stats = {}
+        self.metrics = RunMetrics()
 
         # Reload config to ensure latest API key and settings are used
         self.config = load_config()
-        self.ai_service.reload_config()
+        if reload_service:
+            self.ai_service.reload_config()
 
         thread = threading.Thread(
             target=self._run_task,
@@ -59,13 +70,18 @@ class ReviewEngine:
         return True, "Task stopping"
 
     def _run_task(self, directory, novel_background, rounds, glossary_file=None, reference_file=None):
+        modification_log = None
+        log_dir = None
+        # Opt-in span tracing ("trace": true in cfg.json), written to log/trace.json
+        self.tracer = tracing.Tracer() if self.config.get("trace") else tracing.NULL_TRACER
+        previous_tracer = tracing.activate(self.tracer)
         try:
-            import pandas as pd
             self.add_log(f"Task started. Total rounds: {rounds}")
             
             # --- Pre-flight API Key Validation ---
             self.add_log("Performing pre-flight API key validation...")
-            valid_count = self.ai_service.validate_keys(log_callback=self.add_log)
+            with self.tracer.span("preflight validation"):
+                valid_count = self.ai_service.validate_keys(log_callback=self.add_log)
             
             if valid_count == 0:
                 self.add_log("CRITICAL ERROR: No valid API keys available. Aborting task.")
@@ -112,23 +128,31 @@ class ReviewEngine:
             self.add_log(f"Glossary file: {os.path.basename(glossary_path)}")
             self.add_log(f"Reference file: {os.path.basename(reference_path)}")
 
-            glossary_df, reference_dict, original_cols = self.processor.load_data(glossary_path, reference_path)
-            
             # Ensure log directory exists
             log_dir = os.path.join(directory, 'log')
             if not os.path.exists(log_dir):
                 os.makedirs(log_dir)
+            cache_dir = os.path.join(log_dir, 'cache')
+
+            with self.tracer.span("load data"):
+                glossary_df, reference_dict, original_cols = self.processor.load_data(glossary_path, reference_path, cache_dir=cache_dir)
 
-            import json
-            import concurrent.futures
             import re
 
-            max_workers = self.config.get("MAX_WORKERS", 3)
+            self.convergence = ConvergencePolicy.from_config(self.config)
+
+            # Pool is sized to the concurrency ceiling; the adaptive limiter in AIService decides how many requests are in flight
+            max_workers = self.ai_service.concurrency.max_limit
             batch_size = self.config.get("BATCH_SIZE", 10)
             
-            # Master Log to track all changes across all rounds
-            master_modification_log = []
-            self.term_history = {} 
+            # Master Log to track all changes across all rounds, streamed to log/modified_N.jsonl
+            modification_log = ModificationLog(log_dir)
+
+            # Term history keyed by (term, round), written as results arrive
+            self.term_history = TermHistoryStore(os.path.join(log_dir, 'term_history.sqlite'))
+
+            # Write-ahead journal of completed batches (for mid-round resume)
+            journal = BatchJournal(os.path.join(log_dir, 'batch_journal.jsonl'))
 
             # --- Resume Logic ---
             start_round = 1
@@ -149,304 +173,434 @@ class ReviewEngine:
                     self.add_log(f"Found interrupt recovery file: {resume_file}")
                     
                     # Load the latest state
-                    current_df = pd.read_excel(resume_file, engine='openpyxl').fillna('')
+                    from backend.core import excel_io
+                    with self.tracer.span("load stash", round=latest_round):
+                        current_df = excel_io.read_excel(resume_file).fillna('')
                     start_round = latest_round + 1
                     
-                    # Attempt to load term history
+                    # Term history: drop rounds after the stash (the journal replays them),
+                    # migrating a legacy term_history.json on first use
                     history_file = os.path.join(log_dir, 'term_history.json')
-                    if os.path.exists(history_file):
-                        with open(history_file, 'r', encoding='utf-8') as hf:
-                            self.term_history = json.load(hf)
-                        self.add_log(f"Loaded term history from {history_file}")
-                    else:
+                    if len(self.term_history) == 0 and os.path.exists(history_file):
+                        count = self.term_history.import_json(history_file, latest_round)
+                        self.add_log(f"Imported term history for {count} terms from {history_file}")
+                    self.term_history.discard_after(latest_round)
+                    if len(self.term_history) == 0:
                         self.add_log("Warning: No term history found. Consensus skipping may be limited for next round.")
 
-                    # Reconstruct Master Modification Log from previous round logs
-                    for r in range(1, start_round):
-                        mod_file = os.path.join(log_dir, f'modified_{r}.xlsx')
-                        if os.path.exists(mod_file):
-                            try:
-                                mod_df = pd.read_excel(mod_file, engine='openpyxl').fillna('')
-                                master_modification_log.extend(mod_df.to_dict('records'))
-                            except Exception as ex:
-                                self.add_log(f"Failed to load log for Round {r}: {ex}")
+                    # Modification log: rounds after the stash are replayed from the journal,
+                    # stashes from older versions only have modified_N.xlsx
+                    modification_log.discard_from(start_round)
+                    if not modification_log.rounds():
+                        try:
+                            modification_log.import_legacy_xlsx(latest_round)
+                        except Exception as ex:
+                            self.add_log(f"Failed to load previous modification logs: {ex}")
                     
                     self.add_log(f"Resuming task from Round {start_round}...")
                     
                 except Exception as e:
                     self.add_log(f"Failed to resume: {e}. Starting from scratch.")
                     # Fallback
-                    glossary_df, reference_dict, original_cols = self.processor.load_data(glossary_path, reference_path)
+                    glossary_df, reference_dict, original_cols = self.processor.load_data(glossary_path, reference_path, cache_dir=cache_dir)
                     current_df = glossary_df.copy()
                     start_round = 1
-                    master_modification_log = []
-                    self.term_history = {}
+                    modification_log.discard_from(1)
+                    self.term_history.discard_after(0)
             else:
                 # Start fresh
                 current_df = glossary_df.copy()
+                modification_log.discard_from(1)
+                self.term_history.discard_after(0)
             
-            for round_num in range(start_round, rounds + 1):
-                if self.stop_event.is_set(): break
-                
-                self.add_log(f"--- Starting Round {round_num}/{rounds} ---")
-                
-                total_rows = len(current_df)
-                self.progress["total"] = total_rows * rounds # approx total progress logic
-                # Adjust progress calculation to be cumulative
-                base_progress = (round_num - 1) * total_rows
-                
-                processed_count = 0
-                
-                # Create batches
-                batches = []
-                for i in range(0, total_rows, batch_size):
-                    batches.append(current_df.iloc[i:i+batch_size])
-
-                # Initialize term history for consistency checking across rounds
-                # self.term_history is already initialized at start of task, no need to re-init here if we want global history
-                # But wait, code at line 100 initialized it. 
-                # The line 125 "self.term_history = {}" actually CLEARS history every round!
-                # That is WRONG if we want multi-round history.
-                # AND we are missing batch_results_map.
-                
-                round_rows = []
-                batch_results_map = {}
-
-                with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    def process_single_batch(batch_idx, batch_data):
-                        if self.stop_event.is_set(): return None
-                        
-                        # Optimization: Filter out terms that already reached consensus
-                        rows_to_process = []
-                        cached_results_map = {} # index in batch -> result
-                        
-                        for local_idx, (idx, row) in enumerate(batch_data.iterrows()):
-                            term = str(row['src']).strip()
-                            history = self.term_history.get(term, [])
-                            
-                            # Consensus Check Logic (Skip if Round >= 3 and previous 2 results are identical)
-                            skipped = False
-                            if round_num >= 3 and len(history) >= 2:
-                                r1 = history[-1]
-                                r2 = history[-2]
-                                # Check consistency of key fields
-                                if (r1.get('recommended_translation') == r2.get('recommended_translation') and
-                                    r1.get('should_delete') == r2.get('should_delete')):
-                                    
-                                    # Use the latest result as the cached result
-                                    cached_results_map[local_idx] = r1.copy()
-                                    skipped = True
-                            
-                            if not skipped:
-                                rows_to_process.append(row)
-                        
-                        self.add_log(f"Round {round_num}: Processing batch {batch_idx + 1} ({len(rows_to_process)}/{len(batch_data)} terms)...")
-                        
-                        # If all skipped, return reconstructed immediately
-                        ai_results_partial = []
-                        if rows_to_process:
-                            import pandas as pd
-                            partial_df = pd.DataFrame(rows_to_process)
-                            try:
-                                # Pass term_history to inject history context
-                                ai_results_partial = self.processor.process_batch(
-                                    partial_df, 
-                                    novel_background, 
-                                    reference_dict, 
-                                    term_history=self.term_history, # Pass history map
-                                    log_callback=self.add_log
-                                )
-                                if ai_results_partial is None:
-                                    ai_results_partial = []
-                            except Exception as e:
-                                raise e
-                        
-                        # Reconstruct full result list preserving order
-                        full_results = []
-                        partial_idx = 0
-                        
-                        for local_idx in range(len(batch_data)):
-                            if local_idx in cached_results_map:
-                                full_results.append(cached_results_map[local_idx])
-                            else:
-                                if partial_idx < len(ai_results_partial):
-                                    full_results.append(ai_results_partial[partial_idx])
-                                    partial_idx += 1
-                                else:
-                                    # Fallback if partial result missing (shouldn't happen on success)
-                                    full_results.append({}) 
-                                    
-                        return full_results
-
-                    future_to_batch = {executor.submit(process_single_batch, i, batch): i for i, batch in enumerate(batches)}
-                    
-                    for future in concurrent.futures.as_completed(future_to_batch):
-                        batch_idx = future_to_batch[future]
-                        if self.stop_event.is_set():
-                            executor.shutdown(wait=False, cancel_futures=True)
-                            break
-                        
-                        try:
-                            ai_results = future.result()
-                            batch_results_map[batch_idx] = ai_results
-                            
-                            # Update History (Thread-safe here in main loop)
-                            if ai_results:
-                                batch_rows = batches[batch_idx]
-                                for i, res in enumerate(ai_results):
-                                    if i < len(batch_rows):
-                                        term = str(batch_rows.iloc[i]['src']).strip()
-                                        if term not in self.term_history:
-                                            self.term_history[term] = []
-                                        self.term_history[term].append(res)
-                            
-                            # Update progress
-                            processed_count += batch_size
-                            current_total_progress = base_progress + min(processed_count, total_rows)
-                            total_task_rows = total_rows * rounds
-                            
-                            self.progress["current"] = current_total_progress
-                            self.progress["total"] = total_task_rows
-                            self.progress["percent"] = int((current_total_progress / total_task_rows) * 100)
-                            self.progress["message"] = f"Round {round_num}: Processing... ({min(processed_count, total_rows)}/{total_rows})"
-                            
-                        except Exception as exc:
-                            self.add_log(f"Round {round_num}: Batch {batch_idx} generated an exception: {exc}")
-                
-                if self.stop_event.is_set(): break
-
-                # Reconstruct and Apply Logic
-                for i in range(len(batches)):
-                    if i not in batch_results_map or not batch_results_map[i]:
-                        # Fallback: keep original
-                        original_batch = batches[i]
-                        for _, row in original_batch.iterrows():
-                            round_rows.append(row.to_dict())
-                        continue
-
-                    ai_results = batch_results_map[i]
-                    original_batch = batches[i]
-                    
-                    if len(ai_results) != len(original_batch):
-                         self.add_log(f"Warning: Round {round_num} Batch {i} count mismatch. Using original.")
-                         for _, row in original_batch.iterrows():
-                            round_rows.append(row.to_dict())
-                         continue
-
-                    for j, ai_result in enumerate(ai_results):
-                        original_row = original_batch.iloc[j].to_dict()
-                        final_row = original_row.copy()
-
-                        # Safe NaN handling for info column
-                        raw_info = original_row.get('info', '')
-                        original_cat = '' if (raw_info != raw_info) else str(raw_info).strip()
-                        suggested_cat = str(ai_result.get('suggested_category', '') or '').strip()
-
-                        # Log Entry
-                        log_entry = {
-                            'round': round_num,
-                            'term': original_row.get('src', ''),
-                            'original': original_row.get('dst', ''),
-                            'new': '',
-                            'action': '',
-                            'reason': ai_result.get('deletion_reason', ''),
-                            'justification': ai_result.get('justification', ''),
-                            'emoji': ai_result.get('judgment_emoji', ''),
-                            'original_category': original_cat,
-                            'suggested_category': suggested_cat,
-                        }
-
-                        if ai_result.get('should_delete'):
-                            log_entry['action'] = 'Delete'
-                            log_entry['new'] = '(Deleted)'
-                            master_modification_log.append(log_entry)
-                        else:
-                            recommended = str(ai_result.get('recommended_translation', '') or '').strip()
-                            current = original_row.get('dst', '').strip()
-
-                            translation_changed = bool(recommended and recommended != current)
-                            category_changed = bool(suggested_cat and suggested_cat != original_cat)
-
-                            if translation_changed:
-                                log_entry['action'] = 'Modify'
-                                log_entry['new'] = recommended
-                                final_row['dst'] = recommended
-                                master_modification_log.append(log_entry)
-                            elif category_changed:
-                                log_entry['action'] = 'Category'
-                                log_entry['new'] = current  # translation unchanged
-                                master_modification_log.append(log_entry)
-                            else:
-                                log_entry['action'] = 'Keep'
-                                log_entry['new'] = current
-
-                            # Apply category update to final glossary for all non-deleted terms
-                            if category_changed:
-                                final_row['info'] = suggested_cat
-
-                            round_rows.append(final_row)
-                
-                # End of Round Processing
-                import pandas as pd
-                current_df = pd.DataFrame(round_rows)
-                
-                # Save Intermediate Files (Stash)
-                stash_glossary_path = os.path.join(log_dir, f'glossary_output_{round_num}.xlsx')
-                self._save_excel(current_df, stash_glossary_path)
-                
-                # We also need to save the modification log up to this point?
-                # The user asked for "intermediate files... in log...". 
-                # Let's save a snapshot of the log for this round.
-                import pandas as pd
-                round_log = [l for l in master_modification_log if l['round'] == round_num]
-                stash_log_path = os.path.join(log_dir, f'modified_{round_num}.xlsx')
-                pd.DataFrame(round_log).to_excel(stash_log_path, index=False)
-                
-                # Save Term History for Resume
-                history_path = os.path.join(log_dir, 'term_history.json')
-                with open(history_path, 'w', encoding='utf-8') as hf:
-                    json.dump(self.term_history, hf, ensure_ascii=False, indent=2)
-
-                self.add_log(f"Round {round_num} completed. Stash saved to log/.")
+            with self.tracer.span("pipeline", start_round=start_round, rounds=rounds):
+                final_table = self._run_pipeline(
+                    current_df, start_round, rounds, batch_size, max_workers, log_dir,
+                    novel_background, reference_dict, journal, modification_log
+                )
+            del current_df
             
             # --- End of All Rounds ---
             
             # Save Final Glossary
             output_path = os.path.join(directory, 'glossary_output_final.xlsx')
-            self._save_excel(current_df, output_path)
+            with self.tracer.span("save final glossary"):
+                self._save_excel(final_table, output_path)
             self.add_log(f"Finished. Saved final glossary to {output_path}")
 
-            # Save Master Modification Log (Excel) with Column G
-            import pandas as pd
+            # Save Master Modification Log (Excel), streamed from the per-round JSONL files
             log_path_xlsx = os.path.join(directory, 'modified.xlsx')
-            pd.DataFrame(master_modification_log).to_excel(log_path_xlsx, index=False)
+            with self.tracer.span("export modification log", format="xlsx"):
+                modification_log.export_xlsx(log_path_xlsx)
             self.add_log(f"Saved master modification log to {log_path_xlsx}")
 
             # Save Master Modification Log (JSON)
             log_path_json = os.path.join(directory, 'modified.json')
-            with open(log_path_json, 'w', encoding='utf-8') as f:
-                json.dump(master_modification_log, f, ensure_ascii=False, indent=2)
+            with self.tracer.span("export modification log", format="json"):
+                modification_log.export_json(log_path_json)
             self.add_log(f"Saved master modification log JSON to {log_path_json}")
 
         except Exception as e:
+            self.error = str(e)
             self.add_log(f"Error: {str(e)}")
             import traceback
             traceback.print_exc()
         finally:
+            if self.term_history is not None:
+                self.term_history.close()
+            if modification_log is not None:
+                modification_log.close()
+            tracing.activate(previous_tracer)
+            if isinstance(self.tracer, tracing.Tracer) and log_dir is not None:
+                try:
+                    trace_path = os.path.join(log_dir, 'trace.json')
+                    count = self.tracer.save(trace_path)
+                    self.add_log(f"Saved {count} trace events to {trace_path}")
+                except OSError as e:
+                    self.add_log(f"Failed to save trace: {e}")
             self.is_running = False
             self.progress["message"] = "Completed" if not self.stop_event.is_set() else "Stopped"
+            if self.on_finished:
+                self.on_finished()
+
+    def _run_pipeline(self, current_df, start_round, rounds, batch_size, max_workers, log_dir,
+                      novel_background, reference_dict, journal, modification_log):
+        """
+        Run every remaining round without a barrier between rounds.
+        Batches are fixed slices of the starting glossary (on resume: the slices saved with the stash,
+        so journal entries keep their batch index). A batch moves into its next round as soon
+        as its previous-round result is recorded in the term history, so the pool stays saturated
+        while slow batches finish. A round is stashed to log/ once all of its batches are done.
+        Returns the glossary of the last completed round (its RoundBuffer, or the starting
+        DataFrame if no round completed).
+        """
+        import collections
+        import concurrent.futures
+        from backend.core.round_buffer import RoundBuffer
+
+        total_rows = len(current_df)
+        batch_slices = None
+        if start_round > 1:
+            batch_slices = self._load_slices(log_dir, start_round - 1, total_rows)
+        if batch_slices is None:
+            batch_slices = self._batch_slices(current_df, batch_size, novel_background, reference_dict)
+        buffers = {start_round: RoundBuffer(current_df)}
+        remaining = {r: len(batch_slices) for r in range(start_round, rounds + 1)}
+        journaled = journal.load()
+
+        state = {"last": current_df, "next_round": start_round}
+        # Terms deleted in a round drop out of every later round's share of the total
+        counts = {"total": total_rows * rounds, "processed": (start_round - 1) * total_rows}
+        deleted = collections.Counter()   # round -> terms deleted in it
+        round_done = collections.Counter()  # round -> terms finished in it
+        replayed = 0
+
+        self.add_log(f"--- Starting Round {start_round}/{rounds} ---")
+        ready = collections.deque((b, start_round) for b in range(len(batch_slices)))
+        in_flight = {}  # future -> (batch_idx, round_num, rows, batch_df)
+
+        def update_progress():
+            total = max(1, counts["total"])
+            self.progress["current"] = min(counts["processed"], total)
+            self.progress["total"] = total
+            self.progress["percent"] = int((self.progress["current"] / total) * 100)
+            active_round = state["next_round"]
+            round_left = 0
+            if active_round <= rounds:
+                done_batches = len(batch_slices) - remaining[active_round]
+                self.progress["message"] = f"Round {active_round}: Processing... ({done_batches}/{len(batch_slices)} batches)"
+                # Every earlier round is complete, so its deletions are final
+                expected = total_rows - sum(n for r, n in deleted.items() if r < active_round)
+                round_left = max(0, expected - round_done[active_round])
+            self.metrics.set_remaining(len(in_flight), round_left, max(0, counts["total"] - counts["processed"]))
+
+        def finish_batch(batch_idx, round_num, rows=()):
+            # Hand the batch's rows to the next round and stash every round that is now complete
+            if len(rows):
+                gone = len(rows) - len(buffers[round_num].active_rows(batch_slices[batch_idx]))
+                deleted[round_num] += gone
+                counts["total"] -= gone * (rounds - round_num)
+                counts["processed"] += len(rows)
+                round_done[round_num] += len(rows)
+            remaining[round_num] -= 1
+            if round_num < rounds:
+                if round_num + 1 not in buffers:
+                    buffers[round_num + 1] = buffers[round_num].next_round()
+                    self.add_log(f"--- Starting Round {round_num + 1}/{rounds} ---")
+                else:
+                    buffers[round_num + 1].carry_over(buffers[round_num], batch_slices[batch_idx])
+                ready.append((batch_idx, round_num + 1))
+
+            while state["next_round"] <= rounds and remaining[state["next_round"]] == 0:
+                r = state["next_round"]
+                with self.tracer.span("finalize round", round=r):
+                    state["last"] = self._finalize_round(buffers.pop(r), r, log_dir, modification_log, journal, batch_slices)
+                state["next_round"] = r + 1
+
+        if self.config.get("engine_mode", "threads") == "async":
+            # Batches are coroutines on one event loop thread; the AIMD limiter caps requests in flight
+            from backend.core.async_executor import AsyncExecutor
+            executor = AsyncExecutor(max_batches=max(max_workers, 2 * self.ai_service.concurrency.max_limit))
+            process_batch = self._process_batch_async
+            self.add_log("Engine mode: async")
+        else:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+            process_batch = self._process_batch_traced
+
+        with executor:
+            while (ready or in_flight) and not self.stop_event.is_set():
+                while ready:
+                    batch_idx, round_num = ready.popleft()
+                    round_buffer = buffers[round_num]
+                    rows = round_buffer.active_rows(batch_slices[batch_idx])
+                    if len(rows) == 0:
+                        # Every term of this batch was deleted in an earlier round
+                        finish_batch(batch_idx, round_num)
+                        continue
 
-    def _save_excel(self, df, path):
+                    batch_df = round_buffer.frame(rows)
+                    record = journaled.pop((round_num, batch_idx), None)
+                    if record and record.get("terms") == self._batch_terms(batch_df):
+                        # Already paid for before an interruption: replay from the journal
+                        self._record_batch_results(
+                            round_buffer, round_num, batch_idx, rows, batch_df, record["results"], modification_log
+                        )
+                        replayed += 1
+                        finish_batch(batch_idx, round_num, rows)
+                        continue
+
+                    future = executor.submit(
+                        process_batch, round_num, batch_idx, batch_df, novel_background, reference_dict, journal
+                    )
+                    in_flight[future] = (batch_idx, round_num, rows, batch_df)
+
+                if replayed:
+                    self.add_log(f"Replayed {replayed} batches from journal. {len(in_flight)} batches queued.")
+                    replayed = 0
+                update_progress()
+
+                if not in_flight:
+                    continue
+                done, _ = concurrent.futures.wait(
+                    in_flight, timeout=1.0, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    batch_idx, round_num, rows, batch_df = in_flight.pop(future)
+                    try:
+                        ai_results = future.result()
+                        # Streaming apply: record, diff and buffer this batch as soon as it resolves
+                        self._record_batch_results(
+                            buffers[round_num], round_num, batch_idx, rows, batch_df, ai_results, modification_log
+                        )
+                    except Exception as exc:
+                        self.add_log(f"Round {round_num}: Batch {batch_idx} generated an exception: {exc}")
+
+                    self.metrics.record_terms(len(rows))
+                    finish_batch(batch_idx, round_num, rows)
+                update_progress()
+
+            if self.stop_event.is_set():
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.add_log(f"Round {state['next_round']} interrupted. Completed batches are kept in the journal for resume.")
+
+        return state["last"]
+
+    def _batch_slices(self, current_df, batch_size, novel_background, reference_dict):
+        """Fixed BATCH_SIZE slices, or slices packed by estimated tokens (see backend/core/batch_packing.py)."""
+        total_rows = len(current_df)
+        if not self.config.get("batch_packing", False):
+            return [slice(i, min(i + batch_size, total_rows)) for i in range(0, total_rows, batch_size)]
+
+        from backend.core import batch_packing
+        with self.tracer.span("pack batches", terms=total_rows):
+            prompt_tokens, output_tokens = self.processor.term_tokens(
+                current_df, novel_background, reference_dict, self.config.get("output_tokens_per_term", 200))
+            # Every configured provider, not just those validated so far: late ones join mid-run (see validate_keys)
+            max_input, max_output = batch_packing.token_budget(self.ai_service.providers)
+            slices = batch_packing.pack(prompt_tokens, output_tokens, self.processor.prompt_tokens(novel_background),
+                                        max_input, max_output, self.config.get("max_batch_terms", 100))
+        if slices:
+            self.add_log(f"Packed {total_rows} terms into {len(slices)} batches by tokens "
+                         f"(avg {total_rows / len(slices):.1f} terms, budget {max_input} prompt / {max_output} output tokens).")
+        return slices
+
+    def _load_slices(self, log_dir, round_num, total_rows):
+        """Batch slices over the stash of `round_num` (see _finalize_round), or None if it has none."""
+        path = os.path.join(log_dir, f'batches_{round_num}.json')
         try:
+            with open(path, 'r', encoding='utf-8') as f:
+                sizes = json.load(f)
+        except (OSError, ValueError):
+            self.add_log(f"No batch layout saved for round {round_num}; journaled batches may be sent again.")
+            return None
+        if sum(sizes) != total_rows:
+            self.add_log(f"Batch layout {path} does not match the stash ({sum(sizes)} != {total_rows} terms), ignoring it.")
+            return None
+        slices = []
+        start = 0
+        for size in sizes:
+            # Batches emptied by deletions stay as empty slices so later batch indices don't move
+            slices.append(slice(start, start + size))
+            start += size
+        return slices
+
+    def _process_batch_traced(self, round_num, batch_idx, *args):
+        # Runs in an executor worker: make the task's tracer current there for call_api's spans
+        with tracing.use(self.tracer), self.tracer.span("batch", cat="batch", round=round_num, batch=batch_idx):
+            return self._process_batch(round_num, batch_idx, *args)
+
+    def _process_batch(self, round_num, batch_idx, batch_data, novel_background, reference_dict, journal):
+        if self.stop_event.is_set(): return None
+        histories, rows_to_process, cached_results_map = self._prepare_batch(round_num, batch_idx, batch_data, novel_background)
+
+        # If all skipped, return reconstructed immediately
+        ai_results_partial = None
+        if rows_to_process:
             import pandas as pd
-            with pd.ExcelWriter(path, engine='xlsxwriter') as writer:
-                df.to_excel(writer, index=False, sheet_name='Sheet1')
-                worksheet = writer.sheets['Sheet1']
-                (max_row, max_col) = df.shape
-                if max_row > 0:
-                    worksheet.autofilter(0, 0, max_row, max_col - 1)
-        except Exception as e:
-            df.to_excel(path, index=False)
+            # Pass term_history to inject history context
+            ai_results_partial = self.processor.process_batch(
+                pd.DataFrame(rows_to_process),
+                novel_background,
+                reference_dict,
+                term_history=histories, # Pass history map
+                log_callback=self.add_log,
+                usage_callback=self.metrics.record_request
+            )
+        return self._complete_batch(round_num, batch_idx, batch_data, rows_to_process, cached_results_map, ai_results_partial, journal)
+
+    async def _process_batch_async(self, round_num, batch_idx, batch_data, novel_background, reference_dict, journal):
+        """_process_batch for the async engine: awaits the API call, the term history and journal I/O run in worker threads."""
+        import asyncio
+        with tracing.use(self.tracer), self.tracer.span("batch", cat="batch", round=round_num, batch=batch_idx):
+            if self.stop_event.is_set(): return None
+            # The term history lookup and the fsynced journal write would stall every other batch on the loop;
+            # to_thread copies the context, so the task's tracer is still current there
+            histories, rows_to_process, cached_results_map = await asyncio.to_thread(
+                self._prepare_batch, round_num, batch_idx, batch_data, novel_background)
+
+            ai_results_partial = None
+            if rows_to_process:
+                import pandas as pd
+                ai_results_partial = await self.processor.process_batch_async(
+                    pd.DataFrame(rows_to_process),
+                    novel_background,
+                    reference_dict,
+                    term_history=histories,
+                    log_callback=self.add_log,
+                    usage_callback=self.metrics.record_request
+                )
+            return await asyncio.to_thread(
+                self._complete_batch, round_num, batch_idx, batch_data, rows_to_process, cached_results_map, ai_results_partial, journal)
+
+    def _prepare_batch(self, round_num, batch_idx, batch_data, novel_background):
+        """Look up term history and split the batch into converged terms and rows that need the LLM."""
+        # Optimization: Filter out terms that already converged (see convergence_policy in cfg.json)
+        rows_to_process = []
+        cached_results_map = {} # index in batch -> result
+
+        # One indexed lookup for the whole batch, shared with the prompt builder
+        with self.tracer.span("term history lookup"):
+            histories = self.term_history.get_many(self._batch_terms(batch_data))
+
+        for local_idx, (idx, row) in enumerate(batch_data.iterrows()):
+            term = str(row['src']).strip()
+            history = histories.get(term, [])
+            tier = self.processor.term_tier(term, row.get('frequency', 1), novel_background)
+
+            # Use the latest verdict as the cached result
+            cached = self.convergence.converged(round_num, history, tier)
+            if cached is not None:
+                cached_results_map[local_idx] = cached
+            else:
+                rows_to_process.append(row)
+
+        if cached_results_map:
+            with self._lock:
+                stats = self.convergence_stats.setdefault(round_num, {"terms_skipped": 0, "calls_saved": 0})
+                stats["terms_skipped"] += len(cached_results_map)
+                if not rows_to_process:
+                    stats["calls_saved"] += 1
+            prometheus.CONVERGENCE_SKIPS.inc(len(cached_results_map))
+
+        self.add_log(f"Round {round_num}: Processing batch {batch_idx + 1} ({len(rows_to_process)}/{len(batch_data)} terms)...")
+        if rows_to_process:
+            prometheus.BATCH_SIZE.observe(len(rows_to_process))
+        return histories, rows_to_process, cached_results_map
+
+    def _complete_batch(self, round_num, batch_idx, batch_data, rows_to_process, cached_results_map, ai_results_partial, journal):
+        """Merge LLM results with the converged ones (batch order) and journal the batch."""
+        if ai_results_partial is None:
+            ai_results_partial = []
+
+        # Reconstruct full result list preserving order
+        full_results = []
+        partial_idx = 0
+
+        for local_idx in range(len(batch_data)):
+            if local_idx in cached_results_map:
+                full_results.append(cached_results_map[local_idx])
+            else:
+                if partial_idx < len(ai_results_partial):
+                    full_results.append(ai_results_partial[partial_idx])
+                    partial_idx += 1
+                else:
+                    # Fallback if partial result missing (shouldn't happen on success)
+                    full_results.append({})
+
+        # Write-ahead: journal the batch before handing it back, so it survives a crash or Stop
+        if not rows_to_process or len(ai_results_partial) == len(rows_to_process):
+            journal.append(round_num, batch_idx, self._batch_terms(batch_data), full_results)
+
+        return full_results
+
+    def _finalize_round(self, round_buffer, round_num, log_dir, modification_log, journal, batch_slices):
+        """Stash a completed round (glossary, batch layout and round log) and return its buffer."""
+        # Kept terms per batch: the stash only has kept rows, so a resume rebuilds the same batches from these
+        # sizes instead of re-slicing the shorter glossary (which would shift every journaled batch)
+        with open(os.path.join(log_dir, f'batches_{round_num}.json'), 'w', encoding='utf-8') as f:
+            json.dump([int(round_buffer.keep[s].sum()) for s in batch_slices], f)
+
+        # Save Intermediate Files (Stash), streamed straight from the buffer
+        stash_glossary_path = os.path.join(log_dir, f'glossary_output_{round_num}.xlsx')
+        self._save_excel(round_buffer, stash_glossary_path)
+
+        # Snapshot of the modification log for this round
+        modification_log.close_round(round_num)
+        stash_log_path = os.path.join(log_dir, f'modified_{round_num}.xlsx')
+        modification_log.export_xlsx(stash_log_path, round_num)
+
+        # Round is fully stashed, its journal entries are no longer needed
+        journal.discard_through(round_num)
+
+        stats = self.convergence_stats.get(round_num)
+        if stats:
+            self.add_log(f"Round {round_num}: {stats['terms_skipped']} converged terms skipped, {stats['calls_saved']} API calls saved.")
+        self.add_log(f"Round {round_num} completed. Stash saved to log/.")
+        return round_buffer
+
+    def _batch_terms(self, batch):
+        return [str(t).strip() for t in batch['src'].tolist()]
+
+    def _record_batch_results(self, round_buffer, round_num, batch_idx, rows, batch, ai_results, modification_log):
+        """Append a batch's results to the term history, then apply them to the round buffer."""
+        if not ai_results:
+            return
+        with self.tracer.span("apply", round=round_num, batch=batch_idx):
+            # Update History (one transaction per batch)
+            self.term_history.add_many(round_num, zip(self._batch_terms(batch), ai_results))
+
+            if len(ai_results) != len(batch):
+                self.add_log(f"Warning: Round {round_num} Batch {batch_idx} count mismatch. Using original.")
+                return
+            modification_log.append(round_num, round_buffer.apply(round_num, rows, ai_results))
+
+    def _save_excel(self, table, path):
+        """Write a DataFrame or a RoundBuffer (kept rows only) in constant-memory mode."""
+        from backend.core import excel_io
+        if hasattr(table, 'iter_rows'):
+            excel_io.write_rows(path, table.columns, table.iter_rows())
+        else:
+            excel_io.write_dataframe(path, table)
 
     def add_log(self, message):
         timestamp = time.strftime("%H:%M:%S")
@@ -454,6 +608,8 @@ class ReviewEngine:
             self.logs.append(f"[{timestamp}] {message}")
             if len(self.logs) > 100:
                 self.logs.pop(0)
+        if self.on_log:
+            self.on_log(message)
 
     def get_status(self):
         with self._lock:
@@ -461,5 +617,11 @@ class ReviewEngine:
             return {
                 "running": self.is_running,
                 "progress": self.progress.copy(),
+                "concurrency": self.ai_service.concurrency.snapshot(),
+                "convergence": {str(r): dict(v) for r, v in sorted(self.convergence_stats.items())},
+                "metrics": self.metrics.snapshot(),
+                "response_cache": self.ai_service.cache_stats(),
+                "providers": self.ai_service.provider_stats(),
+                "hedging": self.ai_service.hedging.snapshot(),
                 "logs": current_logs
             }
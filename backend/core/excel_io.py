@@ -0,0 +1,167 @@
+"""
+Streaming xlsx output and cached xlsx input.
+
+Rows are written one at a time with xlsxwriter's constant_memory mode, so writing a glossary
+or log never holds more than the current row in the writer. The header row matches what
+pandas' to_excel produces, the sheet gets an autofilter, and column widths are fitted to
+the content seen while streaming. Falls back to openpyxl's write-only mode if xlsxwriter
+is not installed.
+
+read_excel() parses with calamine when python-calamine is installed (openpyxl read-only
+otherwise) and can keep the parsed frame in a pickle cache keyed by the file's content
+hash and mtime, so rerunning on an unchanged glossary skips parsing entirely.
+"""
+import hashlib
+import math
+import os
+import re
+import time
+import unicodedata
+
+from backend.core import prometheus
+
+MIN_WIDTH = 8
+MAX_WIDTH = 60
+
+
+def _cell_value(value):
+    """Plain Python value for a cell; None for blanks (None/NaN)."""
+    if value is None:
+        return None
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        value = value.item()  # numpy scalar
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    return value
+
+
+def _display_width(value):
+    text = str(value)
+    if text.isascii():
+        return len(text)
+    return sum(2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1 for ch in text)
+
+
+def write_rows(path, columns, rows, sheet_name='Sheet1'):
+    """Stream `rows` (iterables in column order) to an xlsx file. Returns the number of data rows."""
+    started = time.monotonic()
+    try:
+        return _write_rows(path, [str(c) for c in columns], rows, sheet_name)
+    finally:
+        prometheus.EXCEL_DURATION.observe(time.monotonic() - started, op='write')
+
+
+def _write_rows(path, columns, rows, sheet_name):
+    try:
+        import xlsxwriter
+    except ImportError:
+        return _write_rows_openpyxl(path, columns, rows, sheet_name)
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'strings_to_urls': False})
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        widths = [_display_width(c) for c in columns]
+        worksheet.write_row(0, 0, columns, header_format)
+
+        row_num = 0
+        for row in rows:
+            row_num += 1
+            for col_num, value in enumerate(row):
+                value = _cell_value(value)
+                if value is None:
+                    continue
+                worksheet.write(row_num, col_num, value)
+                width = _display_width(value)
+                if width > widths[col_num]:
+                    widths[col_num] = width
+
+        for col_num, width in enumerate(widths):
+            worksheet.set_column(col_num, col_num, min(max(width + 2, MIN_WIDTH), MAX_WIDTH))
+        if columns:
+            worksheet.autofilter(0, 0, row_num, len(columns) - 1)
+    finally:
+        workbook.close()
+    return row_num
+
+
+def _write_rows_openpyxl(path, columns, rows, sheet_name):
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    worksheet.append(columns)
+    row_num = 0
+    for row in rows:
+        row_num += 1
+        worksheet.append([_cell_value(v) for v in row])
+    if columns:
+        worksheet.auto_filter.ref = f"A1:{get_column_letter(len(columns))}{row_num + 1}"
+    workbook.save(path)
+    return row_num
+
+
+def write_dataframe(path, df, sheet_name='Sheet1'):
+    return write_rows(path, list(df.columns), df.itertuples(index=False, name=None), sheet_name)
+
+
+def write_records(path, columns, records, sheet_name='Sheet1'):
+    """Stream dicts (e.g. modification log entries); missing keys become blank cells."""
+    return write_rows(path, columns, ([record.get(c) for c in columns] for record in records), sheet_name)
+
+
+# Bump when the cached frame layout changes
+CACHE_VERSION = 1
+
+
+def _reader_engine():
+    import importlib.util
+    return 'calamine' if importlib.util.find_spec('python_calamine') else 'openpyxl'
+
+
+def _cache_key(path, engine):
+    import pandas as pd
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    digest.update(f"|{os.stat(path).st_mtime_ns}|{engine}|{pd.__version__}|{CACHE_VERSION}".encode())
+    return digest.hexdigest()[:16]
+
+
+def read_excel(path, cache_dir=None):
+    """pd.read_excel with the fastest available reader, optionally cached in cache_dir."""
+    import pandas as pd
+    engine = _reader_engine()
+    started = time.monotonic()
+    if cache_dir is None:
+        df = pd.read_excel(path, engine=engine)
+        prometheus.EXCEL_DURATION.observe(time.monotonic() - started, op='read')
+        return df
+
+    name = os.path.basename(path)
+    cache_path = os.path.join(cache_dir, f"{name}.{_cache_key(path, engine)}.pkl")
+    if os.path.exists(cache_path):
+        try:
+            df = pd.read_pickle(cache_path)
+            prometheus.EXCEL_DURATION.observe(time.monotonic() - started, op='read_cached')
+            return df
+        except Exception:
+            pass  # truncated or unreadable cache entry, parse again
+
+    df = pd.read_excel(path, engine=engine)
+    prometheus.EXCEL_DURATION.observe(time.monotonic() - started, op='read')
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Only the latest version of each file is kept
+        stale = re.compile(re.escape(name) + r'\.[0-9a-f]{16}\.pkl')
+        for f in os.listdir(cache_dir):
+            if stale.fullmatch(f):
+                os.remove(os.path.join(cache_dir, f))
+        tmp_path = cache_path + '.tmp'
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # read-only folder etc.: caching is best effort
+    return df
@@ -4,16 +4,38 @@ import os
 import concurrent.futures
 # pandas import moved inside methods
 from backend.core.ai_service import AIService
+from backend.core import prometheus
+from backend.core import tracing
 from backend.config_manager import load_config
 
+TIER_INSTRUCTIONS = {
+    "S": "【核心设定词】出现在背景设定中。必须严格保持一致，绝对禁止删除。",
+    "A": "【高频词】出现在原文多次。通常是重要术语，但若是被错误提取的通用常用词（如纯字母、数字、单字、虚词、动词、形容词、副词、介词、连词、助词、感叹词、数词、量词、代词、冠词、语气词等），请务必标记删除。",
+    "B": "",
+    "C": "【低频词】仅出现1-3次。若判断为通用词汇（非术语，如纯字母、数字、单字、虚词、动词、形容词、副词、介词、连词、助词、感叹词、数词、量词、代词、冠词、语气词等），请大胆建议删除。",
+}
+
 class GlossaryProcessor:
     def __init__(self, ai_service: AIService):
         self.ai_service = ai_service
         self.config = load_config()
 
-    def load_data(self, glossary_path, reference_path):
+    @staticmethod
+    def term_tier(korean_term, frequency, novel_background):
+        """S: appears in the novel background, A: frequency >= 5, C: frequency <= 3, otherwise B."""
+        if korean_term in novel_background:
+            return "S"
+        if frequency >= 5:
+            return "A"
+        if frequency <= 3:
+            return "C"
+        return "B"
+
+    def load_data(self, glossary_path, reference_path, cache_dir=None):
         import pandas as pd
-        glossary_df = pd.read_excel(glossary_path, engine='openpyxl')
+        from backend.core import excel_io
+        # Parsed glossary is cached in cache_dir (log/cache) keyed by content hash and mtime
+        glossary_df = excel_io.read_excel(glossary_path, cache_dir=cache_dir).copy()
         original_cols = glossary_df.columns.tolist()
         # Try to find frequency column
         freq_col = None
@@ -105,7 +127,130 @@ class GlossaryProcessor:
 
         return glossary_df, reference_dict, original_cols
 
-    def process_batch(self, batch_df, novel_background, reference_dict, term_history=None, log_callback=None):
+    def process_batch(self, batch_df, novel_background, reference_dict, term_history=None, log_callback=None, usage_callback=None):
+        steps = self._batch_steps(batch_df, novel_background, reference_dict, term_history, log_callback)
+        try:
+            request = next(steps)
+            while True:
+                response = self.ai_service.call_api(**request, log_callback=log_callback, usage_callback=usage_callback)
+                request = steps.send(response)
+        except StopIteration as finished:
+            return finished.value
+
+    async def process_batch_async(self, batch_df, novel_background, reference_dict, term_history=None, log_callback=None, usage_callback=None):
+        steps = self._batch_steps(batch_df, novel_background, reference_dict, term_history, log_callback)
+        try:
+            request = next(steps)
+            while True:
+                response = await self.ai_service.call_api_async(**request, log_callback=log_callback, usage_callback=usage_callback)
+                request = steps.send(response)
+        except StopIteration as finished:
+            return finished.value
+
+    def _batch_steps(self, batch_df, novel_background, reference_dict, term_history, log_callback):
+        """
+        One batch shared by process_batch and process_batch_async: yields the call_api arguments of
+        each request (the batch, then the terms left after salvaging a failed stream), gets the
+        response sent back in, and returns the batch's results.
+        """
+        prompt, batch_list = self._batch_prompt(batch_df, novel_background, reference_dict, term_history)
+        parsed, streamed = {}, {}
+        with tracing.current().span("call_api", cat="api"):
+            response = yield dict(prompt=prompt, cache_validator=self._cache_validator(batch_list, parsed),
+                                  on_item=self._item_collector(batch_list, streamed))
+        result = self._batch_result(response, parsed)
+        salvage = self._salvage(result, batch_list, streamed, novel_background, log_callback)
+        if salvage is None:
+            return result
+        prefix, rest_list, rest_prompt = salvage
+        if not rest_list:
+            return prefix
+        rest_parsed = {}
+        with tracing.current().span("call_api", cat="api", salvaged=len(prefix)):
+            rest_response = yield dict(prompt=rest_prompt, cache_validator=self._cache_validator(rest_list, rest_parsed))
+        return prefix + self._rest_result(self._batch_result(rest_response, rest_parsed))
+
+    def _batch_prompt(self, batch_df, novel_background, reference_dict, term_history):
+        with tracing.current().span("build prompt", terms=len(batch_df)):
+            batch_list = self._build_batch_list(batch_df, novel_background, reference_dict, term_history)
+            return self._get_batch_prompt(novel_background, batch_list), batch_list
+
+    def _cache_validator(self, batch_list, parsed):
+        # Only complete answers go into the response cache; the parse is kept in `parsed` for _batch_result
+        def cache_validator(text):
+            with tracing.current().span("parse response"):
+                parsed["text"], parsed["result"] = text, self._parse_json_response(text)
+            return isinstance(parsed["result"], list) and len(parsed["result"]) == len(batch_list)
+        return cache_validator
+
+    def _batch_result(self, response, parsed):
+        if response is not None and parsed.get("text") is response:
+            return parsed["result"]
+        with tracing.current().span("parse response"):
+            return self._parse_json_response(response)
+
+    @staticmethod
+    def _item_collector(batch_list, streamed):
+        # Streamed verdicts by position (stream_responses), kept only if they answer the term at that position
+        def on_item(index, item):
+            if index < len(batch_list) and isinstance(item, dict) and item.get("korean_term") == batch_list[index]["korean_term"]:
+                streamed.setdefault(index, item)
+        return on_item
+
+    def _salvage(self, result, batch_list, streamed, novel_background, log_callback):
+        """
+        When the answer failed (stalled stream, retries exhausted, cut-off JSON) keep the leading
+        verdicts that were already streamed. Returns (prefix, rest_list, rest_prompt) so only the
+        remaining terms are asked again, or None when there is nothing to salvage.
+        """
+        if isinstance(result, list) and len(result) == len(batch_list):
+            return None
+        prefix = []
+        while len(prefix) in streamed:
+            prefix.append(streamed[len(prefix)])
+        if not prefix:
+            return None
+        prometheus.SALVAGED_TERMS.inc(len(prefix))
+        rest_list = batch_list[len(prefix):]
+        if log_callback:
+            log_callback(f"Kept {len(prefix)}/{len(batch_list)} streamed verdicts, requesting the remaining {len(rest_list)} terms...")
+        return prefix, rest_list, self._get_batch_prompt(novel_background, rest_list) if rest_list else None
+
+    @staticmethod
+    def _rest_result(result):
+        return result if isinstance(result, list) else []
+
+    def term_tokens(self, df, novel_background, reference_dict, output_per_term=200):
+        """
+        Estimated (prompt tokens, output tokens) per row for batch packing: the row's entry in the
+        prompt's term list, and its verdict, which echoes the term and translation.
+        """
+        from backend.core.rate_limit import estimate_tokens
+        # Keys, quoting and indentation of one entry, plus room for history_context in later rounds
+        entry = {"korean_term": "", "chinese_translation": "", "tier": "B", "instruction": "", "history_context": None,
+                 "is_character": False, "current_category": "", "context": ""}
+        overhead = estimate_tokens(json.dumps([entry], ensure_ascii=False, indent=2)) + 20
+        instructions = {tier: estimate_tokens(text) for tier, text in TIER_INSTRUCTIONS.items()}
+
+        frequencies = df['frequency'].tolist() if 'frequency' in df.columns else [1] * len(df)
+        infos = df['info'].tolist() if 'info' in df.columns else [''] * len(df)
+        prompt_tokens, output_tokens = [], []
+        for src, dst, frequency, info in zip(df['src'].tolist(), df['dst'].tolist(), frequencies, infos):
+            term, translation = str(src).strip(), str(dst).strip()
+            context = reference_dict.get(term, "")
+            echo = estimate_tokens(term) + estimate_tokens(translation)
+            info_tokens = 0 if info != info else estimate_tokens(str(info))
+            prompt_tokens.append(overhead + instructions[self.term_tier(term, frequency, novel_background)]
+                                 + echo + info_tokens + estimate_tokens(context))
+            output_tokens.append(output_per_term + 2 * echo)
+        return prompt_tokens, output_tokens
+
+    def prompt_tokens(self, novel_background):
+        """Estimated tokens of a batch prompt without its terms."""
+        from backend.core.rate_limit import estimate_tokens
+        return estimate_tokens(self._get_batch_prompt(novel_background, []))
+
+    def _build_batch_list(self, batch_df, novel_background, reference_dict, term_history=None):
         batch_list = []
         character_keywords = ['角色', '男性角色', '女性角色', '动物与非人角色', '历史与知名人物', '群体代称', '称呼与头衔', 'ID与外号']
 
@@ -114,24 +259,13 @@ class GlossaryProcessor:
             frequency = row.get('frequency', 1)
 
             # 1. Tier Calculation
-            tier = "B"
-            instruction = ""
-            is_lore = korean_term in novel_background
-
-            if is_lore:
-                tier = "S"
-                instruction = "【核心设定词】出现在背景设定中。必须严格保持一致，绝对禁止删除。"
-            elif frequency >= 5:
-                tier = "A"
-                instruction = "【高频词】出现在原文多次。通常是重要术语，但若是被错误提取的通用常用词（如纯字母、数字、单字、虚词、动词、形容词、副词、介词、连词、助词、感叹词、数词、量词、代词、冠词、语气词等），请务必标记删除。"
-            elif frequency <= 3:
-                tier = "C"
-                instruction = "【低频词】仅出现1-3次。若判断为通用词汇（非术语，如纯字母、数字、单字、虚词、动词、形容词、副词、介词、连词、助词、感叹词、数词、量词、代词、冠词、语气词等），请大胆建议删除。"
+            tier = self.term_tier(korean_term, frequency, novel_background)
+            instruction = TIER_INSTRUCTIONS[tier]
 
             # 2. History Injection
             history_context = None
-            if term_history and korean_term in term_history:
-                past_results = term_history[korean_term]
+            if term_history is not None:
+                past_results = term_history.get(korean_term)
                 if past_results:
                     last = past_results[-1]
                     if not last.get('should_delete'):
@@ -153,10 +287,7 @@ class GlossaryProcessor:
                 "current_category": info_str.strip(),
                 "context": reference_dict.get(korean_term, f"未在参考文件中找到术语 '{korean_term}' 的上下文。")
             })
-
-        prompt = self._get_batch_prompt(novel_background, batch_list)
-        response = self.ai_service.call_api(prompt, log_callback=log_callback)
-        return self._parse_json_response(response)
+        return batch_list
 
     def _parse_json_response(self, response_text):
         if not response_text: return None
@@ -171,6 +302,7 @@ class GlossaryProcessor:
                     return json.loads(match.group(0))
                 except:
                     pass
+            prometheus.PARSE_FAILURES.inc()
             return None
 
     def test_single_term(self, term, translation, context, custom_prompt=None, novel_background=""):
@@ -0,0 +1,83 @@
+"""
+Hedged requests: when a request has been in flight longer than a percentile of recently
+observed latencies, AIService sends the same prompt to a different provider and takes
+whichever answer arrives first. In the async engine the loser is cancelled; a blocking
+request in thread mode cannot be interrupted, so its answer is just discarded.
+
+Extra spend is capped: hedges may not exceed `hedge_max_ratio` of the requests sent.
+cfg.json:
+
+    "hedge_requests": true,
+    "hedge_percentile": 95,
+    "hedge_min_delay": 5,        (never hedge earlier than this many seconds)
+    "hedge_max_ratio": 0.1,
+    "hedge_min_samples": 20      (latencies needed before the percentile is trusted)
+"""
+import collections
+import threading
+
+
+class HedgePolicy:
+    def __init__(self, enabled=False, percentile=95, min_delay=5.0, max_ratio=0.1, min_samples=20, window=500):
+        self.enabled = bool(enabled)
+        self.percentile = float(percentile)
+        self.min_delay = float(min_delay)
+        self.max_ratio = float(max_ratio)
+        self.min_samples = int(min_samples)
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=window)
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            enabled=config.get("hedge_requests", False),
+            percentile=config.get("hedge_percentile", 95),
+            min_delay=config.get("hedge_min_delay", 5),
+            max_ratio=config.get("hedge_max_ratio", 0.1),
+            min_samples=config.get("hedge_min_samples", 20),
+        )
+
+    def observe(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def delay(self):
+        """Seconds after sending to hedge a request, or None when hedging is off or has too few samples."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self.requests += 1
+            samples = sorted(self._latencies)
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return max(self.min_delay, samples[index])
+
+    def try_hedge(self):
+        """Claim budget for one hedge; False once hedges would exceed max_ratio of requests."""
+        with self._lock:
+            if self.hedges + 1 > self.max_ratio * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def refund(self):
+        """Give back a claimed hedge that was not sent."""
+        with self._lock:
+            self.hedges = max(0, self.hedges - 1)
+
+    def record_win(self):
+        with self._lock:
+            self.wins += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.wins,
+            }
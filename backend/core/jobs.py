@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from backend.core.ai_service import AIService
+from backend.core.engine import ReviewEngine
+from backend.core.glossary_processor import GlossaryProcessor
+from backend.config_manager import load_config
+
+# Finished jobs kept around for /api/jobs and /api/status
+MAX_FINISHED_JOBS = 50
+
+
+class Job:
+    def __init__(self, directory, novel_background, rounds, glossary_file=None, reference_file=None):
+        self.id = uuid.uuid4().hex[:8]
+        self.directory = directory
+        self.novel_background = novel_background
+        self.rounds = int(rounds)
+        self.glossary_file = glossary_file
+        self.reference_file = reference_file
+        self.state = "queued"  # queued | running | completed | stopped | failed | cancelled
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.engine = None
+
+    @property
+    def dir_key(self):
+        return os.path.normcase(os.path.realpath(self.directory))
+
+    def summary(self):
+        progress = self.engine.progress.copy() if self.engine else {"current": 0, "total": 0, "message": "Queued", "percent": 0}
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "directory": self.directory,
+            "rounds": self.rounds,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": progress,
+            "error": self.engine.error if self.engine else None,
+        }
+
+
+class JobManager:
+    """
+    Process-wide job queue.
+    Every job gets its own ReviewEngine, but all engines share one AIService, so the
+    adaptive concurrency limit is a global provider budget. Jobs for different directories
+    run side by side (up to MAX_CONCURRENT_JOBS); a job for a directory that is already
+    being reviewed waits until that job finishes, since both would write to the same log/.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(JobManager, cls).__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized: return
+        self._initialized = True
+        self.ai_service = AIService()
+        self.processor = GlossaryProcessor(self.ai_service)
+        self.jobs = OrderedDict()
+        self._jobs_lock = threading.RLock()
+        if self.ai_service.config.get("preflight_at_startup", False):
+            # Warm the pre-flight cache so the first task does not wait for key checks
+            self.ai_service.prevalidate()
+
+    def submit(self, directory, novel_background, rounds=1, glossary_file=None, reference_file=None):
+        job = Job(directory, novel_background, rounds, glossary_file, reference_file)
+        with self._jobs_lock:
+            self.jobs[job.id] = job
+            self._schedule()
+            if job.state == "queued":
+                return True, f"Task queued (job {job.id})", job.id
+        return True, "Task started", job.id
+
+    def stop(self, job_id):
+        # Always by id: several translators share one server, never stop someone else's job
+        with self._jobs_lock:
+            job = self.get(job_id)
+            if job is None:
+                return False, "Job not found"
+            if job.state == "queued":
+                job.state = "cancelled"
+                job.finished_at = time.time()
+                return True, "Task removed from queue"
+            if job.state != "running":
+                return False, "No task running"
+        return job.engine.stop_task()
+
+    def get(self, job_id):
+        with self._jobs_lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self):
+        with self._jobs_lock:
+            return [job.summary() for job in self.jobs.values()]
+
+    def status(self, job_id):
+        """Status of one job, or None if it is unknown."""
+        with self._jobs_lock:
+            job = self.get(job_id)
+        if job is None:
+            return None
+        if job.engine is None:
+            status = self.idle_status()
+            status["progress"]["message"] = "Queued" if job.state == "queued" else "Cancelled"
+        else:
+            status = job.engine.get_status()
+        status["job_id"] = job.id
+        status["state"] = job.state
+        status["directory"] = job.directory
+        return status
+
+    def idle_status(self):
+        return {
+            "running": False,
+            "progress": {"current": 0, "total": 0, "message": "Idle", "percent": 0},
+            "concurrency": self.ai_service.concurrency.snapshot(),
+            "convergence": {},
+            "metrics": {},
+            "response_cache": self.ai_service.cache_stats(),
+            "providers": self.ai_service.provider_stats(),
+            "hedging": self.ai_service.hedging.snapshot(),
+            "logs": [],
+        }
+
+    def _schedule(self):
+        with self._jobs_lock:
+            max_jobs = int(load_config().get("MAX_CONCURRENT_JOBS", 3))
+            running = [j for j in self.jobs.values() if j.state == "running"]
+            busy_dirs = {j.dir_key for j in running}
+            for job in self.jobs.values():
+                if len(running) >= max_jobs:
+                    break
+                if job.state != "queued" or job.dir_key in busy_dirs:
+                    continue
+                self._start(job, reload_service=not running)
+                running.append(job)
+                busy_dirs.add(job.dir_key)
+            self._prune()
+
+    def _start(self, job, reload_service):
+        job.engine = ReviewEngine(ai_service=self.ai_service)
+        job.engine.on_finished = lambda: self._job_finished(job)
+        job.state = "running"
+        job.started_at = time.time()
+        # Provider settings are only reloaded when no other job is using the shared service
+        job.engine.start_task(
+            job.directory, job.novel_background, job.rounds,
+            glossary_file=job.glossary_file,
+            reference_file=job.reference_file,
+            reload_service=reload_service,
+        )
+
+    def _job_finished(self, job):
+        with self._jobs_lock:
+            if job.engine.stop_event.is_set():
+                job.state = "stopped"
+            elif job.engine.error:
+                job.state = "failed"
+            else:
+                job.state = "completed"
+            job.finished_at = time.time()
+            self._schedule()
+
+    def _prune(self):
+        finished = [j.id for j in self.jobs.values() if j.finished_at is not None]
+        for job_id in finished[:-MAX_FINISHED_JOBS]:
+            del self.jobs[job_id]
@@ -0,0 +1,66 @@
+import json
+import os
+import threading
+
+
+class BatchJournal:
+    """
+    Append-only JSONL journal of completed batch results.
+    Every batch that came back from the API is written here (and fsynced) before the
+    engine applies it, so a crash or Stop in the middle of a round can be resumed
+    without paying for the same batches again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, round_num, batch_idx, terms, results):
+        record = {"round": round_num, "batch": batch_idx, "terms": terms, "results": results}
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def load(self):
+        """Return {(round, batch_idx): record} for every journaled batch."""
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        with self._lock:
+            for record in self._read():
+                records[(record["round"], record["batch"])] = record
+        return records
+
+    def discard_through(self, round_num):
+        """Drop entries of rounds that have been stashed to disk (rounds <= round_num)."""
+        with self._lock:
+            if not os.path.exists(self.path):
+                return
+            keep = [r for r in self._read() if r["round"] > round_num]
+            if not keep:
+                os.remove(self.path)
+                return
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in keep:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    def _read(self):
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Torn write from a crash; everything before it is still valid
+                    continue
+        return records
@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import deque
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class RunMetrics:
+    """
+    Live throughput numbers for one review task, reported by ReviewEngine.get_status().
+    Rates are computed over a rolling window (terms and tokens per second), latency over
+    the last `latency_samples` requests. ETAs divide the remaining terms by the rolling
+    term rate, so they settle after the first minute of a run.
+    """
+
+    def __init__(self, window=60.0, latency_samples=200, clock=time.monotonic):
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.window = window
+        self.started_at = clock()
+        self._terms = deque()     # (time, terms)
+        self._tokens = deque()    # (time, prompt_tokens, completion_tokens)
+        self._latencies = deque(maxlen=latency_samples)
+        self.terms_done = 0
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.batches_in_flight = 0
+        self.remaining_round = 0
+        self.remaining_total = 0
+
+    def _trim(self, now):
+        cutoff = now - self.window
+        while self._terms and self._terms[0][0] < cutoff:
+            self._terms.popleft()
+        while self._tokens and self._tokens[0][0] < cutoff:
+            self._tokens.popleft()
+
+    def record_terms(self, count):
+        """Terms reviewed by a finished batch (journal replays are not counted)."""
+        now = self._clock()
+        with self._lock:
+            self.terms_done += count
+            self._terms.append((now, count))
+            self._trim(now)
+
+    def record_request(self, latency, usage=None):
+        """Usage callback for AIService.call_api: one successful request and its token usage."""
+        now = self._clock()
+        prompt = getattr(usage, 'prompt_tokens', None) or 0
+        completion = getattr(usage, 'completion_tokens', None) or 0
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+            self._latencies.append(latency)
+            self._tokens.append((now, prompt, completion))
+            self._trim(now)
+
+    def set_remaining(self, batches_in_flight, round_terms, total_terms):
+        with self._lock:
+            self.batches_in_flight = batches_in_flight
+            self.remaining_round = round_terms
+            self.remaining_total = total_terms
+
+    def snapshot(self):
+        now = self._clock()
+        with self._lock:
+            self._trim(now)
+            # Until a full window has passed, rates are over the time elapsed so far
+            span = max(1e-6, min(self.window, now - self.started_at))
+            terms_rate = sum(c for _, c in self._terms) / span
+            prompt_rate = sum(p for _, p, _ in self._tokens) / span
+            completion_rate = sum(c for _, _, c in self._tokens) / span
+            latencies = sorted(self._latencies)
+
+            def eta(remaining):
+                if remaining <= 0:
+                    return 0
+                return round(remaining / terms_rate) if terms_rate > 0 else None
+
+            return {
+                "elapsed_seconds": round(now - self.started_at, 1),
+                "terms_done": self.terms_done,
+                "terms_per_sec": round(terms_rate, 2),
+                "batches_in_flight": self.batches_in_flight,
+                "requests": self.requests,
+                "latency_avg_ms": round(sum(latencies) / len(latencies) * 1000) if latencies else None,
+                "latency_p50_ms": round(_percentile(latencies, 0.5) * 1000) if latencies else None,
+                "latency_p95_ms": round(_percentile(latencies, 0.95) * 1000) if latencies else None,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "prompt_tokens_per_sec": round(prompt_rate, 1),
+                "completion_tokens_per_sec": round(completion_rate, 1),
+                "eta_round_seconds": eta(self.remaining_round),
+                "eta_total_seconds": eta(self.remaining_total),
+            }
@@ -0,0 +1,117 @@
+import json
+import os
+import re
+import threading
+
+LOG_COLUMNS = [
+    'round', 'term', 'original', 'new', 'action', 'reason',
+    'justification', 'emoji', 'original_category', 'suggested_category',
+]
+
+
+def _dumps(entry):
+    return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ModificationLog:
+    """
+    Streaming modification log.
+    Entries are appended to one JSONL file per round (log/modified_N.jsonl) as batches are
+    applied; the per-round and final xlsx/json exports are generated by streaming those files,
+    so memory stays flat no matter how many rounds and terms there are.
+    """
+
+    def __init__(self, log_dir):
+        self.log_dir = log_dir
+        self._lock = threading.Lock()
+        self._handles = {}
+
+    def _path(self, round_num):
+        return os.path.join(self.log_dir, f'modified_{round_num}.jsonl')
+
+    def rounds(self):
+        found = []
+        for f in os.listdir(self.log_dir):
+            match = re.fullmatch(r'modified_(\d+)\.jsonl', f)
+            if match:
+                found.append(int(match.group(1)))
+        return sorted(found)
+
+    def append(self, round_num, entries):
+        if not entries:
+            return
+        data = "".join(_dumps(entry) + "\n" for entry in entries)
+        with self._lock:
+            handle = self._handles.get(round_num)
+            if handle is None:
+                handle = open(self._path(round_num), 'a', encoding='utf-8')
+                self._handles[round_num] = handle
+            handle.write(data)
+            handle.flush()
+
+    def close_round(self, round_num):
+        """Make a completed round durable; creates an empty file for rounds without changes."""
+        with self._lock:
+            handle = self._handles.pop(round_num, None)
+            if handle is None:
+                handle = open(self._path(round_num), 'a', encoding='utf-8')
+            handle.flush()
+            os.fsync(handle.fileno())
+            handle.close()
+
+    def discard_from(self, round_num):
+        """Remove entries of rounds >= round_num (they are re-run or replayed from the journal)."""
+        with self._lock:
+            for r in list(self._handles):
+                if r >= round_num:
+                    self._handles.pop(r).close()
+            for r in self.rounds():
+                if r >= round_num:
+                    os.remove(self._path(r))
+
+    def iter_entries(self, round_num=None):
+        rounds = [round_num] if round_num is not None else self.rounds()
+        for r in rounds:
+            path = self._path(r)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def import_legacy_xlsx(self, through_round):
+        """Rebuild JSONL files from modified_N.xlsx stashes written by older versions."""
+        import pandas as pd
+        imported = 0
+        for r in range(1, through_round + 1):
+            mod_file = os.path.join(self.log_dir, f'modified_{r}.xlsx')
+            if not os.path.exists(mod_file):
+                continue
+            mod_df = pd.read_excel(mod_file, engine='openpyxl').fillna('')
+            self.append(r, mod_df.to_dict('records'))
+            self.close_round(r)
+            imported += 1
+        return imported
+
+    def export_json(self, path):
+        """Write all rounds as one JSON array, one entry at a time."""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("[")
+            first = True
+            for entry in self.iter_entries():
+                f.write("\n  " if first else ",\n  ")
+                f.write(_dumps(entry))
+                first = False
+            f.write("\n]" if not first else "]")
+
+    def export_xlsx(self, path, round_num=None):
+        """Write one round (or all rounds) to xlsx row by row."""
+        from backend.core import excel_io
+        return excel_io.write_records(path, LOG_COLUMNS, self.iter_entries(round_num))
+
+    def close(self):
+        with self._lock:
+            for handle in self._handles.values():
+                handle.close()
+            self._handles.clear()
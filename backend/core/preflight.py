@@ -0,0 +1,110 @@
+"""
+Pre-flight API key checks, shared by /api/test-connection and the engine's task start.
+
+Each provider is checked with a tiny completion, all of them in parallel, and the verdict
+is cached per (api_key, base_url, model): successes for "preflight_cache_ttl" seconds
+(default 600), failures for at most a minute since they are often transient. Starting a
+task right after testing the connection, or a second task, then skips the round trips.
+With "preflight_at_startup": true the checks run in the background as soon as the app
+starts. A key that is being checked is never requested twice at once.
+"""
+import concurrent.futures
+import random
+import threading
+import time
+
+import openai
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+FAILURE_TTL = 60.0
+
+
+def check_key(api_key, base_url, model, timeout):
+    """Send one minimal request. Returns (ok, message)."""
+    try:
+        kwargs = {
+            "api_key": api_key if api_key else "dummy_key",
+            "timeout": timeout,
+            "default_headers": {"User-Agent": USER_AGENT}
+        }
+        if base_url:
+            kwargs["base_url"] = base_url
+        client = openai.OpenAI(**kwargs)
+
+        # Unique prompt so upstream proxies cannot answer from their cache
+        unique_prompt = f"Hi from review tool check {int(time.time())} {random.randint(1000, 9999)}"
+        response = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": unique_prompt}],
+            max_tokens=5,
+            timeout=timeout
+        )
+        if not (response and response.choices):
+            return False, "Error: Empty response from API"
+        return True, "OK"
+    except openai.APITimeoutError:
+        return False, f"Timeout ({int(timeout)}s) - Server did not respond in time."
+    except openai.APIStatusError as e:
+        # 4xx/5xx (AuthenticationError is a subclass of this)
+        try:
+            error_body = e.body.get('message', str(e.body)) if isinstance(e.body, dict) else str(e.body)
+        except Exception:
+            error_body = str(e)
+        return False, f"HTTP {e.status_code}: {error_body}"
+    except Exception as e:
+        return False, f"Error: {str(e)}"
+
+
+class KeyValidator:
+    def __init__(self, ttl_seconds=600.0, max_workers=16, check=check_key, clock=time.monotonic):
+        self.ttl = float(ttl_seconds)
+        self._check_key = check
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._results = {}  # key -> (checked_at, ok, message)
+        self._pending = {}  # key -> Future of the check in progress
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="preflight")
+
+    @staticmethod
+    def key(provider):
+        return tuple((provider.get(field) or "").strip() for field in ("api_key", "base_url", "model"))
+
+    def cached(self, provider):
+        """(ok, message) of a check still within its TTL, or None."""
+        with self._lock:
+            entry = self._results.get(self.key(provider))
+        if entry is None:
+            return None
+        checked_at, ok, message = entry
+        if self._clock() - checked_at > (self.ttl if ok else min(self.ttl, FAILURE_TTL)):
+            return None
+        return ok, message
+
+    def submit(self, provider, timeout):
+        """Future of (ok, message, cached) for `provider`, answered from the cache when possible."""
+        hit = self.cached(provider)
+        if hit is not None:
+            future = concurrent.futures.Future()
+            future.set_result(hit + (True,))
+            return future
+        key = self.key(provider)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pool.submit(self._check, key, timeout)
+                self._pending[key] = future
+            return future
+
+    def _check(self, key, timeout):
+        try:
+            ok, message = self._check_key(*key, timeout)
+        except Exception as e:
+            ok, message = False, f"Error: {str(e)}"
+        with self._lock:
+            self._results[key] = (self._clock(), ok, message)
+            self._pending.pop(key, None)
+        return ok, message, False
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
@@ -0,0 +1,173 @@
+"""
+Minimal Prometheus registry, rendered by GET /api/metrics in the text exposition format.
+
+prometheus_client is not a dependency, so this covers just what the backend needs:
+labelled counters, gauges and histograms, all process-wide and thread-safe. The metrics
+themselves are defined at the bottom of this module and updated from AIService,
+GlossaryProcessor, ReviewEngine and excel_io.
+"""
+import threading
+
+_lock = threading.Lock()
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        with _lock:
+            _registry.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with _lock:
+            lines.extend(self._samples())
+        return lines
+
+    def clear(self):
+        with _lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with _lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(key)} {_format_value(v)}" for key, v in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=(0.1, 0.5, 1, 5, 10, 60)):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def count(self, **labels):
+        with _lock:
+            state = self._values.get(self._key(labels))
+            return state["count"] if state else 0
+
+    def _samples(self):
+        lines = []
+        for key, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, state["buckets"]):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', _format_value(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {state['count']}")
+        return lines
+
+
+def render():
+    """All registered metrics in the text exposition format (version 0.0.4)."""
+    with _lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Metrics ---
+
+API_REQUESTS = Counter(
+    "glossary_api_requests_total", "LLM requests by provider and outcome (success, overload, error).",
+    ["provider", "outcome"])
+API_LATENCY = Histogram(
+    "glossary_api_request_duration_seconds", "LLM request latency by provider.",
+    ["provider"], buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600))
+API_RETRIES = Counter(
+    "glossary_api_retries_total", "Retried call_api attempts by provider.", ["provider"])
+API_RATE_LIMITED = Counter(
+    "glossary_api_rate_limited_total", "HTTP 429 responses by provider.", ["provider"])
+API_THROTTLED_SECONDS = Counter(
+    "glossary_api_throttled_seconds_total", "Time requests waited for a provider's RPM/TPM quota.", ["provider"])
+PROVIDER_EJECTIONS = Counter(
+    "glossary_provider_circuit_opened_total", "Times a provider's circuit breaker opened.", ["provider"])
+HEDGED_REQUESTS = Counter(
+    "glossary_api_hedged_requests_total", "Hedge requests sent because the first provider was slow, by hedge provider.", ["provider"])
+API_TIMEOUTS = Counter(
+    "glossary_api_timeouts_total", "Timed out LLM requests by provider.", ["provider"])
+STREAM_STALLS = Counter(
+    "glossary_api_stream_stalls_total", "Streamed responses aborted after sending nothing for stream_stall_timeout.", ["provider"])
+SALVAGED_TERMS = Counter(
+    "glossary_salvaged_terms_total", "Verdicts kept from a failed streamed response instead of asking for them again.")
+PARSE_FAILURES = Counter(
+    "glossary_parse_failures_total", "LLM responses that could not be parsed as a JSON list.")
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "glossary_response_cache_lookups_total", "LLM response cache lookups (result: hit, miss).", ["result"])
+CONVERGENCE_SKIPS = Counter(
+    "glossary_convergence_skipped_terms_total", "Terms skipped because their verdicts converged.")
+BATCH_SIZE = Histogram(
+    "glossary_batch_terms", "Terms sent to the LLM per batch.",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200))
+EXCEL_DURATION = Histogram(
+    "glossary_excel_duration_seconds", "Excel read/write time (op: read, read_cached, write).",
+    ["op"], buckets=(0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 120))
+JOBS = Gauge("glossary_jobs", "Review jobs by state.", ["state"])
+CONCURRENCY_LIMIT = Gauge("glossary_concurrency_limit", "Current adaptive concurrency limit.")
+CONCURRENCY_IN_FLIGHT = Gauge("glossary_concurrency_in_flight", "LLM requests currently in flight.")
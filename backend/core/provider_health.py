@@ -0,0 +1,103 @@
+"""
+Per-provider health for routing: rolling latency and success rate, plus a circuit breaker.
+
+AIService routes with smooth weighted round-robin, weighting each provider by
+success_rate² / latency (both EWMAs), so a slow or flaky endpoint gets proportionally
+less traffic instead of an equal share. After `failure_threshold` consecutive failures
+the breaker opens and the provider gets no traffic for `open_seconds`; then it is
+half-open and exactly one probe request decides between closing it again and another,
+twice as long, open period (capped at `max_open_seconds`). 429s are not failures, they
+are handled by the provider's rate limiter. cfg.json:
+
+    "circuit_failure_threshold": 5,
+    "circuit_open_seconds": 30
+"""
+import threading
+import time
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class ProviderHealth:
+    def __init__(self, failure_threshold=5, open_seconds=30.0, max_open_seconds=300.0, alpha=0.2, clock=time.monotonic):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.base_open_seconds = float(open_seconds)
+        self.max_open_seconds = max(float(max_open_seconds), self.base_open_seconds)
+        self.alpha = alpha
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.open_seconds = self.base_open_seconds
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.latency_ewma = None
+        self.success_rate = 1.0
+        self.consecutive_failures = 0
+        self.ejections = 0
+
+    def available(self):
+        """Whether the breaker lets a request through right now (does not claim the probe)."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return self._clock() - self.opened_at >= self.open_seconds
+            return not self.probe_in_flight
+
+    def acquire(self):
+        """Called for the provider a request was routed to; claims the half-open probe."""
+        with self._lock:
+            if self.state == OPEN and self._clock() - self.opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+
+    def record_success(self, latency):
+        with self._lock:
+            self.latency_ewma = latency if self.latency_ewma is None else (1 - self.alpha) * self.latency_ewma + self.alpha * latency
+            self.success_rate = (1 - self.alpha) * self.success_rate + self.alpha
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                self.state = CLOSED
+                self.open_seconds = self.base_open_seconds
+                self.probe_in_flight = False
+
+    def record_failure(self):
+        """Returns True when this failure opened the breaker."""
+        with self._lock:
+            self.success_rate = (1 - self.alpha) * self.success_rate
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                # Failed probe: back off longer before the next one
+                self.open_seconds = min(self.max_open_seconds, self.open_seconds * 2)
+                return self._open()
+            if self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+                return self._open()
+            return False
+
+    def record_neutral(self):
+        """An outcome that says nothing about health (429): just free the half-open probe."""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = self._clock()
+        self.probe_in_flight = False
+        self.ejections += 1
+        return True
+
+    def weight(self, default_latency):
+        latency = self.latency_ewma if self.latency_ewma is not None else default_latency
+        return max(self.success_rate, 0.01) ** 2 / max(latency, 0.05)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "latency_ewma": round(self.latency_ewma, 2) if self.latency_ewma is not None else None,
+                "success_rate": round(self.success_rate, 3),
+                "consecutive_failures": self.consecutive_failures,
+                "ejections": self.ejections,
+            }
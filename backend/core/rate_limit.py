@@ -0,0 +1,117 @@
+"""
+Proactive per-provider rate limiting.
+
+Every entry in `providers` may set "rpm" (requests per minute) and "tpm" (tokens per
+minute); empty or 0 means unlimited. Each provider gets token buckets that refill
+continuously at rpm/60 and tpm/60 per second with a one-minute burst. AIService reserves
+one request plus the estimated tokens (prompt + typical completion) before sending and
+sleeps for the returned wait, so a key runs right at its quota instead of bouncing off
+429s. The token estimate is corrected with the usage reported by the response.
+
+A 429 only pauses the provider that sent it (for Retry-After when given); requests move
+on to the other providers in the meantime.
+"""
+import re
+import threading
+import time
+
+# Hangul, CJK and kana are roughly one token per character; other text about four characters per token
+_WIDE = re.compile(r'[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]')
+
+
+def estimate_tokens(text):
+    wide = len(_WIDE.findall(text))
+    return wide + (len(text) - wide + 3) // 4
+
+
+class TokenBucket:
+    def __init__(self, per_minute, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` is available (a request larger than the burst waits for a full bucket)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def reserve(self, amount):
+        """Take `amount` now and return how long to wait before using it. The level may go negative,
+        which queues later callers behind this one."""
+        wait = self.wait_time(amount)
+        self.level -= min(amount, self.capacity)
+        return wait
+
+    def adjust(self, delta):
+        self._refill()
+        self.level = min(self.capacity, self.level - delta)
+
+
+class ProviderLimiter:
+    def __init__(self, rpm=None, tpm=None, clock=time.monotonic):
+        self.rpm = int(rpm) if rpm else None
+        self.tpm = int(tpm) if tpm else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.requests = TokenBucket(self.rpm, clock) if self.rpm else None
+        self.tokens = TokenBucket(self.tpm, clock) if self.tpm else None
+        self.completion_tokens = 1000.0  # running estimate of a response's size
+        self.paused_until = 0.0
+        self.throttled_seconds = 0.0
+        self.rate_limited = 0
+
+    def estimate(self, prompt):
+        return estimate_tokens(prompt) + int(self.completion_tokens)
+
+    def wait_time(self, tokens):
+        with self._lock:
+            wait = max(0.0, self.paused_until - self._clock())
+            if self.requests:
+                wait = max(wait, self.requests.wait_time(1))
+            if self.tokens:
+                wait = max(wait, self.tokens.wait_time(tokens))
+            return wait
+
+    def reserve(self, tokens):
+        with self._lock:
+            wait = max(0.0, self.paused_until - self._clock())
+            if self.requests:
+                wait = max(wait, self.requests.reserve(1))
+            if self.tokens:
+                wait = max(wait, self.tokens.reserve(tokens))
+            self.throttled_seconds += wait
+            return wait
+
+    def settle(self, estimated, usage):
+        """Correct the token bucket with the usage the provider actually reported."""
+        prompt_tokens = getattr(usage, 'prompt_tokens', None)
+        completion_tokens = getattr(usage, 'completion_tokens', None)
+        if prompt_tokens is None or completion_tokens is None:
+            return
+        with self._lock:
+            self.completion_tokens = 0.8 * self.completion_tokens + 0.2 * completion_tokens
+            if self.tokens:
+                self.tokens.adjust(prompt_tokens + completion_tokens - estimated)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.rate_limited += 1
+            self.paused_until = max(self.paused_until, self._clock() + seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "paused_seconds": round(max(0.0, self.paused_until - self._clock()), 1),
+                "throttled_seconds": round(self.throttled_seconds, 1),
+                "rate_limited": self.rate_limited,
+            }
@@ -0,0 +1,131 @@
+"""
+Record/replay of LLM responses underneath AIService.call_api.
+
+    "llm_replay_mode": "record" | "replay" | "off"
+    "llm_replay_file": "recordings/novel-a.jsonl"   (relative paths are next to cfg.json)
+    "llm_replay_latency": "recorded" | <seconds>     (replay only, default "recorded")
+    "llm_replay_on_miss": "fail" | "live"           (replay only, default "fail")
+
+Record mode appends one JSON line per successful request: the prompt, its sha256, the
+provider/model, latency, usage and response text. Replay mode serves responses by prompt
+hash without touching the network; when the same prompt was recorded several times (e.g.
+once per round) the recordings are served in order and the last one repeats. A prompt
+that was never recorded fails like an empty response, or goes to the live API with
+"live".
+"""
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+MODES = ("off", "record", "replay")
+
+
+def prompt_key(prompt):
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+class ReplayStore:
+    def __init__(self, path, mode, latency="recorded", on_miss="fail"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown replay mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.on_miss = on_miss
+        self._lock = threading.Lock()
+        self._recordings = {}
+        self._served = collections.Counter()
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        if mode == "replay":
+            self._load()
+
+    @classmethod
+    def from_config(cls, config, config_dir):
+        mode = config.get("llm_replay_mode", "off") or "off"
+        if mode not in MODES:
+            raise ValueError(f"Unknown llm_replay_mode: {mode}")
+        if mode == "off":
+            return None
+        path = config.get("llm_replay_file") or "llm_recordings.jsonl"
+        if not os.path.isabs(path):
+            path = os.path.join(config_dir, path)
+        return cls(path, mode, config.get("llm_replay_latency", "recorded"), config.get("llm_replay_on_miss", "fail"))
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line of an interrupted recording
+                self._recordings.setdefault(record["key"], []).append(record)
+
+    def __len__(self):
+        return sum(len(v) for v in self._recordings.values())
+
+    def record(self, prompt, provider, model, latency, content, usage=None):
+        record = {
+            "key": prompt_key(prompt),
+            "time": round(time.time(), 3),
+            "provider": provider,
+            "model": model,
+            "latency": round(latency, 3),
+            "usage": {
+                "prompt_tokens": getattr(usage, 'prompt_tokens', None),
+                "completion_tokens": getattr(usage, 'completion_tokens', None),
+            } if usage is not None else None,
+            "prompt": prompt,
+            "content": content,
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+            self.recorded += 1
+
+    def take(self, prompt):
+        """Next recording for this prompt, or None. The caller waits delay(record) (see AIService._call_steps)."""
+        key = prompt_key(prompt)
+        with self._lock:
+            recordings = self._recordings.get(key)
+            if not recordings:
+                self.misses += 1
+                return None
+            record = recordings[min(self._served[key], len(recordings) - 1)]
+            self._served[key] += 1
+            self.hits += 1
+        return record
+
+    def delay(self, record):
+        if self.latency == "recorded":
+            return record.get("latency") or 0
+        return float(self.latency)
+
+    @staticmethod
+    def usage(record):
+        return SimpleNamespace(**record["usage"]) if record.get("usage") else None
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "file": self.path,
+                "recordings": len(self),
+                "recorded": self.recorded,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,166 @@
+"""
+Persistent LLM response cache consulted by AIService.call_api before any network call.
+
+Entries are keyed by sha256(model, temperature, prompt), so rerunning an unchanged folder
+(or resuming before the first stash) reuses the answers that were already paid for, while
+any change to the prompt, history context or model misses. Stored in SQLite next to
+cfg.json, capped by entry count and size with least-recently-used eviction, and entries
+older than the TTL are dropped. cfg.json:
+
+    "response_cache": true,
+    "response_cache_file": "llm_cache.sqlite",
+    "response_cache_max_entries": 100000,
+    "response_cache_max_mb": 512,
+    "response_cache_ttl_hours": 168       (0 = never expire)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def cache_key(model, temperature, prompt):
+    digest = hashlib.sha256()
+    digest.update(f"{model}\0{temperature}\0".encode('utf-8'))
+    digest.update(prompt.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path, max_entries=100000, max_bytes=512 * 1024 * 1024, ttl_seconds=7 * 24 * 3600, clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT,"
+            " content TEXT NOT NULL,"
+            " usage TEXT,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL"
+            ")"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+        with self._lock:
+            self._purge_expired()
+            self._count, self._bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+
+    @classmethod
+    def from_config(cls, config, config_dir):
+        if not config.get("response_cache", True):
+            return None
+        path = config.get("response_cache_file") or "llm_cache.sqlite"
+        if not os.path.isabs(path):
+            path = os.path.join(config_dir, path)
+        return cls(
+            path,
+            max_entries=int(config.get("response_cache_max_entries", 100000)),
+            max_bytes=int(float(config.get("response_cache_max_mb", 512)) * 1024 * 1024),
+            ttl_seconds=float(config.get("response_cache_ttl_hours", 168)) * 3600,
+        )
+
+    def _purge_expired(self):
+        if self.ttl_seconds > 0:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (self._clock() - self.ttl_seconds,))
+            self._conn.commit()
+
+    def get(self, key):
+        """Cached (content, usage dict) for a key, or None."""
+        now = self._clock()
+        with self._lock:
+            if self._conn is None:
+                return None  # closed by a config reload while a request still held it
+            row = self._conn.execute("SELECT content, usage, size, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl_seconds > 0 and row[3] < now - self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self._count -= 1
+                self._bytes -= row[2]
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return row[0], json.loads(row[1]) if row[1] else None
+
+    def put(self, key, model, content, usage=None):
+        size = len(content.encode('utf-8'))
+        now = self._clock()
+        usage_json = json.dumps(usage) if usage else None
+        with self._lock:
+            if self._conn is None:
+                return
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, content, usage, size, created, last_used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, content, usage_json, size, now, now),
+            )
+            if old is None:
+                self._count += 1
+            else:
+                self._bytes -= old[0]
+            self._bytes += size
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Drop least recently used entries until both caps hold
+        while self._count > self.max_entries or (self._bytes > self.max_bytes and self._count > 1):
+            over = max(1, self._count - self.max_entries)
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_used LIMIT ?", (max(over, 16) if self._bytes > self.max_bytes else over,)
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._count <= self.max_entries and self._bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count -= 1
+                self._bytes -= size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._count, self._bytes = 0, 0
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._count,
+                "size_mb": round(self._bytes / (1024 * 1024), 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
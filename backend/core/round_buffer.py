@@ -0,0 +1,140 @@
+# Imported lazily from ReviewEngine._run_task (numpy/pandas must not load at app start)
+import numpy as np
+import pandas as pd
+
+
+def _clean_text(value):
+    """str(x or '').strip() with NaN treated as empty."""
+    if value != value:
+        return ''
+    return str(value or '').strip()
+
+
+def _object_array(values):
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
+
+
+def _text_column(values):
+    """Vectorized _clean_text over a whole column."""
+    return pd.Series(values, dtype=object).fillna('').astype(str).str.strip().to_numpy(dtype=object)
+
+
+class RoundBuffer:
+    """
+    Columnar output buffer for one review round.
+    Holds the round's glossary as one object array per column. Batch results are written
+    into their rows as they arrive; Keep/Modify/Delete/Category decisions are computed with
+    vectorized comparisons over those rows instead of row-by-row pandas access.
+    Row positions are fixed for the whole run: rows deleted in a round are only masked out
+    in `keep`, so the buffer of the next round can be filled batch by batch via carry_over().
+    """
+
+    def __init__(self, round_df):
+        self.columns = list(round_df.columns)
+        self.data = {col: round_df[col].to_numpy(dtype=object, copy=True) for col in self.columns}
+        self.keep = np.ones(len(round_df), dtype=bool)
+        # Normalized comparison columns, computed once per round over the whole glossary
+        self.current = _text_column(self.data['dst'])
+        if 'info' in self.data:
+            self.original_cat = _text_column(self.data['info'])
+        else:
+            self.original_cat = np.full(len(round_df), '', dtype=object)
+
+    def __len__(self):
+        return len(self.keep)
+
+    def next_round(self):
+        """Open the following round's buffer from this buffer's current state."""
+        nxt = RoundBuffer.__new__(RoundBuffer)
+        nxt.columns = list(self.columns)
+        nxt.data = {col: arr.copy() for col, arr in self.data.items()}
+        nxt.keep = self.keep.copy()
+        nxt.current = self.current.copy()
+        nxt.original_cat = self.original_cat.copy()
+        return nxt
+
+    def carry_over(self, prev, rows):
+        """Refresh `rows` from the previous round's buffer once their batch has finished that round."""
+        for col in prev.columns:
+            if col not in self.data:
+                self.columns.append(col)
+                self.data[col] = np.full(len(self.keep), '', dtype=object)
+            self.data[col][rows] = prev.data[col][rows]
+        self.keep[rows] = prev.keep[rows]
+        self.current[rows] = prev.current[rows]
+        self.original_cat[rows] = prev.original_cat[rows]
+
+    def active_rows(self, rows):
+        """Positions within the `rows` slice that have not been deleted."""
+        return np.flatnonzero(self.keep[rows]) + rows.start
+
+    def frame(self, rows):
+        """DataFrame of the given rows, used as the batch sent to the processor."""
+        return pd.DataFrame({col: self.data[col][rows] for col in self.columns}, columns=self.columns)
+
+    def apply(self, round_num, rows, ai_results):
+        """
+        Apply one batch of AI results to `rows` (a slice or an array of positions, in batch order).
+        Returns the modification log entries for the batch (Keep rows are not logged).
+        """
+        n = len(ai_results)
+
+        should_delete = np.fromiter((bool(r.get('should_delete')) for r in ai_results), dtype=bool, count=n)
+        recommended = _object_array([_clean_text(r.get('recommended_translation', '')) for r in ai_results])
+        suggested_cat = _object_array([_clean_text(r.get('suggested_category', '')) for r in ai_results])
+
+        current = self.current[rows]
+        original_cat = self.original_cat[rows]
+
+        translation_changed = ~should_delete & (recommended != '') & (recommended != current)
+        category_changed = ~should_delete & (suggested_cat != '') & (suggested_cat != original_cat)
+        logged = should_delete | translation_changed | category_changed
+
+        log_entries = []
+        if logged.any():
+            src = self.data['src'][rows]
+            dst = self.data['dst'][rows]
+            for j in np.flatnonzero(logged):
+                ai_result = ai_results[j]
+                if should_delete[j]:
+                    action, new_value = 'Delete', '(Deleted)'
+                elif translation_changed[j]:
+                    action, new_value = 'Modify', recommended[j]
+                else:
+                    action, new_value = 'Category', current[j]  # translation unchanged
+                log_entries.append({
+                    'round': round_num,
+                    'term': src[j],
+                    'original': dst[j],
+                    'new': new_value,
+                    'action': action,
+                    'reason': ai_result.get('deletion_reason', ''),
+                    'justification': ai_result.get('justification', ''),
+                    'emoji': ai_result.get('judgment_emoji', ''),
+                    'original_category': original_cat[j],
+                    'suggested_category': suggested_cat[j],
+                })
+
+        # Everything is computed; now write the batch into the buffer
+        if translation_changed.any():
+            self.data['dst'][rows] = np.where(translation_changed, recommended, self.data['dst'][rows])
+            self.current[rows] = np.where(translation_changed, recommended, current)
+        if category_changed.any():
+            if 'info' not in self.data:
+                self.columns.append('info')
+                self.data['info'] = np.full(len(self.keep), '', dtype=object)
+            # Apply category update to final glossary for all non-deleted terms
+            self.data['info'][rows] = np.where(category_changed, suggested_cat, self.data['info'][rows])
+            self.original_cat[rows] = np.where(category_changed, suggested_cat, original_cat)
+        self.keep[rows] = ~should_delete
+        return log_entries
+
+    def iter_rows(self):
+        """Kept rows as tuples in column order, for streaming writers (see excel_io)."""
+        return zip(*(self.data[col][self.keep] for col in self.columns))
+
+    def to_frame(self):
+        """Build the next round's glossary from the kept rows."""
+        return pd.DataFrame({col: self.data[col][self.keep] for col in self.columns}, columns=self.columns)
@@ -0,0 +1,62 @@
+"""
+Incremental parser for a streamed JSON array.
+
+With "stream_responses": true the model's answer arrives in small text deltas. feed()
+takes each delta and returns the array elements that became complete with it, so a
+batch's verdicts are available one by one while the rest is still being generated.
+Anything before the opening '[' (```json fences, a preamble) and after the closing ']'
+is ignored; an element that does not decode is skipped but still takes its index.
+"""
+import json
+
+
+class JsonArrayStream:
+    def __init__(self):
+        self.depth = 0  # 0 before '[', 1 between elements, > 1 inside one
+        self.in_string = False
+        self.escape = False
+        self.done = False
+        self.count = 0  # elements seen so far, i.e. the index of the next one
+        self._buf = []
+
+    def feed(self, text):
+        """Returns [(index, element), ...] for the elements completed by `text`."""
+        items = []
+        for ch in text:
+            if self.done:
+                break
+            if self.depth == 0:
+                if ch == '[':
+                    self.depth = 1
+                continue
+            if self.depth > 1 or ch in '{[':
+                self._buf.append(ch)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                continue
+            if ch == '"':
+                self.in_string = True
+            elif ch in '{[':
+                self.depth += 1
+            elif ch in '}]':
+                self.depth -= 1
+                if self.depth == 1:
+                    self._element(items)
+                elif self.depth == 0:
+                    self.done = True
+        return items
+
+    def _element(self, items):
+        text = "".join(self._buf)
+        self._buf = []
+        index = self.count
+        self.count += 1
+        try:
+            items.append((index, json.loads(text)))
+        except ValueError:
+            pass
@@ -0,0 +1,94 @@
+import json
+import sqlite3
+import threading
+
+
+class TermHistoryStore:
+    """
+    SQLite-backed term history keyed by (term, round).
+    Results are written as each batch is recorded (one small transaction per batch) and read
+    back with indexed lookups, so nothing has to be rewritten after a round or fully reloaded
+    on resume.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS term_history ("
+            " term TEXT NOT NULL,"
+            " round INTEGER NOT NULL,"
+            " result TEXT NOT NULL,"
+            " PRIMARY KEY (term, round)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def add_many(self, round_num, items):
+        """Store (term, result) pairs for one round. Re-recording a round replaces its entries."""
+        rows = [(term, round_num, json.dumps(result, ensure_ascii=False)) for term, result in items]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO term_history (term, round, result) VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+
+    def get(self, term, default=None):
+        """All results for a term, oldest round first."""
+        with self._lock:
+            cur = self._conn.execute("SELECT result FROM term_history WHERE term = ? ORDER BY round", (term,))
+            results = [json.loads(r[0]) for r in cur.fetchall()]
+        if not results:
+            return default
+        return results
+
+    def get_many(self, terms):
+        """{term: [results...]} for the given terms in a single query (terms without history are omitted)."""
+        terms = list(dict.fromkeys(terms))
+        history = {}
+        if not terms:
+            return history
+        placeholders = ",".join("?" * len(terms))
+        with self._lock:
+            cur = self._conn.execute(
+                f"SELECT term, result FROM term_history WHERE term IN ({placeholders}) ORDER BY term, round",
+                terms,
+            )
+            for term, result in cur.fetchall():
+                history.setdefault(term, []).append(json.loads(result))
+        return history
+
+    def __contains__(self, term):
+        with self._lock:
+            cur = self._conn.execute("SELECT 1 FROM term_history WHERE term = ? LIMIT 1", (term,))
+            return cur.fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(DISTINCT term) FROM term_history").fetchone()[0]
+
+    def discard_after(self, round_num):
+        """Drop entries of rounds > round_num (rounds that will be re-run or replayed)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM term_history WHERE round > ?", (round_num,))
+            self._conn.commit()
+
+    def import_json(self, path, through_round):
+        """One-off migration of a legacy term_history.json ({term: [results...]})."""
+        with open(path, 'r', encoding='utf-8') as f:
+            legacy = json.load(f)
+        rows = []
+        for term, results in legacy.items():
+            for i, result in enumerate(results):
+                round_num = result.get('round', through_round - len(results) + 1 + i)
+                if round_num <= through_round:
+                    rows.append((term, round_num, json.dumps(result, ensure_ascii=False)))
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO term_history (term, round, result) VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+        return len(legacy)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,118 @@
+"""
+Opt-in span tracer writing Chrome/Perfetto trace-event JSON (open log/trace.json in
+chrome://tracing or ui.perfetto.dev).
+
+Enabled per task with "trace": true in cfg.json. The engine creates a Tracer and makes it
+current in every thread that works for the task (tracing.use()); shared code such as
+AIService.call_api records into tracing.current(), which is a no-op tracer outside a
+traced task. Each thread is its own track, named after the thread (ThreadPoolExecutor
+workers show up as e.g. "ThreadPoolExecutor-0_3"), so idle workers are visible as gaps.
+In the async engine every asyncio task gets its own track instead, since all of them
+share the event loop thread. The current tracer is a context variable, so it is per
+thread and per asyncio task.
+"""
+import asyncio
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+
+_current = contextvars.ContextVar("tracer", default=None)
+
+
+class Tracer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._threads = {}
+        self._origin = time.perf_counter()
+        self.pid = os.getpid()
+
+    def _now_us(self):
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def _tid(self):
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None  # no running event loop in this thread
+        if task is not None:
+            tid = id(task)
+            if tid not in self._threads:
+                self._threads[tid] = f"{threading.current_thread().name} {task.get_name()}"
+            return tid
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        return tid
+
+    @contextlib.contextmanager
+    def span(self, name, cat="engine", **args):
+        start = self._now_us()
+        try:
+            yield
+        finally:
+            end = self._now_us()
+            event = {"name": name, "cat": cat, "ph": "X", "ts": round(start, 1), "dur": round(end - start, 1), "pid": self.pid}
+            if args:
+                event["args"] = args
+            with self._lock:
+                event["tid"] = self._tid()
+                self._events.append(event)
+
+    def instant(self, name, cat="engine", **args):
+        event = {"name": name, "cat": cat, "ph": "i", "s": "t", "ts": round(self._now_us(), 1), "pid": self.pid}
+        if args:
+            event["args"] = args
+        with self._lock:
+            event["tid"] = self._tid()
+            self._events.append(event)
+
+    def save(self, path):
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return len(events)
+
+
+class _NullTracer:
+    @contextlib.contextmanager
+    def span(self, name, cat="engine", **args):
+        yield
+
+    def instant(self, name, cat="engine", **args):
+        pass
+
+
+NULL_TRACER = _NullTracer()
+
+
+def current():
+    return _current.get() or NULL_TRACER
+
+
+def activate(tracer):
+    """Make `tracer` current in this thread (or asyncio task); returns the previous one for restoring."""
+    previous = _current.get()
+    _current.set(tracer)
+    return previous
+
+
+@contextlib.contextmanager
+def use(tracer):
+    """Make `tracer` current in this thread (or asyncio task) for the duration of the block."""
+    previous = activate(tracer)
+    try:
+        yield tracer
+    finally:
+        activate(previous)
@@ -1,13 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from werkzeug.utils import secure_filename
-from backend.core.engine import ReviewEngine
+from backend.core.jobs import JobManager
+from backend.core import prometheus
 from backend.config_manager import load_config, save_config
 from backend.version import __version__
 from backend.updater import check_for_updates, perform_update
 import os
 
 api_blueprint = Blueprint('api', __name__)
-engine = ReviewEngine()
+job_manager = JobManager()
 
 @api_blueprint.route('/config', methods=['GET', 'POST'])
 def config():
@@ -17,7 +18,7 @@ def config():
         new_config = request.json
         if save_config(new_config):
             # Force reload of AI service config to apply new keys immediately
-            engine.ai_service.reload_config()
+            job_manager.ai_service.reload_config()
             return jsonify({"status": "success"})
         return jsonify({"status": "error"}), 500
 
@@ -50,7 +51,7 @@ def test_prompt():
         return jsonify({"error": "Missing term"}), 400
         
     try:
-        result = engine.processor.test_single_term(
+        result = job_manager.processor.test_single_term(
             term, 
             translation, 
             context, 
@@ -87,62 +88,24 @@ def test_connection():
         if not providers:
              return jsonify({"status": "error", "message": "No API providers configured"})
 
-        import openai
-        
-        results = []
-        valid_count = 0
-        
-        # Load configurable timeout
+        # Checked concurrently; verdicts are cached and shared with the engine's pre-flight check
+        validator = job_manager.ai_service.key_validator
         connect_timeout = float(load_config().get("connect_timeout", 120.0))
-        
+
+        checks = []
         for idx, p in enumerate(providers):
             # Skip if explicitly disabled
             if not p.get("enabled", True):
                 continue
+            checks.append((f"#{idx+1} {p.get('model', '').strip()}", validator.submit(p, connect_timeout)))
 
-            key = p.get("api_key", "").strip()
-            base_url = p.get("base_url", "").strip()
-            model = p.get("model", "").strip()
-            
-            masked_key = f"{key[:6]}..." if len(key) > 6 else (key or "None")
-            provider_name = f"#{idx+1} {model}"
-            
-            try:
-                kwargs_check = {
-                    "api_key": key if key else "dummy_key",
-                    "timeout": connect_timeout,
-                    "default_headers": {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"}
-                }
-                if base_url:
-                    kwargs_check["base_url"] = base_url
-                    
-                client = openai.OpenAI(**kwargs_check)
-                
-                # Dynamic prompt to avoid cache
-                import time
-                import random
-                unique_prompt = f"Hi from review tool check {int(time.time())} {random.randint(1000, 9999)}"
-                
-                client.chat.completions.create(
-                    model=model,
-                    messages=[{"role": "user", "content": unique_prompt}],
-                    max_tokens=5,
-                    timeout=connect_timeout
-                )
-                results.append({"key": provider_name, "status": "valid", "msg": "OK"})
+        results = []
+        valid_count = 0
+        for provider_name, future in checks:
+            ok, msg, cached = future.result()
+            results.append({"key": provider_name, "status": "valid" if ok else "invalid", "msg": msg, "cached": cached})
+            if ok:
                 valid_count += 1
-            except openai.APITimeoutError:
-                 results.append({"key": provider_name, "status": "invalid", "msg": f"Timeout ({int(connect_timeout)}s) - Server did not respond in time."})
-            except openai.APIStatusError as e:
-                 # Catching 4xx/5xx errors (AuthenticationError is a subclass of this)
-                 error_code = e.status_code
-                 try:
-                     error_body = e.body.get('message', str(e.body)) if isinstance(e.body, dict) else str(e.body)
-                 except:
-                     error_body = str(e)
-                 results.append({"key": provider_name, "status": "invalid", "msg": f"HTTP {error_code}: {error_body}"})
-            except Exception as e:
-                results.append({"key": provider_name, "status": "invalid", "msg": f"Error: {str(e)}"})
 
         if valid_count == len(providers):
             msg = "✅ All Providers Operational!"
@@ -322,7 +285,8 @@ def get_result_content():
             return jsonify(data)
         else:
             import pandas as pd
-            df = pd.read_excel(filepath)
+            from backend.core import excel_io
+            df = excel_io.read_excel(filepath, cache_dir=os.path.join(directory, 'log', 'cache'))
             # Replace NaN with None (null in JSON)
             df = df.where(pd.notnull(df), None)
             return jsonify(df.to_dict(orient='records'))
@@ -344,21 +308,49 @@ def start_task():
     if not directory:
         return jsonify({"status": "error", "message": "No directory specified and no saved task config found."})
 
-    success, msg = engine.start_task(
+    success, msg, job_id = job_manager.submit(
         directory, context, rounds,
         glossary_file=glossary_file,
         reference_file=reference_file,
     )
-    return jsonify({"status": "success" if success else "error", "message": msg})
+    return jsonify({"status": "success" if success else "error", "message": msg, "job_id": job_id})
 
 @api_blueprint.route('/control/stop', methods=['POST'])
 def stop_task():
-    success, msg = engine.stop_task()
+    data = request.get_json(silent=True) or {}
+    job_id = data.get('job_id')
+    if not job_id:
+        return jsonify({"status": "error", "message": "job_id is required"}), 400
+    success, msg = job_manager.stop(job_id)
     return jsonify({"status": "success" if success else "error", "message": msg})
 
 @api_blueprint.route('/status', methods=['GET'])
 def get_status():
-    return jsonify(engine.get_status())
+    job_id = request.args.get('job_id')
+    if not job_id:
+        # No job of this client: only the shared service state, never another client's job
+        return jsonify(job_manager.idle_status())
+    status = job_manager.status(job_id)
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(status)
+
+@api_blueprint.route('/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify(job_manager.list_jobs())
+
+@api_blueprint.route('/metrics', methods=['GET'])
+def metrics():
+    # Scrape-time gauges; counters and histograms are updated where the work happens
+    states = {}
+    for job in job_manager.list_jobs():
+        states[job["state"]] = states.get(job["state"], 0) + 1
+    for state in ("queued", "running", "completed", "stopped", "failed", "cancelled"):
+        prometheus.JOBS.set(states.get(state, 0), state=state)
+    snapshot = job_manager.ai_service.concurrency.snapshot()
+    prometheus.CONCURRENCY_LIMIT.set(snapshot["limit"])
+    prometheus.CONCURRENCY_IN_FLIGHT.set(snapshot["in_flight"])
+    return Response(prometheus.render(), mimetype='text/plain; version=0.0.4')
 
 @api_blueprint.route('/version', methods=['GET'])
 def get_version():
@@ -0,0 +1,217 @@
+"""
+Local OpenAI-compatible stub for benchmarks.
+
+Answers POST .../chat/completions like a review model would: the term list embedded in the
+batch prompt is parsed and every term gets a deterministic verdict (about 10% deleted, 10%
+re-translated, 20% re-categorized). Latency, jitter, output size and a 429 rate are
+configurable. "stream": true requests are answered as server-sent events spread over the
+latency; with stall_ratio, that share of streams stops sending halfway through. Standalone:
+
+    python -m benchmarks.mock_openai --port 8001 --latency 0.5
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TERMS_START = "现在，请处理以下术语列表：\n"
+TERMS_END = "\n\n输出格式"
+
+
+def _extract_terms(prompt):
+    start = prompt.find(TERMS_START)
+    end = prompt.find(TERMS_END, start)
+    if start < 0 or end < 0:
+        return None
+    try:
+        return json.loads(prompt[start + len(TERMS_START):end])
+    except ValueError:
+        return None
+
+
+def _verdict(item, padding):
+    term = item.get("korean_term", "")
+    translation = item.get("chinese_translation", "")
+    bucket = int(hashlib.md5(term.encode("utf-8")).hexdigest()[:4], 16) % 10
+    should_delete = bucket == 0
+    recommended = translation + "改" if bucket == 1 and not translation.endswith("改") else translation
+    category = "物品/奇幻与科幻道具" if bucket in (2, 3) else item.get("current_category", "")
+    return {
+        "korean_term": term,
+        "original_translation": translation,
+        "recommended_translation": recommended,
+        "should_delete": should_delete,
+        "deletion_reason": "通用词" if should_delete else None,
+        "judgment_emoji": "🗑️" if should_delete else "✅",
+        "suggested_category": category,
+        "justification": "基准测试。" + "理" * padding,
+    }
+
+
+class MockOpenAIServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.05, jitter=0.0, tokens_per_term=60, rate_limit_ratio=0.0, seed=0,
+                 stall_ratio=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_term = tokens_per_term
+        self.rate_limit_ratio = rate_limit_ratio
+        self.stall_ratio = stall_ratio
+        self.stalled = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.rate_limited = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": "not found"}})
+                    return
+                if request.get("stream"):
+                    server.stream(self, request)
+                    return
+                status, payload = server.respond(request)
+                self._send(status, payload)
+
+        return Handler
+
+    def respond(self, request, sleep=True):
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            limited = self._random.random() < self.rate_limit_ratio
+            if limited:
+                self.rate_limited += 1
+        if sleep:
+            time.sleep(delay)
+        if limited:
+            return 429, {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_error"}}
+
+        prompt = "".join(m.get("content", "") for m in request.get("messages", []))
+        items = _extract_terms(prompt)
+        if items is None:
+            content = "ok"  # pre-flight key check
+        else:
+            content = json.dumps([_verdict(item, self.tokens_per_term) for item in items], ensure_ascii=False)
+        return 200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            # Rough CJK estimate: one token per character
+            "usage": {"prompt_tokens": len(prompt), "completion_tokens": len(content), "total_tokens": len(prompt) + len(content)},
+        }
+
+    def stream(self, handler, request):
+        """Answer as server-sent events: the content in small chunks spread over the latency."""
+        with self._lock:
+            stall = self._random.random() < self.stall_ratio
+            if stall:
+                self.stalled += 1
+        status, payload = self.respond(request, sleep=False)
+        if status != 200:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            handler.send_response(status)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        content = payload["choices"][0]["message"]["content"]
+        pieces = [content[i:i + 40] for i in range(0, len(content), 40)] or [""]
+        pause = max(0.0, self.latency) / (len(pieces) + 1)
+
+        def event(delta, finish=None, usage=None):
+            chunk = {"id": payload["id"], "object": "chat.completion.chunk", "created": payload["created"], "model": payload["model"],
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish}] if usage is None else []}
+            if usage is not None:
+                chunk["usage"] = usage
+            handler.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            handler.wfile.flush()
+
+        try:
+            time.sleep(pause)
+            event({"role": "assistant", "content": ""})
+            for i, piece in enumerate(pieces):
+                if stall and i == len(pieces) // 2:
+                    time.sleep(3600)  # the client is expected to give up first
+                time.sleep(pause)
+                event({"content": piece})
+            event({}, finish="stop")
+            if (request.get("stream_options") or {}).get("include_usage"):
+                event({}, usage=payload["usage"])
+            handler.wfile.write(b"data: [DONE]\n\n")
+            handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client aborted the stream
+        handler.close_connection = True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.mock_openai", description="OpenAI-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per request (default: 0.05)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds added to the latency")
+    parser.add_argument("--tokens-per-term", type=int, default=60, help="Padding characters per verdict")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--stall-ratio", type=float, default=0.0, help="Share of streamed responses that stop halfway")
+    args = parser.parse_args(argv)
+    server = MockOpenAIServer(args.host, args.port, args.latency, args.jitter, args.tokens_per_term, args.rate_limit_ratio,
+                              stall_ratio=args.stall_ratio)
+    print(f"Mock OpenAI server on {server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+"""
+End-to-end throughput benchmark.
+
+Starts the local OpenAI-compatible stub (benchmarks/mock_openai.py), generates a synthetic
+glossary and novel per size and runs ReviewEngine on it exactly like a real review (HTTP
+client, AIService retries, processor prompts, round pipeline, Excel output). Each size runs
+in its own subprocess so peak RSS is per size.
+
+    python -m benchmarks.run_benchmark --sizes 1k,10k,100k --rounds 2 --latency 0.2
+    python -m benchmarks.run_benchmark --sizes 10k --output new.json --compare baseline.json
+
+Reported per size: terms/sec (pipeline phase), wall time per engine phase (from the trace
+spans), request latency, token counts and peak RSS. With --compare, exits 1 when terms/sec
+dropped or peak RSS grew by more than --tolerance against the baseline.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Spans recorded on the engine's task thread (see ReviewEngine._run_task)
+PHASES = [
+    "preflight validation", "load data", "load stash", "pipeline", "finalize round",
+    "save final glossary", "export modification log",
+]
+
+SYLLABLES = "가나다라마바사아자차카타파하거너더러머버서어저처커터퍼허고노도로모보소오조초코토포호"
+CATEGORIES = ["男性角色", "女性角色", "地点", "物品", "组织机构", ""]
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    if text.endswith("k"):
+        return int(float(text[:-1]) * 1000)
+    return int(text)
+
+
+def generate_dataset(directory, size, reference_format="marked", seed=42):
+    """Write glossary.xlsx and novel.txt with `size` unique terms."""
+    from backend.core import excel_io
+    rng = random.Random(seed)
+    terms = []
+    seen = set()
+    while len(terms) < size:
+        term = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5)))
+        if term not in seen:
+            seen.add(term)
+            terms.append(term)
+
+    rows = ((term, f"译{i}", rng.choice([1, 1, 2, 3, 8, 25]), rng.choice(CATEGORIES)) for i, term in enumerate(terms))
+    excel_io.write_rows(os.path.join(directory, "glossary.xlsx"), ["原文", "译文", "出现次数", "info"], rows)
+
+    with open(os.path.join(directory, "novel.txt"), "w", encoding="utf-8") as f:
+        for term in terms:
+            sentence = f"그는 {term}에 대해 이야기했다. 모두가 {term}을(를) 기억했다."
+            if reference_format == "marked":
+                f.write(f"原文：{term}\n※{sentence}\n\n")
+            else:
+                f.write(sentence + "\n")
+    return terms
+
+
+def write_config(path, base_url, args):
+    from backend.config_manager import DEFAULT_CONFIG
+    config = dict(DEFAULT_CONFIG)
+    config.update({
+        "api_key": "benchmark",
+        "base_url": base_url,
+        "model": "mock",
+        "BATCH_SIZE": args.batch_size,
+        "MAX_WORKERS": args.workers,
+        "MAX_CONCURRENCY": args.max_concurrency or args.workers * 4,
+        "engine_mode": args.engine_mode,
+        "request_timeout": 60.0,
+        "connect_timeout": 10.0,
+        "trace": True,
+        "response_cache": False,  # measure the request path, not cache hits
+    })
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_single(size, base_url, args):
+    """Run one benchmark in this process and return its result dict."""
+    from backend import config_manager
+
+    workdir = tempfile.mkdtemp(prefix=f"glossary-bench-{size}-")
+    try:
+        config_manager.CONFIG_PATH = os.path.join(workdir, "cfg.json")
+        write_config(config_manager.CONFIG_PATH, base_url, args)
+        data_dir = os.path.join(workdir, "novel")
+        os.makedirs(data_dir)
+        started = time.perf_counter()
+        generate_dataset(data_dir, size, args.reference_format)
+        generate_seconds = time.perf_counter() - started
+
+        from backend.core.engine import ReviewEngine
+        engine = ReviewEngine()
+        engine.is_running = True
+        started = time.perf_counter()
+        engine._run_task(data_dir, "基准测试背景", args.rounds)
+        wall = time.perf_counter() - started
+
+        phases = {}
+        for event in engine.tracer._events:
+            if event["ph"] == "X" and event["name"] in PHASES:
+                phases[event["name"]] = phases.get(event["name"], 0.0) + event["dur"] / 1e6
+        metrics = engine.metrics.snapshot()
+        pipeline = phases.get("pipeline") or wall
+        return {
+            "size": size,
+            "rounds": args.rounds,
+            "engine_mode": args.engine_mode,
+            "ok": engine.error is None,
+            "error": engine.error,
+            "wall_seconds": round(wall, 3),
+            "generate_seconds": round(generate_seconds, 3),
+            "terms_processed": metrics["terms_done"],
+            "terms_per_sec": round(metrics["terms_done"] / pipeline, 1) if pipeline else None,
+            "phases_seconds": {name: round(v, 3) for name, v in phases.items()},
+            "requests": metrics["requests"],
+            "latency_p50_ms": metrics["latency_p50_ms"],
+            "latency_p95_ms": metrics["latency_p95_ms"],
+            "prompt_tokens": metrics["prompt_tokens"],
+            "completion_tokens": metrics["completion_tokens"],
+            "peak_rss_mb": _peak_rss_mb(),
+        }
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            print(f"Kept benchmark files in {workdir}", file=sys.stderr)
+
+
+def _child_argv(args, size, base_url):
+    argv = [sys.executable, "-m", "benchmarks.run_benchmark", "--child", str(size), "--base-url", base_url,
+            "--rounds", str(args.rounds), "--batch-size", str(args.batch_size), "--workers", str(args.workers),
+            "--reference-format", args.reference_format, "--engine-mode", args.engine_mode]
+    if args.max_concurrency:
+        argv += ["--max-concurrency", str(args.max_concurrency)]
+    if args.keep:
+        argv.append("--keep")
+    return argv
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages for sizes present in both runs."""
+    previous = {r["size"]: r for r in baseline.get("results", [])}
+    problems = []
+    for result in results:
+        old = previous.get(result["size"])
+        if not old:
+            continue
+        if old.get("terms_per_sec") and result.get("terms_per_sec") is not None:
+            if result["terms_per_sec"] < old["terms_per_sec"] * (1 - tolerance):
+                problems.append(f"{result['size']} terms: {result['terms_per_sec']} terms/sec (baseline {old['terms_per_sec']})")
+        if old.get("peak_rss_mb") and result.get("peak_rss_mb") is not None:
+            if result["peak_rss_mb"] > old["peak_rss_mb"] * (1 + tolerance):
+                problems.append(f"{result['size']} terms: peak RSS {result['peak_rss_mb']} MB (baseline {old['peak_rss_mb']} MB)")
+    return problems
+
+
+def print_table(results):
+    print(f"{'terms':>8} {'rounds':>6} {'wall s':>8} {'terms/s':>9} {'p95 ms':>7} {'RSS MB':>7}  phases (s)")
+    for r in results:
+        phases = ", ".join(f"{k} {v}" for k, v in r["phases_seconds"].items())
+        status = "" if r["ok"] else f"  FAILED: {r['error']}"
+        print(f"{r['size']:>8} {r['rounds']:>6} {r['wall_seconds']:>8} {r['terms_per_sec']!s:>9} "
+              f"{r['latency_p95_ms']!s:>7} {r['peak_rss_mb']!s:>7}  {phases}{status}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run_benchmark", description="End-to-end ReviewEngine benchmark")
+    parser.add_argument("--sizes", default="1k,10k", help="Comma-separated glossary sizes (default: 1k,10k)")
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=16, help="MAX_WORKERS for the run (default: 16)")
+    parser.add_argument("--max-concurrency", type=int, help="MAX_CONCURRENCY (default: 4 x workers)")
+    parser.add_argument("--engine-mode", choices=["threads", "async"], default="threads", help="engine_mode for the run")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock request latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--tokens-per-term", type=int, default=60)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--reference-format", choices=["marked", "raw"], default="marked",
+                        help="novel.txt with 原文： blocks, or raw text (context search per term)")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier --output")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed regression (default: 0.15)")
+    parser.add_argument("--keep", action="store_true", help="Keep generated files")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    os.environ["NO_PROXY"] = ",".join(filter(None, [os.environ.get("NO_PROXY"), "127.0.0.1", "localhost"]))
+
+    if args.child is not None:
+        print(json.dumps(run_single(args.child, args.base_url, args), ensure_ascii=False))
+        return 0
+
+    from benchmarks.mock_openai import MockOpenAIServer
+    server = MockOpenAIServer(latency=args.latency, jitter=args.jitter, tokens_per_term=args.tokens_per_term,
+                              rate_limit_ratio=args.rate_limit_ratio).start()
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = []
+    try:
+        for size in [parse_size(s) for s in args.sizes.split(",") if s.strip()]:
+            print(f"Running {size} terms x {args.rounds} rounds...", file=sys.stderr)
+            proc = subprocess.run(_child_argv(args, size, server.base_url), cwd=root, capture_output=True, text=True)
+            if proc.returncode != 0 or not proc.stdout.strip():
+                print(proc.stderr, file=sys.stderr)
+                return 1
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    finally:
+        server.stop()
+
+    print_table(results)
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "settings": {k: getattr(args, k) for k in ("rounds", "batch_size", "workers", "max_concurrency", "latency",
+                                                   "jitter", "tokens_per_term", "rate_limit_ratio", "reference_format",
+                                                   "engine_mode")},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if not all(r["ok"] for r in results):
+        return 1
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            problems = compare(results, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION: {problem}", file=sys.stderr)
+        if problems:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,6 +2,8 @@ import React, { useEffect, useState, useRef } from 'react';
 import { Pause, Terminal, CheckCircle2, Play, HelpCircle } from 'lucide-react';
 import api from '../api/client';
 
+const JOB_ID_KEY = 'dashboard_job_id';
+
 export default function Dashboard() {
     const [status, setStatus] = useState(null);
     const [logs, setLogs] = useState([]);
@@ -9,6 +11,14 @@ export default function Dashboard() {
     const logsContainerRef = useRef(null);
     const [autoScroll, setAutoScroll] = useState(true);
     const [rounds, setRounds] = useState(3);
+    // Job started from this window; other translators' jobs on the same server are not shown.
+    // Kept in sessionStorage so it survives switching tabs (which unmounts this page) and reloads.
+    const jobIdRef = useRef(sessionStorage.getItem(JOB_ID_KEY));
+    const setJobId = (jobId) => {
+        jobIdRef.current = jobId;
+        if (jobId) sessionStorage.setItem(JOB_ID_KEY, jobId);
+        else sessionStorage.removeItem(JOB_ID_KEY);
+    };
 
     useEffect(() => {
         const interval = setInterval(fetchStatus, 1000);
@@ -32,17 +42,23 @@ export default function Dashboard() {
 
     const fetchStatus = async () => {
         try {
-            const res = await api.get('/status');
+            const params = jobIdRef.current ? { job_id: jobIdRef.current } : {};
+            const res = await api.get('/status', { params });
             setStatus(res.data);
             setLogs(res.data.logs || []);
         } catch (err) {
+            if (err.response && err.response.status === 404) {
+                // Job no longer known to the server (e.g. restarted)
+                setJobId(null);
+            }
             console.error("Failed to fetch status", err);
         }
     };
 
     const handleStop = async () => {
+        if (!jobIdRef.current) return;
         try {
-            await api.post('/control/stop');
+            await api.post('/control/stop', { job_id: jobIdRef.current });
         } catch (err) {
             console.error("Failed to stop", err);
         }
@@ -53,6 +69,8 @@ export default function Dashboard() {
             const res = await api.post('/control/start', { rounds });
             if (res.data.status !== 'success') {
                 alert(res.data.message || "启动失败，请先在任务设置中保存配置");
+            } else {
+                setJobId(res.data.job_id);
             }
         } catch (err) {
             console.error("Failed to start", err);
@@ -62,7 +80,17 @@ export default function Dashboard() {
 
     if (!status) return <div className="p-8 text-center text-gray-500">正在连接引擎...</div>;
 
-    const { running, progress } = status;
+    const { progress } = status;
+    const metrics = status.metrics || {};
+    const cache = status.response_cache || {};
+    const formatEta = (seconds) => {
+        if (seconds === null || seconds === undefined) return '--';
+        const h = Math.floor(seconds / 3600);
+        const m = Math.floor((seconds % 3600) / 60);
+        return h > 0 ? `${h}小时${m}分` : `${m}分${seconds % 60}秒`;
+    };
+    // A queued job counts as running so it can be cancelled with the stop button
+    const running = status.running || status.state === 'queued';
 
     return (
         <div className="p-8 max-w-6xl mx-auto h-full flex flex-col">
@@ -115,8 +143,16 @@ export default function Dashboard() {
                         style={{ width: `${progress.percent}%` }}
                     />
                 </div>
-                <div className="mt-2 text-xs text-gray-500 text-right">
-                    已处理 {progress.current} / {progress.total} 条术语
+                <div className="mt-2 flex justify-between text-xs text-gray-500">
+                    <span>
+                        {running && metrics.terms_per_sec !== undefined && (
+                            <>
+                                {metrics.terms_per_sec} 条/秒 · {metrics.completion_tokens_per_sec} tokens/秒 · 本轮剩余 {formatEta(metrics.eta_round_seconds)} · 全部剩余 {formatEta(metrics.eta_total_seconds)}
+                                {cache.hit_rate !== null && cache.hit_rate !== undefined && ` · 缓存命中 ${Math.round(cache.hit_rate * 100)}%`}
+                            </>
+                        )}
+                    </span>
+                    <span>已处理 {progress.current} / {progress.total} 条术语</span>
                 </div>
             </div>
 
@@ -196,6 +196,27 @@ export default function SettingsPage() {
                                                     className={`w-full px-3 py-2 border rounded-md text-sm outline-none ${provider.enabled === false ? 'bg-gray-100 text-gray-400 border-gray-200' : 'bg-white border-gray-300 focus:ring-1 focus:ring-indigo-500'}`}
                                                 />
                                             </div>
+
+                                            {/* Per-key quotas (empty = unlimited) and token limits for batch packing (empty = default) */}
+                                            {[
+                                                ['rpm', '每分钟请求上限 (RPM)', '不限'],
+                                                ['tpm', '每分钟 Token 上限 (TPM)', '不限'],
+                                                ['context_window', '上下文窗口 (Tokens)', '65536'],
+                                                ['max_output_tokens', '最大输出 (Tokens)', '8192'],
+                                            ].map(([field, label, placeholder]) => (
+                                                <div key={field}>
+                                                    <label className="block text-xs font-medium text-gray-500 mb-1">{label}</label>
+                                                    <input
+                                                        type="number"
+                                                        min="0"
+                                                        value={provider[field] ?? ''}
+                                                        onChange={(e) => updateProvider(index, field, e.target.value === '' ? null : parseInt(e.target.value))}
+                                                        placeholder={placeholder}
+                                                        disabled={provider.enabled === false}
+                                                        className={`w-full px-3 py-2 border rounded-md text-sm outline-none ${provider.enabled === false ? 'bg-gray-100 text-gray-400 border-gray-200' : 'bg-white border-gray-300 focus:ring-1 focus:ring-indigo-500'}`}
+                                                    />
+                                                </div>
+                                            ))}
                                         </div>
                                     </div>
                                 </div>
@@ -242,7 +263,10 @@ export default function SettingsPage() {
                                 {testResults.map((res, idx) => (
                                     <div key={idx} className="flex flex-col text-xs py-2 border-b border-gray-100 last:border-0">
                                         <div className="flex justify-between items-center w-full">
-                                            <span className="font-mono text-gray-600 font-medium">{res.key}</span>
+                                            <span className="font-mono text-gray-600 font-medium">
+                                                {res.key}
+                                                {res.cached && <span className="ml-2 text-gray-400 font-normal">(缓存)</span>}
+                                            </span>
                                             {res.status === 'valid' ? (
                                                 <span className="text-green-600 font-medium flex items-center gap-1">✅ OK</span>
                                             ) : (
@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+import pytest
+
+from backend import config_manager
+
+# backend.routes builds the shared AIService at import time; keep its cfg.json and
+# llm_cache.sqlite out of the repository before any test module imports it
+config_manager.CONFIG_PATH = os.path.join(tempfile.mkdtemp(prefix="glossary-tests-"), "cfg.json")
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(tmp_path, monkeypatch):
+    """Every test gets its own cfg.json (defaults) and response cache under tmp_path."""
+    path = tmp_path / "cfg.json"
+    monkeypatch.setattr(config_manager, "CONFIG_PATH", str(path))
+    return path
+
+
+class FakeClock:
+    """Manually advanced stand-in for time.monotonic/time.time."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def make_service():
+    """make_service(*providers): an AIService routing to `providers`, without response cache or replay."""
+    from backend.core.ai_service import AIService
+
+    def make(*providers):
+        service = AIService()
+        service.response_cache = None
+        service.replay = None
+        service.valid_providers = list(providers)
+        return service
+    return make
@@ -51,3 +51,31 @@ def test_status(client):
     data = json.loads(rv.data)
     assert 'running' in data
     assert 'progress' in data
+    assert 'concurrency' in data
+    assert 'convergence' in data
+    assert 'metrics' in data
+    assert 'response_cache' in data
+
+def test_jobs(client):
+    rv = client.get('/api/jobs')
+    assert rv.status_code == 200
+    assert isinstance(json.loads(rv.data), list)
+
+    rv = client.get('/api/status?job_id=missing')
+    assert rv.status_code == 404
+
+def test_metrics(client):
+    rv = client.get('/api/metrics')
+    assert rv.status_code == 200
+    assert rv.mimetype == 'text/plain'
+    text = rv.data.decode()
+    assert '# TYPE glossary_api_request_duration_seconds histogram' in text
+    assert 'glossary_jobs{state="running"}' in text
+
+def test_stop_requires_job_id(client):
+    rv = client.post('/api/control/stop', json={})
+    assert rv.status_code == 400
+
+    rv = client.post('/api/control/stop', json={'job_id': 'missing'})
+    data = json.loads(rv.data)
+    assert data['status'] == 'error'
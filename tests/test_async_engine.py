@@ -0,0 +1,114 @@
+import asyncio
+import concurrent.futures
+import time
+from types import SimpleNamespace
+
+import openai
+
+from backend.core.async_executor import AsyncExecutor, get_loop
+from backend.core.concurrency import AdaptiveConcurrencyLimiter
+
+
+def test_acquire_async_respects_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial=3, max_limit=3)
+    active = []
+    peak = []
+
+    async def request():
+        await limiter.acquire_async()
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.01)
+        active.pop()
+        limiter.release('success', 0.01)
+
+    async def main():
+        await asyncio.gather(*(request() for _ in range(20)))
+
+    asyncio.run_coroutine_threadsafe(main(), get_loop()).result(timeout=5)
+    assert max(peak) == 3
+    assert limiter.snapshot()["in_flight"] == 0
+
+
+def test_executor_cancels_running_coroutines():
+    cancelled = []
+
+    async def slow(x):
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.append(x)
+            raise
+
+    async def fast(x):
+        return x * 2
+
+    executor = AsyncExecutor(max_batches=4)
+    assert executor.submit(fast, 21).result(timeout=5) == 42
+    futures = [executor.submit(slow, i) for i in range(3)]
+    time.sleep(0.1)
+    started = time.monotonic()
+    executor.shutdown(wait=True, cancel_futures=True)
+    assert time.monotonic() - started < 2
+    assert all(f.cancelled() for f in futures)
+    concurrent.futures.wait(futures)
+    time.sleep(0.1)
+    assert sorted(cancelled) == [0, 1, 2]
+
+
+def test_call_api_async_rotates_and_retries(make_service):
+    calls = []
+
+    def provider(name, fail):
+        async def create(**kw):
+            calls.append(name)
+            if fail:
+                raise openai.APITimeoutError(request=None)
+            return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content="[]"))])
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        return {"client": None, "async_client": client, "model": "m", "name": name}
+
+    service = make_service(provider("bad", True), provider("good", False))
+    result = asyncio.run_coroutine_threadsafe(service.call_api_async("prompt"), get_loop()).result(timeout=5)
+    assert result == "[]"
+    assert calls == ["bad", "good"]
+    assert service.concurrency.snapshot()["in_flight"] == 0
+
+
+def test_async_batch_keeps_blocking_work_off_the_loop(tmp_path, make_service):
+    import threading
+
+    import pandas as pd
+    from backend.core.convergence import ConvergencePolicy
+    from backend.core.engine import ReviewEngine
+    from backend.core.journal import BatchJournal
+    from backend.core.term_history import TermHistoryStore
+
+    engine = ReviewEngine(ai_service=make_service())
+    engine.convergence = ConvergencePolicy.from_config({})
+    engine.term_history = TermHistoryStore(str(tmp_path / "term_history.sqlite"))
+    threads = {}
+
+    def record(name, fn):
+        def wrapper(*args):
+            threads[name] = threading.current_thread()
+            return fn(*args)
+        return wrapper
+
+    async def process_batch_async(batch, *args, **kwargs):
+        threads["request"] = threading.current_thread()
+        return [{"korean_term": t} for t in batch["src"]]
+
+    engine._prepare_batch = record("prepare", engine._prepare_batch)
+    engine._complete_batch = record("complete", engine._complete_batch)
+    engine.processor.process_batch_async = process_batch_async
+    journal = BatchJournal(str(tmp_path / "batch_journal.jsonl"))
+    batch = pd.DataFrame({"src": ["가", "나"], "dst": ["A", "B"], "frequency": [1, 1]})
+
+    coro = engine._process_batch_async(1, 0, batch, "", {}, journal)
+    result = asyncio.run_coroutine_threadsafe(coro, get_loop()).result(timeout=5)
+    engine.term_history.close()
+    assert result == [{"korean_term": "가"}, {"korean_term": "나"}]
+    assert threads["request"].name == "async-engine"
+    assert threads["prepare"].name != "async-engine" and threads["complete"].name != "async-engine"
+    assert list(journal.load()) == [(1, 0)]
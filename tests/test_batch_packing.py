@@ -0,0 +1,54 @@
+import pandas as pd
+
+from backend.core.batch_packing import pack, token_budget
+from backend.core.glossary_processor import GlossaryProcessor
+
+
+def test_pack_respects_budgets():
+    # Prompt budget: fixed 100 + rows <= 1000; output <= 500; at most 4 terms
+    slices = pack([300, 300, 300, 50, 50, 50, 50, 50, 2000, 10], [100] * 10, 100, 1000, 500, 4)
+    assert slices == [slice(0, 3), slice(3, 7), slice(7, 8), slice(8, 9), slice(9, 10)]
+
+
+def test_pack_output_limit():
+    assert pack([1] * 10, [300] * 10, 0, 10000, 1000, 100) == [slice(0, 3), slice(3, 6), slice(6, 9), slice(9, 10)]
+    assert pack([], [], 0, 100, 100, 10) == []
+
+
+def test_token_budget_uses_smallest_provider():
+    providers = [{"context_window": 128000, "max_output_tokens": 8192}, {"context_window": 32000, "max_output_tokens": 4096}, {}]
+    assert token_budget(providers, headroom=1.0) == (32000 - 4096, 4096)
+    assert token_budget([], headroom=1.0) == (65536 - 8192, 8192)
+
+
+def test_term_tokens_follow_context_length():
+    processor = GlossaryProcessor.__new__(GlossaryProcessor)
+    processor.config = {}
+    df = pd.DataFrame({"src": ["가", "나"], "dst": ["甲", "乙"], "frequency": [4, 4]})
+    prompt_tokens, output_tokens = processor.term_tokens(df, "", {"가": "짧다", "나": "길다 " * 200}, output_per_term=150)
+    assert prompt_tokens[1] - prompt_tokens[0] > 300
+    assert output_tokens == [154, 154]
+    assert processor.prompt_tokens("背景" * 100) - processor.prompt_tokens("") == 200
+
+
+def test_request_uses_provider_output_limit(make_service):
+    service = make_service()
+    service.stream_responses = False
+    assert service._request_kwargs("m", "p")["max_tokens"] == 8192
+    assert service._request_kwargs("m", "p", 4096)["max_tokens"] == 4096
+
+
+def test_packing_budget_covers_providers_still_being_checked(make_service):
+    from backend.core.engine import ReviewEngine
+
+    service = make_service()
+    large = {"name": "large", "context_window": 128000, "max_output_tokens": 8192}
+    small = {"name": "small", "context_window": 16000, "max_output_tokens": 2048}
+    service.providers = [large, small]
+    service.valid_providers = [large]  # small has not passed its check yet but may join mid-run
+    engine = ReviewEngine(ai_service=service)
+    engine.config = {"batch_packing": True, "output_tokens_per_term": 200, "max_batch_terms": 100}
+    df = pd.DataFrame({"src": [f"용어{i}" for i in range(40)], "dst": ["译"] * 40, "frequency": [4] * 40})
+    slices = engine._batch_slices(df, 10, "", {})
+    # 2048 * 0.9 output tokens fit 8 verdicts of ~210 tokens; the large provider alone would allow 35
+    assert max(s.stop - s.start for s in slices) <= 8
@@ -0,0 +1,28 @@
+from benchmarks import run_benchmark
+from benchmarks.mock_openai import MockOpenAIServer
+
+
+def test_benchmark_smoke(monkeypatch):
+    # Keep the benchmark harness runnable: tiny end-to-end run against the local stub
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1,localhost")
+    from backend import config_manager
+    monkeypatch.setattr(config_manager, "CONFIG_PATH", config_manager.CONFIG_PATH)  # run_single points it at a temp cfg.json
+    server = MockOpenAIServer(latency=0.0).start()
+    try:
+        args = run_benchmark.build_parser().parse_args(["--rounds", "2", "--batch-size", "5", "--workers", "2"])
+        result = run_benchmark.run_single(40, server.base_url, args)
+    finally:
+        server.stop()
+
+    assert result["ok"], result["error"]
+    assert result["terms_processed"] > 40
+    assert result["requests"] >= 8  # 8 batches in round 1, converged terms may skip some in round 2
+    assert result["completion_tokens"] > 0
+    assert "pipeline" in result["phases_seconds"]
+
+
+def test_compare_flags_regressions():
+    baseline = {"results": [{"size": 1000, "terms_per_sec": 100.0, "peak_rss_mb": 100.0}]}
+    assert run_benchmark.compare([{"size": 1000, "terms_per_sec": 90.0, "peak_rss_mb": 110.0}], baseline, 0.15) == []
+    problems = run_benchmark.compare([{"size": 1000, "terms_per_sec": 50.0, "peak_rss_mb": 200.0}], baseline, 0.15)
+    assert len(problems) == 2
@@ -0,0 +1,41 @@
+import json
+
+from backend import cli
+
+
+def test_usage_error_exit_code(capsys):
+    assert cli.main(['review']) == cli.EXIT_USAGE
+
+
+def test_missing_directory_fails(tmp_path, capsys):
+    missing = str(tmp_path / "missing")
+    assert cli.main(['review', missing, '--quiet']) == cli.EXIT_FAILED
+
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert events == [{"event": "error", "time": events[0]["time"], "directory": missing,
+                       "message": "Directory does not exist"}]
+
+
+def test_review_stdout_is_only_json_events(tmp_path, monkeypatch, capsys):
+    from benchmarks import run_benchmark
+    from benchmarks.mock_openai import MockOpenAIServer
+
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1,localhost")
+    directory = tmp_path / "novel"
+    directory.mkdir()
+    run_benchmark.generate_dataset(str(directory), 12)
+    config = tmp_path / "cfg.json"
+    server = MockOpenAIServer(latency=0.0).start()
+    try:
+        bench_args = run_benchmark.build_parser().parse_args(["--batch-size", "5", "--workers", "2"])
+        run_benchmark.write_config(str(config), server.base_url, bench_args)
+        code = cli.main(['--config', str(config), 'review', str(directory), '--interval', '0.1'])
+        print("printed after the review")  # stdout is restored once the review is done
+    finally:
+        server.stop()
+
+    out = capsys.readouterr().out.splitlines()
+    assert out[-1] == "printed after the review"
+    events = [json.loads(line) for line in out[:-1]]
+    assert code == cli.EXIT_OK
+    assert events[-1]["event"] == "finished" and events[-1]["state"] == "completed"
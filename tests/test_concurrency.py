@@ -0,0 +1,38 @@
+from backend.core.concurrency import AdaptiveConcurrencyLimiter
+
+
+def test_additive_increase_multiplicative_decrease():
+    limiter = AdaptiveConcurrencyLimiter(initial=4, min_limit=1, max_limit=8, cooldown=0)
+    for _ in range(40):
+        limiter.acquire()
+        limiter.release('success', latency=1.0)
+    assert limiter.snapshot()["limit"] == 8
+
+    limiter.acquire()
+    limiter.release('overload')
+    assert limiter.snapshot()["limit"] == 5  # 8 * 0.7
+
+    limiter.acquire()
+    limiter.release('error')
+    assert limiter.snapshot()["limit"] == 5
+    assert limiter.snapshot()["in_flight"] == 0
+
+
+def test_slow_responses_do_not_grow_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial=2, max_limit=8)
+    limiter.acquire()
+    limiter.release('success', latency=1.0)
+    start = limiter.limit
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release('success', latency=50.0)
+    assert limiter.limit == start
+
+
+def test_backoff_once_per_cooldown():
+    limiter = AdaptiveConcurrencyLimiter(initial=10, max_limit=10, cooldown=60)
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release('overload')
+    assert limiter.snapshot()["limit"] == 7
+    assert limiter.snapshot()["backoffs"] == 1
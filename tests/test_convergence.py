@@ -0,0 +1,34 @@
+import pytest
+
+from backend.core.convergence import ConvergencePolicy
+
+KEEP = {"original_translation": "甲", "recommended_translation": "甲", "should_delete": False}
+MODIFY = {"original_translation": "甲", "recommended_translation": "甲二", "should_delete": False}
+
+
+def test_default_policy_matches_consensus_skip():
+    policy = ConvergencePolicy.from_config({})
+    assert policy.converged(2, [MODIFY, MODIFY], "B") is None
+    assert policy.converged(3, [MODIFY], "B") is None
+    assert policy.converged(3, [KEEP, MODIFY], "B") is None
+    assert policy.converged(3, [KEEP, MODIFY, MODIFY], "B") == MODIFY
+
+
+def test_early_preset_accepts_kept_translation_from_round_two():
+    policy = ConvergencePolicy.from_config({"convergence_policy": "early"})
+    assert policy.converged(2, [KEEP], "A") == KEEP
+    assert policy.converged(2, [MODIFY], "A") is None
+
+
+def test_rules_can_be_limited_to_tiers():
+    policy = ConvergencePolicy.from_config({
+        "convergence_policy": [{"rule": "identical", "k": 1, "min_round": 2, "tiers": ["C"]}]
+    })
+    assert policy.converged(2, [MODIFY], "C") == MODIFY
+    assert policy.converged(2, [MODIFY], "S") is None
+
+
+def test_off_and_unknown_presets():
+    assert ConvergencePolicy.from_config({"convergence_policy": "off"}).converged(5, [KEEP] * 4, "B") is None
+    with pytest.raises(ValueError):
+        ConvergencePolicy.from_config({"convergence_policy": "nope"})
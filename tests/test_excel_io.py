@@ -0,0 +1,53 @@
+import math
+
+import openpyxl
+import pandas as pd
+
+from backend.core import excel_io
+from backend.core.round_buffer import RoundBuffer
+
+
+def test_write_dataframe_round_trips(tmp_path):
+    df = pd.DataFrame({"src": ["가나다", "b"], "dst": ["x", math.nan], "count": [1, 2]})
+    path = tmp_path / "out.xlsx"
+    assert excel_io.write_dataframe(str(path), df) == 2
+
+    back = pd.read_excel(path)
+    assert list(back.columns) == ["src", "dst", "count"]
+    assert back["src"].tolist() == ["가나다", "b"]
+    assert pd.isna(back["dst"][1])
+    assert back["count"].tolist() == [1, 2]
+
+    sheet = openpyxl.load_workbook(path).active
+    assert sheet.auto_filter.ref == "A1:C3"
+    assert sheet["A1"].font.b
+
+
+def test_round_buffer_streams_kept_rows(tmp_path):
+    buffer = RoundBuffer(pd.DataFrame({"src": ["가", "나", "다"], "dst": ["a", "b", "c"]}))
+    buffer.apply(1, slice(0, 3), [{}, {"should_delete": True}, {"recommended_translation": "C"}])
+
+    path = tmp_path / "stash.xlsx"
+    excel_io.write_rows(str(path), buffer.columns, buffer.iter_rows())
+    back = pd.read_excel(path)
+    assert back.to_dict("records") == buffer.to_frame().to_dict("records")
+    assert back["src"].tolist() == ["가", "다"]
+
+
+def test_read_excel_cache(tmp_path, monkeypatch):
+    path = tmp_path / "glossary.xlsx"
+    cache_dir = tmp_path / "log" / "cache"
+    excel_io.write_dataframe(str(path), pd.DataFrame({"src": ["가"], "dst": ["a"]}))
+
+    first = excel_io.read_excel(str(path), cache_dir=str(cache_dir))
+    assert len(list(cache_dir.glob("glossary.xlsx.*.pkl"))) == 1
+
+    # Unchanged file: served from the cache without parsing
+    monkeypatch.setattr(pd, "read_excel", lambda *a, **kw: (_ for _ in ()).throw(AssertionError("parsed")))
+    assert excel_io.read_excel(str(path), cache_dir=str(cache_dir)).equals(first)
+    monkeypatch.undo()
+
+    # Changed file: parsed again, the stale entry is replaced
+    excel_io.write_dataframe(str(path), pd.DataFrame({"src": ["나"], "dst": ["b"]}))
+    assert excel_io.read_excel(str(path), cache_dir=str(cache_dir))["src"].tolist() == ["나"]
+    assert len(list(cache_dir.glob("glossary.xlsx.*.pkl"))) == 1
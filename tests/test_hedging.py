@@ -0,0 +1,98 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from backend.core.async_executor import get_loop
+from backend.core.hedging import HedgePolicy
+
+
+def test_policy_percentile_and_budget():
+    policy = HedgePolicy(enabled=True, percentile=95, min_delay=0.5, max_ratio=0.1, min_samples=10)
+    for latency in range(1, 10):
+        policy.observe(latency)
+    assert policy.delay() is None  # not enough samples yet
+    for latency in range(10, 101):
+        policy.observe(latency)
+    assert policy.delay() == 96
+    assert not policy.try_hedge()  # 2 requests so far, 10% of that is less than one hedge
+    for _ in range(8):
+        policy.delay()
+    assert policy.try_hedge()
+    assert not policy.try_hedge()
+
+
+def _response(content):
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _service(make_service, slow, fast):
+    service = make_service(slow, fast)
+    service.hedging = HedgePolicy(enabled=True, min_delay=0.2, max_ratio=1.0, min_samples=1)
+    service.hedging.observe(0.1)
+    return service
+
+
+def test_slow_request_is_hedged_on_another_provider(make_service):
+    def client(delay, content):
+        def create(**kw):
+            time.sleep(delay)
+            return _response(content)
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    service = _service(make_service, {"client": client(3, "slow"), "model": "m", "name": "slow"},
+                       {"client": client(0, "fast"), "model": "m", "name": "fast"})
+    started = time.monotonic()
+    assert service.call_api("prompt") == "fast"
+    assert time.monotonic() - started < 2
+    assert service.hedging.snapshot()["hedge_wins"] == 1
+
+
+def test_async_hedge_cancels_the_loser(make_service):
+    cancelled = []
+
+    def client(delay, content):
+        async def create(**kw):
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(content)
+                raise
+            return _response(content)
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    service = _service(make_service, {"client": None, "async_client": client(30, "slow"), "model": "m", "name": "slow"},
+                       {"client": None, "async_client": client(0, "fast"), "model": "m", "name": "fast"})
+    result = asyncio.run_coroutine_threadsafe(service.call_api_async("prompt"), get_loop()).result(timeout=5)
+    assert result == "fast"
+    time.sleep(0.1)
+    assert cancelled == ["slow"]
+    assert service.concurrency.snapshot()["in_flight"] == 0
+
+
+
+def test_refused_hedge_leaves_half_open_provider_alone(make_service):
+    from backend.core.provider_health import ProviderHealth
+    from backend.core.rate_limit import ProviderLimiter
+
+    now = [0.0]
+    health = ProviderHealth(failure_threshold=1, open_seconds=30, clock=lambda: now[0])
+    health.record_failure()
+    now[0] = 31.0  # cooldown over: due a half-open probe
+    limiter = ProviderLimiter(rpm=60)
+    slow = {"client": None, "model": "m", "name": "slow"}
+    other = {"client": None, "model": "m", "name": "other", "health": health, "limiter": limiter}
+    service = _service(make_service, slow, other)
+    service.hedging.max_ratio = 0.0  # the cap refuses every hedge
+    service.hedging.delay()
+
+    assert service._hedge_target(slow, "prompt", None) is None
+    assert health.available()
+    assert not health.probe_in_flight
+    limiter.requests.wait_time(1)
+    assert limiter.requests.level == 60
+
+    # Budget granted but no provider ready: the claimed hedge is given back
+    service.hedging.max_ratio = 1.0
+    service.valid_providers = [slow]
+    assert service._hedge_target(slow, "prompt", None) is None
+    assert service.hedging.snapshot()["hedges"] == 0
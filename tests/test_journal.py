@@ -0,0 +1,82 @@
+from backend.core.journal import BatchJournal
+
+
+def test_journal_replays_and_compacts(tmp_path):
+    journal = BatchJournal(str(tmp_path / "batch_journal.jsonl"))
+    journal.append(2, 0, ["가"], [{"should_delete": False}])
+    journal.append(2, 3, ["나"], [{"should_delete": True}])
+    journal.append(3, 0, ["가"], [{}])
+
+    records = journal.load()
+    assert sorted(records) == [(2, 0), (2, 3), (3, 0)]
+    assert records[(2, 3)]["terms"] == ["나"]
+    assert records[(2, 3)]["results"] == [{"should_delete": True}]
+
+    journal.discard_through(2)
+    assert sorted(journal.load()) == [(3, 0)]
+    journal.discard_through(3)
+    assert journal.load() == {}
+
+
+def test_journal_ignores_torn_line(tmp_path):
+    path = tmp_path / "batch_journal.jsonl"
+    journal = BatchJournal(str(path))
+    journal.append(1, 0, ["가"], [{}])
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"round": 1, "batch": 1, "ter')
+
+    assert list(journal.load()) == [(1, 0)]
+
+
+def _engine(make_service, log_dir, sent, stop_at=None):
+    """ReviewEngine whose processor records the terms it sends; the `stop_at`-th request is lost to a crash."""
+    from backend.core.convergence import ConvergencePolicy
+    from backend.core.engine import ReviewEngine
+    from backend.core.term_history import TermHistoryStore
+
+    engine = ReviewEngine(ai_service=make_service())
+    engine.config = {"engine_mode": "threads"}
+    engine.convergence = ConvergencePolicy.from_config({"convergence_policy": "off"})
+    engine.term_history = TermHistoryStore(str(log_dir / "term_history.sqlite"))
+
+    def process_batch(batch, novel_background, reference_dict, **kwargs):
+        terms = batch["src"].tolist()
+        sent.append(terms)
+        if len(sent) == stop_at:
+            engine.stop_event.set()  # this batch and everything after it is lost
+            return None
+        # Round 1 deletes the first two terms, so the round-1 stash is shorter than the input
+        return [{"korean_term": t, "should_delete": t in ("t0", "t1") and len(sent) <= 5} for t in terms]
+
+    engine.processor.process_batch = process_batch
+    return engine
+
+
+def test_resume_mid_round_does_not_resend_journaled_batches(tmp_path, make_service):
+    import pandas as pd
+    from backend.core import excel_io
+    from backend.core.modification_log import ModificationLog
+
+    df = pd.DataFrame({"src": [f"t{i}" for i in range(20)], "dst": ["x"] * 20, "frequency": [1] * 20})
+    journal = BatchJournal(str(tmp_path / "batch_journal.jsonl"))
+
+    # Round 1 completes (5 batches of 4), round 2 stops at its third request
+    sent = []
+    engine = _engine(make_service, tmp_path, sent, stop_at=8)
+    engine._run_pipeline(df, 1, 2, 4, 1, str(tmp_path), "", {}, journal, ModificationLog(str(tmp_path)))
+    engine.term_history.close()
+    journaled = sorted(record["terms"] for record in journal.load().values())
+    assert journaled == sorted(sent[5:7])  # round 2 batches finish in any order
+
+    # Resume from the stash as _run_task does: 18 terms, but the same batches as before
+    stash = excel_io.read_excel(str(tmp_path / "glossary_output_1.xlsx")).fillna('')
+    modification_log = ModificationLog(str(tmp_path))
+    modification_log.discard_from(2)
+    resent = []
+    engine = _engine(make_service, tmp_path, resent)
+    engine.term_history.discard_after(1)
+    final = engine._run_pipeline(stash, 2, 2, 4, 1, str(tmp_path), "", {}, journal, modification_log)
+    engine.term_history.close()
+    round_2 = [["t2", "t3"], ["t4", "t5", "t6", "t7"], ["t8", "t9", "t10", "t11"], ["t12", "t13", "t14", "t15"], ["t16", "t17", "t18", "t19"]]
+    assert sorted(resent) == sorted(b for b in round_2 if b not in journaled)
+    assert len(final) == 18
@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+from backend.core.metrics import RunMetrics
+
+
+def test_rates_and_eta(clock):
+    clock.now = 1000.0
+    metrics = RunMetrics(window=60.0, clock=clock)
+    clock.now += 10
+    metrics.record_terms(50)
+    metrics.record_request(2.0, SimpleNamespace(prompt_tokens=1000, completion_tokens=200))
+    metrics.record_request(4.0, None)
+    metrics.set_remaining(batches_in_flight=3, round_terms=100, total_terms=500)
+
+    snap = metrics.snapshot()
+    assert snap["terms_per_sec"] == 5.0
+    assert snap["prompt_tokens_per_sec"] == 100.0
+    assert snap["completion_tokens_per_sec"] == 20.0
+    assert snap["latency_p95_ms"] == 4000
+    assert snap["eta_round_seconds"] == 20
+    assert snap["eta_total_seconds"] == 100
+    assert snap["batches_in_flight"] == 3
+
+    # Samples older than the window no longer count towards the rate
+    clock.now += 120
+    snap = metrics.snapshot()
+    assert snap["terms_per_sec"] == 0
+    assert snap["eta_total_seconds"] is None
+    assert snap["terms_done"] == 50
+
+
+def test_call_api_reports_usage(make_service):
+    usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5)
+    response = SimpleNamespace(usage=usage, choices=[SimpleNamespace(message=SimpleNamespace(content="[]"))])
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kw: response)))
+
+    service = make_service({"client": client, "model": "m", "name": "fake"})
+    seen = []
+    assert service.call_api("prompt", usage_callback=lambda latency, u: seen.append(u)) == "[]"
+    assert seen == [usage]
@@ -0,0 +1,43 @@
+import json
+
+import pandas as pd
+
+from backend.core.modification_log import LOG_COLUMNS, ModificationLog
+
+
+def _entry(round_num, term, action="Modify"):
+    return {"round": round_num, "term": term, "original": "a", "new": "b", "action": action}
+
+
+def test_modification_log_streams_exports(tmp_path):
+    log = ModificationLog(str(tmp_path))
+    log.append(1, [_entry(1, "가"), _entry(1, "나", "Delete")])
+    log.append(2, [_entry(2, "가")])
+    log.close_round(1)
+    log.close_round(2)
+    log.close_round(3)  # round without changes still gets a (empty) file
+
+    assert log.rounds() == [1, 2, 3]
+    assert [e["term"] for e in log.iter_entries(1)] == ["가", "나"]
+
+    assert log.export_xlsx(str(tmp_path / "modified_1.xlsx"), 1) == 2
+    round_df = pd.read_excel(tmp_path / "modified_1.xlsx")
+    assert list(round_df.columns) == LOG_COLUMNS
+    assert round_df["action"].tolist() == ["Modify", "Delete"]
+
+    log.export_json(str(tmp_path / "modified.json"))
+    with open(tmp_path / "modified.json", encoding="utf-8") as f:
+        assert [(e["round"], e["term"]) for e in json.load(f)] == [(1, "가"), (1, "나"), (2, "가")]
+
+
+def test_modification_log_discards_rounds_for_resume(tmp_path):
+    log = ModificationLog(str(tmp_path))
+    log.append(1, [_entry(1, "가")])
+    log.close_round(1)
+    log.append(2, [_entry(2, "나")])  # interrupted round, replayed from the journal on resume
+
+    log.discard_from(2)
+    assert log.rounds() == [1]
+    log.append(2, [_entry(2, "나")])
+    log.close()
+    assert [e["round"] for e in log.iter_entries()] == [1, 2]
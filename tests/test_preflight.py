@@ -0,0 +1,69 @@
+import threading
+import time
+
+from backend.core.preflight import KeyValidator
+
+
+def _provider(name, key):
+    return {"name": name, "api_key": key, "base_url": "http://example.invalid/v1", "model": "m"}
+
+
+def test_checks_run_concurrently_and_are_cached():
+    calls = []
+
+    def check(api_key, base_url, model, timeout):
+        calls.append(api_key)
+        time.sleep(0.2)
+        return api_key != "bad", "OK" if api_key != "bad" else "HTTP 401: invalid key"
+
+    validator = KeyValidator(check=check)
+    providers = [_provider(str(i), f"key{i}") for i in range(10)] + [_provider("bad", "bad")]
+    started = time.monotonic()
+    first = [validator.submit(p, 5) for p in providers]
+    second = [validator.submit(p, 5) for p in providers]
+    results = [f.result() for f in second]
+    assert [f.result() for f in first] == results
+    assert time.monotonic() - started < 1.0
+    assert len(calls) == 11  # the second submit of each key joined the running check
+    assert results[-1] == (False, "HTTP 401: invalid key", False)
+    assert validator.submit(providers[0], 5).result() == (True, "OK", True)
+    assert len(calls) == 11
+
+
+def test_cache_ttl(clock):
+    calls = []
+    validator = KeyValidator(ttl_seconds=600, check=lambda *args: (calls.append(args[0]) or args[0] == "good", "msg"), clock=clock)
+    good, bad = _provider("good", "good"), _provider("bad", "bad")
+    validator.submit(good, 5).result()
+    validator.submit(bad, 5).result()
+    clock.now = 120  # failures expire after a minute
+    assert validator.cached(good) == (True, "msg")
+    assert validator.cached(bad) is None
+    clock.now = 601
+    assert validator.cached(good) is None
+
+
+def test_validate_keys_starts_with_first_valid_provider(make_service):
+    release = threading.Event()
+
+    def check(api_key, base_url, model, timeout):
+        if api_key == "slow":
+            release.wait(5)
+        return api_key != "bad", "OK"
+
+    service = make_service()
+    service.key_validator = KeyValidator(check=check)
+    service.providers = [_provider("slow", "slow"), _provider("fast", "fast"), _provider("bad", "bad")]
+    logs = []
+    assert service.validate_keys(log_callback=logs.append, wait_all=False) == 1
+    assert [p["name"] for p in service.valid_providers] == ["fast"]
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while len(service.valid_providers) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [p["name"] for p in service.valid_providers] == ["fast", "slow"]
+
+    # Cached now: a second task start does not send any request
+    service.key_validator._check_key = None
+    assert service.validate_keys(wait_all=True) == 2
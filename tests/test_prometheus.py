@@ -0,0 +1,20 @@
+from backend.core import prometheus
+
+
+def test_counter_and_histogram_exposition():
+    requests = prometheus.Counter("test_requests_total", "Requests.", ["provider"])
+    latency = prometheus.Histogram("test_latency_seconds", "Latency.", ["provider"], buckets=(1, 5))
+    requests.inc(provider='a "quoted" name')
+    requests.inc(2, provider="b")
+    latency.observe(0.5, provider="b")
+    latency.observe(3, provider="b")
+
+    text = prometheus.render()
+    assert '# TYPE test_requests_total counter' in text
+    assert 'test_requests_total{provider="a \\"quoted\\" name"} 1' in text
+    assert 'test_requests_total{provider="b"} 2' in text
+    assert 'test_latency_seconds_bucket{provider="b",le="1"} 1' in text
+    assert 'test_latency_seconds_bucket{provider="b",le="5"} 2' in text
+    assert 'test_latency_seconds_bucket{provider="b",le="+Inf"} 2' in text
+    assert 'test_latency_seconds_sum{provider="b"} 3.5' in text
+    assert 'test_latency_seconds_count{provider="b"} 2' in text
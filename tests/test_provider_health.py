@@ -0,0 +1,52 @@
+import collections
+from types import SimpleNamespace
+
+import openai
+
+from backend.core.provider_health import ProviderHealth
+
+
+def test_breaker_opens_and_half_opens_with_one_probe(clock):
+    health = ProviderHealth(failure_threshold=3, open_seconds=10, clock=clock)
+    assert [health.record_failure() for _ in range(3)] == [False, False, True]
+    assert not health.available()
+
+    clock.now = 10
+    assert health.available()
+    health.acquire()
+    assert health.state == "half_open" and not health.available()  # only one probe at a time
+    health.record_failure()
+    assert health.state == "open" and health.open_seconds == 20
+
+    clock.now = 30
+    health.acquire()
+    health.record_success(1.0)
+    assert health.state == "closed" and health.open_seconds == 10 and health.available()
+
+
+def _provider(name, latency=None, fail=False):
+    def create(**kw):
+        if fail:
+            raise openai.InternalServerError("boom", response=SimpleNamespace(status_code=500, headers={}, request=None), body=None)
+        return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content="[]"))])
+    health = ProviderHealth(failure_threshold=3)
+    if latency is not None:
+        health.record_success(latency)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return {"client": client, "model": "m", "name": name, "health": health}
+
+
+def test_routing_is_weighted_by_latency(make_service):
+    service = make_service(_provider("fast", 0.5), _provider("slow", 5.0))
+    picks = collections.Counter(service._next_provider("p")[0]["name"] for _ in range(110))
+    assert picks == {"fast": 100, "slow": 10}
+
+
+def test_failing_provider_is_ejected(make_service):
+    service = make_service(_provider("bad", fail=True), _provider("good"))
+    for i in range(10):
+        assert service.call_api(f"prompt {i}") == "[]"
+    stats = service.provider_stats()
+    assert stats["bad"]["state"] == "open"
+    assert stats["bad"]["ejections"] == 1
+    assert stats["good"]["success_rate"] == 1.0
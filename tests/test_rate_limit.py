@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+import openai
+
+from backend.core.rate_limit import ProviderLimiter, TokenBucket, estimate_tokens
+
+
+def test_bucket_allows_burst_then_paces(clock):
+    bucket = TokenBucket(60, clock)
+    assert [bucket.reserve(1) for _ in range(60)] == [0.0] * 60
+    # Reservations queue behind each other at 1/sec
+    assert bucket.reserve(1) == 1.0
+    assert bucket.reserve(1) == 2.0
+    clock.now = 2.0
+    assert bucket.wait_time(1) == 1.0
+
+
+def test_tokens_settle_with_reported_usage(clock):
+    limiter = ProviderLimiter(tpm=6000, clock=clock)
+    estimate = limiter.estimate("가" * 1000)
+    assert estimate == 1000 + 1000
+    assert limiter.reserve(estimate) == 0.0
+    # The provider reported far more than estimated: the bucket is debited, later requests wait
+    limiter.settle(estimate, SimpleNamespace(prompt_tokens=4000, completion_tokens=2000))
+    assert limiter.wait_time(2000) == 20.0
+    assert estimate_tokens("hello world!") == 3
+
+
+def test_rate_limit_pauses_only_that_provider(make_service):
+    calls = []
+
+    def provider(name, limited):
+        def create(**kw):
+            calls.append(name)
+            if limited:
+                response = SimpleNamespace(status_code=429, headers={"retry-after": "30"}, request=None)
+                raise openai.RateLimitError("slow down", response=response, body=None)
+            return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content="[]"))])
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        return {"client": client, "model": "m", "name": name, "limiter": ProviderLimiter()}
+
+    service = make_service(provider("a", True), provider("b", False))
+    assert service.call_api("one") == "[]"
+    assert service.call_api("two") == "[]"
+    # a was tried once, then skipped while paused; no backoff sleep for anyone
+    assert calls == ["a", "b", "b"]
+    snapshot = service.provider_stats()
+    assert snapshot["a"]["rate_limited"] == 1 and snapshot["a"]["paused_seconds"] > 25
+    assert snapshot["b"]["rate_limited"] == 0
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+from backend.core.replay import ReplayStore
+
+
+def _service(make_service, content, calls):
+    def create(**kw):
+        calls.append(kw["messages"][0]["content"])
+        return SimpleNamespace(
+            usage=SimpleNamespace(prompt_tokens=12, completion_tokens=3),
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        )
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return make_service({"client": client, "model": "m", "name": "fake"})
+
+
+def test_record_then_replay(tmp_path, make_service):
+    path = str(tmp_path / "recordings.jsonl")
+    calls = []
+    service = _service(make_service, '[{"a": 1}]', calls)
+    service.replay = ReplayStore(path, "record")
+    assert service.call_api("prompt one") == '[{"a": 1}]'
+    assert len(calls) == 1
+
+    # Replay: served from disk, same usage reported, no request sent
+    service = _service(make_service, "live", calls)
+    service.replay = ReplayStore(path, "replay", latency=0)
+    usages = []
+    assert service.call_api("prompt one", usage_callback=lambda latency, usage: usages.append(usage)) == '[{"a": 1}]'
+    assert usages[0].prompt_tokens == 12
+    assert len(calls) == 1
+
+    # Unknown prompt fails by default, or goes to the live API with on_miss="live"
+    assert service.call_api("prompt two") is None
+    service.replay.on_miss = "live"
+    assert service.call_api("prompt two") == "live"
+    assert service.replay.snapshot()["misses"] == 2
+
+
+def test_repeated_prompt_served_in_order(tmp_path):
+    path = str(tmp_path / "recordings.jsonl")
+    recorder = ReplayStore(path, "record")
+    recorder.record("p", "fake", "m", 0.1, "first")
+    recorder.record("p", "fake", "m", 0.1, "second")
+
+    replay = ReplayStore(path, "replay", latency=0)
+    assert [replay.take("p")["content"] for _ in range(3)] == ["first", "second", "second"]
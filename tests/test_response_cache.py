@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+from backend.core.response_cache import ResponseCache, cache_key
+
+
+def test_lru_eviction_and_ttl(tmp_path, clock):
+    clock.now = 1000.0
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_entries=2, ttl_seconds=60, clock=clock)
+    cache.put("a", "m", "A")
+    clock.now += 1
+    cache.put("b", "m", "B")
+    clock.now += 1
+    assert cache.get("a")[0] == "A"  # a is now more recently used than b
+    cache.put("c", "m", "C")
+    assert cache.get("b") is None
+    assert cache.get("a")[0] == "A" and cache.get("c")[0] == "C"
+
+    clock.now += 120
+    assert cache.get("a") is None
+    snap = cache.snapshot()
+    assert (snap["hits"], snap["misses"], snap["evictions"]) == (3, 2, 1)
+    cache.close()
+
+    # Persistent: expired entries are dropped when the file is reopened
+    reopened = ResponseCache(str(tmp_path / "cache.sqlite"), clock=clock, ttl_seconds=60)
+    assert reopened.snapshot()["entries"] == 0
+
+
+def test_size_cap(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=250)
+    for i in range(5):
+        cache.put(str(i), "m", "x" * 100)
+    assert cache.snapshot()["entries"] == 2
+    assert cache.get("4") is not None
+
+
+def test_call_api_serves_unchanged_prompts_from_cache(tmp_path, make_service):
+    calls = []
+    def create(**kw):
+        calls.append(kw["messages"][0]["content"])
+        return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content='[{"a": 1}]'))])
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    service = make_service({"client": client, "model": "m", "name": "fake"})
+    service.response_cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+
+    assert service.call_api("prompt") == '[{"a": 1}]'
+    assert service.call_api("prompt") == '[{"a": 1}]'
+    assert len(calls) == 1
+    assert cache_key("m", 0.1, "prompt") != cache_key("other", 0.1, "prompt")
+
+    # Responses rejected by the validator are not cached
+    service.call_api("other prompt", cache_validator=lambda text: False)
+    service.call_api("other prompt")
+    assert len(calls) == 3
+    assert service.cache_stats()["hit_rate"] == 0.25
+
+
+def test_reload_keeps_requests_of_other_jobs_working(tmp_path):
+    from backend.core.ai_service import AIService
+
+    service = AIService()  # cache file next to the test's cfg.json
+    old = service.response_cache
+    old.put("k", "m", "answer")
+    service.reload_config()  # e.g. POST /config while another job is mid-request with `old`
+    assert service.response_cache is not old
+    assert service.response_cache.get("k")[0] == "answer"
+    assert old.get("k") is None
+    old.put("k2", "m", "late answer")  # dropped, not an error
+    assert service.response_cache.get("k2") is None
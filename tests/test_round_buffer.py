@@ -0,0 +1,60 @@
+import pandas as pd
+
+from backend.core.round_buffer import RoundBuffer
+
+
+def test_round_buffer_decisions():
+    df = pd.DataFrame({
+        'src': ['가', '나', '다', '라'],
+        'dst': ['甲', '乙', '丙', '丁'],
+        'frequency': [1, 2, 3, 4],
+        'info': ['物品', float('nan'), '角色/男性角色', '地点'],
+    })
+    buffer = RoundBuffer(df)
+    log = buffer.apply(2, slice(0, 2), [
+        {'should_delete': True, 'deletion_reason': '通用词'},
+        {'recommended_translation': '乙二', 'suggested_category': ''},
+    ])
+    log += buffer.apply(2, slice(2, 4), [
+        {'recommended_translation': '丙', 'suggested_category': '角色/女性角色'},
+        {'recommended_translation': ' 丁 ', 'suggested_category': '地点'},
+    ])
+
+    assert [(e['term'], e['action'], e['new']) for e in log] == [
+        ('가', 'Delete', '(Deleted)'),
+        ('나', 'Modify', '乙二'),
+        ('다', 'Category', '丙'),
+    ]
+    assert log[0]['reason'] == '通用词'
+    assert log[2]['original_category'] == '角色/男性角色'
+
+    out = buffer.to_frame()
+    assert out['src'].tolist() == ['나', '다', '라']
+    assert out['dst'].tolist() == ['乙二', '丙', '丁']
+    assert out['info'].tolist()[1:] == ['角色/女性角色', '地点']
+
+
+def test_round_buffer_adds_missing_info_column():
+    df = pd.DataFrame({'src': ['가'], 'dst': ['甲'], 'frequency': [1]})
+    buffer = RoundBuffer(df)
+    buffer.apply(1, slice(0, 1), [{'recommended_translation': '甲', 'suggested_category': '物品'}])
+    assert buffer.to_frame().to_dict('records') == [{'src': '가', 'dst': '甲', 'frequency': 1, 'info': '物品'}]
+
+
+def test_round_buffer_carries_batches_into_next_round():
+    df = pd.DataFrame({'src': ['가', '나', '다', '라'], 'dst': ['甲', '乙', '丙', '丁'], 'frequency': [1] * 4})
+    round1 = RoundBuffer(df)
+    round1.apply(1, slice(0, 2), [{'should_delete': True}, {'recommended_translation': '乙二'}])
+    round2 = round1.next_round()
+
+    # Second batch finishes round 1 after round 2 was opened
+    round1.apply(1, slice(2, 4), [{}, {'should_delete': True}])
+    assert round2.active_rows(slice(2, 4)).tolist() == [2, 3]
+    round2.carry_over(round1, slice(2, 4))
+    assert round2.active_rows(slice(2, 4)).tolist() == [2]
+
+    rows = round2.active_rows(slice(0, 2))
+    assert round2.frame(rows)['dst'].tolist() == ['乙二']
+    log = round2.apply(2, rows, [{'recommended_translation': '乙二'}])
+    assert log == []
+    assert round2.to_frame()['src'].tolist() == ['나', '다']
@@ -0,0 +1,102 @@
+import json
+import time
+
+import openai
+
+from backend.core import prometheus
+from backend.core.glossary_processor import GlossaryProcessor
+from backend.core.stream_parser import JsonArrayStream
+from benchmarks.mock_openai import TERMS_END, TERMS_START, MockOpenAIServer
+
+
+def test_parser_yields_elements_as_they_close():
+    items = [{"korean_term": "가", "justification": 'quote " brace } bracket ] \\'}, {"korean_term": "나", "nested": {"a": [1, 2]}}]
+    text = "```json\n" + json.dumps(items, ensure_ascii=False, indent=2) + "\n```"
+    parser = JsonArrayStream()
+    seen = []
+    for i in range(0, len(text), 7):
+        seen.extend(parser.feed(text[i:i + 7]))
+    assert seen == [(0, items[0]), (1, items[1])]
+    assert parser.done
+
+
+def test_parser_skips_broken_elements_but_keeps_indices():
+    parser = JsonArrayStream()
+    assert parser.feed('Here you go: [{"a": 1}, {"b": tru}, {"c": 3}') == [(0, {"a": 1}), (2, {"c": 3})]
+
+
+def _service(make_service, server, stall_timeout=0.5):
+    client = openai.OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+    service = make_service({"client": client, "model": "mock", "name": "mock", "api_key": "test", "base_url": server.base_url})
+    service.stream_responses = True
+    service.stream_stall_timeout = stall_timeout
+    return service
+
+
+def _prompt(terms):
+    items = [{"korean_term": t, "chinese_translation": t} for t in terms]
+    return TERMS_START + json.dumps(items, ensure_ascii=False) + TERMS_END
+
+
+def test_streamed_call_matches_and_reports_items(monkeypatch, make_service):
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1,localhost")
+    server = MockOpenAIServer(latency=0.05).start()
+    try:
+        service = _service(make_service, server)
+        items = []
+        usage = []
+        content = service.call_api(_prompt(["가", "나", "다"]), usage_callback=lambda latency, u: usage.append(u),
+                                   on_item=lambda index, item: items.append((index, item["korean_term"])))
+    finally:
+        server.stop()
+    assert [r["korean_term"] for r in json.loads(content)] == ["가", "나", "다"]
+    assert items == [(0, "가"), (1, "나"), (2, "다")]
+    assert usage[0].completion_tokens == len(content)
+
+
+def test_stalled_stream_is_aborted(monkeypatch, make_service):
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1,localhost")
+    server = MockOpenAIServer(latency=0.05, tokens_per_term=200, stall_ratio=1.0).start()
+    stalls = prometheus.STREAM_STALLS.value(provider="mock")
+    try:
+        service = _service(make_service, server)
+        items = {}
+        started = time.monotonic()
+        content = service.call_api(_prompt(["가", "나", "다", "라"]), on_item=items.setdefault)
+        elapsed = time.monotonic() - started
+    finally:
+        server.stop()
+    assert content is None
+    assert elapsed < 10
+    assert prometheus.STREAM_STALLS.value(provider="mock") - stalls == 3
+    assert 0 < len(items) < 4  # the part sent before the stall
+    assert service.concurrency.snapshot()["in_flight"] == 0
+
+
+class _FailingStream:
+    """call_api stand-in: the first call streams two verdicts and fails, later calls answer in full."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def call_api(self, prompt, log_callback=None, usage_callback=None, cache_validator=None, on_item=None):
+        self.prompts.append(prompt)
+        start = prompt.index(TERMS_START) + len(TERMS_START)
+        terms = json.loads(prompt[start:prompt.index(TERMS_END, start)])
+        answer = [{"korean_term": t["korean_term"], "recommended_translation": t["chinese_translation"] + "!"} for t in terms]
+        if len(self.prompts) == 1:
+            on_item(0, answer[0])
+            on_item(1, answer[1])
+            return None
+        return json.dumps(answer, ensure_ascii=False)
+
+
+def test_processor_keeps_streamed_prefix():
+    import pandas as pd
+    service = _FailingStream()
+    processor = GlossaryProcessor(service)
+    batch = pd.DataFrame({"src": ["가", "나", "다", "라"], "dst": ["A", "B", "C", "D"], "frequency": [1] * 4})
+    result = processor.process_batch(batch, "", {})
+    assert [r["recommended_translation"] for r in result] == ["A!", "B!", "C!", "D!"]
+    assert len(service.prompts) == 2
+    assert '"다"' in service.prompts[1] and '"가"' not in service.prompts[1].split(TERMS_START)[1]
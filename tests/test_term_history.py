@@ -0,0 +1,37 @@
+import json
+
+from backend.core.term_history import TermHistoryStore
+
+
+def test_store_orders_by_round_and_replaces(tmp_path):
+    store = TermHistoryStore(str(tmp_path / "term_history.sqlite"))
+    store.add_many(2, [("가", {"recommended_translation": "甲二"}), ("나", {"should_delete": True})])
+    store.add_many(1, [("가", {"recommended_translation": "甲"})])
+    store.add_many(2, [("가", {"recommended_translation": "甲三"})])
+
+    assert [r["recommended_translation"] for r in store.get("가")] == ["甲", "甲三"]
+    assert store.get("다") is None
+    assert "나" in store and "다" not in store
+    assert store.get_many(["가", "나", "다"]) == {
+        "가": [{"recommended_translation": "甲"}, {"recommended_translation": "甲三"}],
+        "나": [{"should_delete": True}],
+    }
+
+    store.discard_after(1)
+    assert store.get_many(["가", "나"]) == {"가": [{"recommended_translation": "甲"}]}
+    store.close()
+
+    # Reopening keeps everything without a reload step
+    reopened = TermHistoryStore(str(tmp_path / "term_history.sqlite"))
+    assert len(reopened) == 1
+    reopened.close()
+
+
+def test_import_legacy_json(tmp_path):
+    legacy = tmp_path / "term_history.json"
+    legacy.write_text(json.dumps({"가": [{"recommended_translation": "甲"}, {"recommended_translation": "甲"}]}), encoding="utf-8")
+    store = TermHistoryStore(str(tmp_path / "term_history.sqlite"))
+    assert store.import_json(str(legacy), through_round=2) == 1
+    store.discard_after(1)
+    assert store.get("가") == [{"recommended_translation": "甲"}]
+    store.close()
@@ -0,0 +1,43 @@
+import json
+import threading
+from types import SimpleNamespace
+
+from backend.core import tracing
+
+
+def test_spans_are_written_per_thread(tmp_path):
+    tracer = tracing.Tracer()
+
+    def worker():
+        with tracing.use(tracer), tracing.current().span("batch", cat="batch", round=1):
+            pass
+
+    thread = threading.Thread(target=worker, name="ThreadPoolExecutor-0_0")
+    thread.start()
+    thread.join()
+    with tracer.span("pipeline"):
+        pass
+
+    path = tmp_path / "trace.json"
+    assert tracer.save(str(path)) == 2
+    events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+    spans = {e["name"]: e for e in events if e["ph"] == "X"}
+    assert spans["batch"]["args"] == {"round": 1}
+    assert spans["batch"]["tid"] != spans["pipeline"]["tid"]
+    names = {e["args"]["name"] for e in events if e["ph"] == "M"}
+    assert "ThreadPoolExecutor-0_0" in names
+
+
+def test_call_api_records_attempts_only_when_traced(make_service):
+    response = SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content="[]"))])
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kw: response)))
+    service = make_service({"client": client, "model": "m", "name": "fake"})
+
+    assert tracing.current() is tracing.NULL_TRACER
+    service.call_api("prompt")
+
+    tracer = tracing.Tracer()
+    with tracing.use(tracer):
+        service.call_api("prompt")
+    assert [(e["name"], e["args"]["provider"]) for e in tracer._events] == [("attempt", "fake")]
+    assert tracing.current() is tracing.NULL_TRACER